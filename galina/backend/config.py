@@ -16,14 +16,110 @@ load_dotenv()
 LLM_API_ENDPOINT = os.getenv("LLM_API_ENDPOINT", "http://127.0.0.1:1234/v1/chat/completions")
 TTS_API_ENDPOINT = os.getenv("TTS_API_ENDPOINT", "https://lawyer.windexs.ru/v1/audio/speech")
 
-# Whisper Model Configuration
-WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny.en")
+# LLM HTTP connection pool (keep-alive)
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 100))
+LLM_POOL_PER_HOST = int(os.getenv("LLM_POOL_PER_HOST", 20))
+LLM_KEEPALIVE_TIMEOUT = float(os.getenv("LLM_KEEPALIVE_TIMEOUT", 30.0))
+
+# LLM streaming: coalesce partial messages every N tokens or M milliseconds
+LLM_STREAM_PARTIAL_TOKENS = int(os.getenv("LLM_STREAM_PARTIAL_TOKENS", 8))
+LLM_STREAM_PARTIAL_INTERVAL_MS = int(os.getenv("LLM_STREAM_PARTIAL_INTERVAL_MS", 150))
+
+# Whisper Model Configuration (multilingual: ".en" models only decode English,
+# so STT_LANGUAGE=auto needs a model without the suffix)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")
+
+# STT worker pool ("thread" or "process")
+STT_EXECUTOR = os.getenv("STT_EXECUTOR", "thread")
+STT_MAX_WORKERS = int(os.getenv("STT_MAX_WORKERS", 2))
+STT_MAX_QUEUE_SIZE = int(os.getenv("STT_MAX_QUEUE_SIZE", 16))  # also the pipeline's STT stage queue
+
+# Whisper model replicas and their share of the CPU cores (0 = auto: one replica
+# per thread worker, available cores split evenly between them)
+STT_MODEL_REPLICAS = int(os.getenv("STT_MODEL_REPLICAS", 0))
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", 0))
+
+# Load-adaptive STT quality: rungs from best to fastest as model[:beam], e.g.
+# "small:2,base:1,tiny:1" (empty = WHISPER_MODEL only). Every rung's model
+# stays loaded. Steps down when the STT queue or average latency reaches the
+# DOWN threshold, back up once both are at or below the UP threshold.
+STT_QUALITY_LADDER = os.getenv("STT_QUALITY_LADDER", "")
+STT_LADDER_DOWN_QUEUE = int(os.getenv("STT_LADDER_DOWN_QUEUE", 4))
+STT_LADDER_UP_QUEUE = int(os.getenv("STT_LADDER_UP_QUEUE", 1))
+STT_LADDER_DOWN_LATENCY = float(os.getenv("STT_LADDER_DOWN_LATENCY", 3.0))  # seconds
+STT_LADDER_UP_LATENCY = float(os.getenv("STT_LADDER_UP_LATENCY", 1.0))  # seconds
+STT_LADDER_COOLDOWN = float(os.getenv("STT_LADDER_COOLDOWN", 5.0))  # seconds between rung changes
+
+# Speech language: a language code for every session, or "auto" to detect each
+# session's language on its first utterances and pin it (English-only models
+# always decode English). A pinned session is re-detected when transcript
+# confidence (average log probability) drops below STT_LANGUAGE_RECHECK_LOGPROB.
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "auto")
+STT_LANGUAGE_DETECT_UTTERANCES = int(os.getenv("STT_LANGUAGE_DETECT_UTTERANCES", 2))
+STT_LANGUAGE_PIN_PROBABILITY = float(os.getenv("STT_LANGUAGE_PIN_PROBABILITY", 0.9))
+STT_LANGUAGE_RECHECK_LOGPROB = float(os.getenv("STT_LANGUAGE_RECHECK_LOGPROB", -1.0))
+
+# Trim silence before STT and skip utterances without speech
+STT_TRIM_SILENCE = os.getenv("STT_TRIM_SILENCE", "true").lower() == "true"
+STT_TRIM_PAD_MS = int(os.getenv("STT_TRIM_PAD_MS", 200))
+
+# Micro-batching of concurrent utterances (1 disables; pays off on GPU / many-core hosts)
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", 1))
+STT_BATCH_MAX_WAIT_MS = float(os.getenv("STT_BATCH_MAX_WAIT_MS", 10))
+
+# Partial transcriptions of streamed audio while the user speaks (0 disables)
+STT_PARTIAL_INTERVAL = float(os.getenv("STT_PARTIAL_INTERVAL", 1.0))  # seconds of new audio between partials
+STT_PARTIAL_WINDOW = float(os.getenv("STT_PARTIAL_WINDOW", 15.0))  # longest window re-decoded per partial
 
 # TTS Configuration
 TTS_MODEL = os.getenv("TTS_MODEL", "tts-1")
 TTS_VOICE = os.getenv("TTS_VOICE", "tara")
 TTS_FORMAT = os.getenv("TTS_FORMAT", "wav")
 
+# Async TTS connection pool (keep-alive) and streaming of audio chunks as they are
+# rendered (negotiated per connection; one tts_chunk per sentence otherwise)
+TTS_POOL_SIZE = int(os.getenv("TTS_POOL_SIZE", 32))
+TTS_POOL_PER_HOST = int(os.getenv("TTS_POOL_PER_HOST", 16))
+TTS_KEEPALIVE_TIMEOUT = float(os.getenv("TTS_KEEPALIVE_TIMEOUT", 30.0))
+TTS_STREAM_CHUNK_BYTES = int(os.getenv("TTS_STREAM_CHUNK_BYTES", 4096))
+TTS_STREAM_ENABLED = os.getenv("TTS_STREAM_ENABLED", "true").lower() == "true"
+
+# Long texts sent to TTSClient in one call are split at sentence boundaries and the
+# segments synthesized in parallel, then joined in order (0 disables splitting).
+# For direct TTSClient callers only: the pipeline already segments responses into
+# sentences of at most TTS_SEGMENT_MAX_CHARS, which never reach this threshold.
+TTS_SPLIT_CHARS = int(os.getenv("TTS_SPLIT_CHARS", 600))
+TTS_SPLIT_SEGMENT_CHARS = int(os.getenv("TTS_SPLIT_SEGMENT_CHARS", 300))
+TTS_SPLIT_CONCURRENCY = int(os.getenv("TTS_SPLIT_CONCURRENCY", 4))
+TTS_SPLIT_RETRIES = int(os.getenv("TTS_SPLIT_RETRIES", 2))
+
+# Transcoding of WAV/PCM TTS output for the wire: clients negotiate "ogg" (Opus),
+# "webm" (Opus) or "mp3" with tts_format; TTS_WIRE_FORMAT applies to clients that
+# don't (empty sends TTS output as synthesized)
+TTS_TRANSCODE_ENABLED = os.getenv("TTS_TRANSCODE_ENABLED", "true").lower() == "true"
+TTS_WIRE_FORMAT = os.getenv("TTS_WIRE_FORMAT", "")
+TTS_OPUS_BITRATE = int(os.getenv("TTS_OPUS_BITRATE", 24000))
+TTS_MP3_BITRATE = int(os.getenv("TTS_MP3_BITRATE", 48000))
+TTS_TRANSCODE_PAGE_MS = int(os.getenv("TTS_TRANSCODE_PAGE_MS", 100))  # audio per Ogg page / WebM cluster
+
+# Cache of synthesized audio keyed by (text, model, voice, format, speed):
+# memory LRU in front of a disk directory (empty TTS_CACHE_DIR keeps it in memory only)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 16 * 1024 * 1024))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", 256 * 1024 * 1024))
+TTS_CACHE_MAX_CHARS = int(os.getenv("TTS_CACHE_MAX_CHARS", 500))  # longer texts are not cached
+
+# Fixed phrases (greetings, fillers, error messages) rendered into the TTS cache at
+# startup and pinned there (empty TTS_PRERENDER_PHRASES disables the warm-up)
+TTS_PRERENDER_PHRASES = os.getenv("TTS_PRERENDER_PHRASES", os.path.join("prompts", "tts_phrases.json"))
+TTS_PRERENDER_CONCURRENCY = int(os.getenv("TTS_PRERENDER_CONCURRENCY", 4))
+
+# Sentence-pipelined TTS: segment size and per-response synthesis fan-out
+TTS_SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", 2))
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", 20))
+TTS_SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", 200))
+
 # WebSocket Server Configuration
 WEBSOCKET_HOST = os.getenv("WEBSOCKET_HOST", "0.0.0.0")
 WEBSOCKET_PORT = int(os.getenv("WEBSOCKET_PORT", 8000))
@@ -35,11 +131,38 @@ WS_RATE_LIMIT_REQUESTS = int(os.getenv("WS_RATE_LIMIT_REQUESTS", 10))  # request
 WS_RATE_LIMIT_WINDOW = int(os.getenv("WS_RATE_LIMIT_WINDOW", 60))  # seconds
 WS_MAX_CONCURRENT_REQUESTS = int(os.getenv("WS_MAX_CONCURRENT_REQUESTS", 5))
 
+# Binary audio frames (negotiated per connection; JSON + base64 remains the fallback)
+WS_BINARY_FRAMES = os.getenv("WS_BINARY_FRAMES", "true").lower() == "true"
+
+# Pipeline Configuration (server-wide, shared by all connections)
+PIPELINE_MAX_QUEUE_SIZE = int(os.getenv("PIPELINE_MAX_QUEUE_SIZE", 50))
+PIPELINE_MAX_CONCURRENT = int(os.getenv("PIPELINE_MAX_CONCURRENT", 16))  # requests in flight across all stages
+PIPELINE_REQUEST_TIMEOUT = int(os.getenv("PIPELINE_REQUEST_TIMEOUT", 60))  # seconds from dispatch to result
+
+# Stage worker pools: each stage has its own workers and bounded queue (the STT
+# stage is sized from STT_MAX_WORKERS, STT_BATCH_SIZE and STT_MAX_QUEUE_SIZE)
+PIPELINE_LLM_WORKERS = int(os.getenv("PIPELINE_LLM_WORKERS", 8))
+PIPELINE_LLM_QUEUE_SIZE = int(os.getenv("PIPELINE_LLM_QUEUE_SIZE", 32))
+PIPELINE_TTS_WORKERS = int(os.getenv("PIPELINE_TTS_WORKERS", 8))
+PIPELINE_TTS_QUEUE_SIZE = int(os.getenv("PIPELINE_TTS_QUEUE_SIZE", 32))
+
+# Per-session conversation contexts (LRU/TTL bounded, optional spill to disk)
+SESSION_CONTEXT_MAX_SESSIONS = int(os.getenv("SESSION_CONTEXT_MAX_SESSIONS", 1000))
+SESSION_CONTEXT_MAX_BYTES = int(os.getenv("SESSION_CONTEXT_MAX_BYTES", 64 * 1024 * 1024))
+SESSION_CONTEXT_TTL = int(os.getenv("SESSION_CONTEXT_TTL", 1800))  # seconds
+SESSION_CONTEXT_SPILL = os.getenv("SESSION_CONTEXT_SPILL", "false").lower() == "true"
+
 # Audio Processing
-VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", 0.5))
-VAD_BUFFER_SIZE = int(os.getenv("VAD_BUFFER_SIZE", 30))
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", 0.5))  # speech score (0..1) for streamed-audio endpointing
+VAD_BUFFER_SIZE = int(os.getenv("VAD_BUFFER_SIZE", 30))  # endpointing frame length in ms
 AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", 48000))
 
+# Streamed audio ingest: server-side end-of-speech detection
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", 600))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", 250))
+VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", 300))
+STREAM_MAX_UTTERANCE_SECONDS = float(os.getenv("STREAM_MAX_UTTERANCE_SECONDS", 30.0))
+
 def get_config() -> Dict[str, Any]:
     """
     Returns all configuration settings as a dictionary.
@@ -50,18 +173,84 @@ def get_config() -> Dict[str, Any]:
     return {
         "llm_api_endpoint": LLM_API_ENDPOINT,
         "tts_api_endpoint": TTS_API_ENDPOINT,
+        "llm_pool_size": LLM_POOL_SIZE,
+        "llm_pool_per_host": LLM_POOL_PER_HOST,
+        "llm_keepalive_timeout": LLM_KEEPALIVE_TIMEOUT,
+        "llm_stream_partial_tokens": LLM_STREAM_PARTIAL_TOKENS,
+        "llm_stream_partial_interval_ms": LLM_STREAM_PARTIAL_INTERVAL_MS,
         "whisper_model": WHISPER_MODEL,
+        "stt_executor": STT_EXECUTOR,
+        "stt_max_workers": STT_MAX_WORKERS,
+        "stt_max_queue_size": STT_MAX_QUEUE_SIZE,
+        "stt_model_replicas": STT_MODEL_REPLICAS,
+        "stt_cpu_threads": STT_CPU_THREADS,
+        "stt_quality_ladder": STT_QUALITY_LADDER,
+        "stt_ladder_down_queue": STT_LADDER_DOWN_QUEUE,
+        "stt_ladder_up_queue": STT_LADDER_UP_QUEUE,
+        "stt_ladder_down_latency": STT_LADDER_DOWN_LATENCY,
+        "stt_ladder_up_latency": STT_LADDER_UP_LATENCY,
+        "stt_ladder_cooldown": STT_LADDER_COOLDOWN,
+        "stt_language": STT_LANGUAGE,
+        "stt_language_detect_utterances": STT_LANGUAGE_DETECT_UTTERANCES,
+        "stt_language_pin_probability": STT_LANGUAGE_PIN_PROBABILITY,
+        "stt_language_recheck_logprob": STT_LANGUAGE_RECHECK_LOGPROB,
+        "stt_trim_silence": STT_TRIM_SILENCE,
+        "stt_trim_pad_ms": STT_TRIM_PAD_MS,
+        "stt_batch_size": STT_BATCH_SIZE,
+        "stt_batch_max_wait_ms": STT_BATCH_MAX_WAIT_MS,
+        "stt_partial_interval": STT_PARTIAL_INTERVAL,
+        "stt_partial_window": STT_PARTIAL_WINDOW,
         "tts_model": TTS_MODEL,
         "tts_voice": TTS_VOICE,
         "tts_format": TTS_FORMAT,
+        "tts_pool_size": TTS_POOL_SIZE,
+        "tts_pool_per_host": TTS_POOL_PER_HOST,
+        "tts_keepalive_timeout": TTS_KEEPALIVE_TIMEOUT,
+        "tts_stream_chunk_bytes": TTS_STREAM_CHUNK_BYTES,
+        "tts_stream_enabled": TTS_STREAM_ENABLED,
+        "tts_split_chars": TTS_SPLIT_CHARS,
+        "tts_split_segment_chars": TTS_SPLIT_SEGMENT_CHARS,
+        "tts_split_concurrency": TTS_SPLIT_CONCURRENCY,
+        "tts_split_retries": TTS_SPLIT_RETRIES,
+        "tts_transcode_enabled": TTS_TRANSCODE_ENABLED,
+        "tts_wire_format": TTS_WIRE_FORMAT,
+        "tts_opus_bitrate": TTS_OPUS_BITRATE,
+        "tts_mp3_bitrate": TTS_MP3_BITRATE,
+        "tts_transcode_page_ms": TTS_TRANSCODE_PAGE_MS,
+        "tts_cache_enabled": TTS_CACHE_ENABLED,
+        "tts_cache_memory_bytes": TTS_CACHE_MEMORY_BYTES,
+        "tts_cache_dir": TTS_CACHE_DIR,
+        "tts_cache_disk_bytes": TTS_CACHE_DISK_BYTES,
+        "tts_cache_max_chars": TTS_CACHE_MAX_CHARS,
+        "tts_prerender_phrases": TTS_PRERENDER_PHRASES,
+        "tts_prerender_concurrency": TTS_PRERENDER_CONCURRENCY,
+        "tts_segment_concurrency": TTS_SEGMENT_CONCURRENCY,
+        "tts_segment_min_chars": TTS_SEGMENT_MIN_CHARS,
+        "tts_segment_max_chars": TTS_SEGMENT_MAX_CHARS,
         "websocket_host": WEBSOCKET_HOST,
         "websocket_port": WEBSOCKET_PORT,
         "vad_threshold": VAD_THRESHOLD,
         "vad_buffer_size": VAD_BUFFER_SIZE,
         "audio_sample_rate": AUDIO_SAMPLE_RATE,
+        "vad_end_silence_ms": VAD_END_SILENCE_MS,
+        "vad_min_speech_ms": VAD_MIN_SPEECH_MS,
+        "vad_pre_roll_ms": VAD_PRE_ROLL_MS,
+        "stream_max_utterance_seconds": STREAM_MAX_UTTERANCE_SECONDS,
         "ws_auth_enabled": WS_AUTH_ENABLED,
         "ws_auth_token": WS_AUTH_TOKEN,
         "ws_rate_limit_requests": WS_RATE_LIMIT_REQUESTS,
         "ws_rate_limit_window": WS_RATE_LIMIT_WINDOW,
+        "ws_binary_frames": WS_BINARY_FRAMES,
         "ws_max_concurrent_requests": WS_MAX_CONCURRENT_REQUESTS,
+        "pipeline_max_queue_size": PIPELINE_MAX_QUEUE_SIZE,
+        "pipeline_max_concurrent": PIPELINE_MAX_CONCURRENT,
+        "pipeline_request_timeout": PIPELINE_REQUEST_TIMEOUT,
+        "pipeline_llm_workers": PIPELINE_LLM_WORKERS,
+        "pipeline_llm_queue_size": PIPELINE_LLM_QUEUE_SIZE,
+        "pipeline_tts_workers": PIPELINE_TTS_WORKERS,
+        "pipeline_tts_queue_size": PIPELINE_TTS_QUEUE_SIZE,
+        "session_context_max_sessions": SESSION_CONTEXT_MAX_SESSIONS,
+        "session_context_max_bytes": SESSION_CONTEXT_MAX_BYTES,
+        "session_context_ttl": SESSION_CONTEXT_TTL,
+        "session_context_spill": SESSION_CONTEXT_SPILL,
     }
@@ -4,6 +4,8 @@ Vocalis Backend Server
 FastAPI application entry point.
 """
 
+import os
+import asyncio
 import logging
 import uvicorn
 from fastapi import FastAPI, WebSocket, Depends, HTTPException
@@ -15,10 +17,16 @@ import config
 
 # Import services
 from services.transcription import WhisperTranscriber
+from services.quality_ladder import QualityLadder, parse_ladder
 from services.llm import LLMClient
 from services.tts import TTSClient
+from services.tts_cache import TTSCache
+from services.tts_transcode import TTSTranscoder
 from services.auth import AuthService
 from services.vision import vision_service
+from services.pipeline import UnifiedPipeline
+from services.session_context import SessionContextStore
+from services.conversation_storage import ConversationStorage
 
 # Import routes
 from routes.websocket import websocket_endpoint
@@ -35,6 +43,7 @@ transcription_service = None
 llm_service = None
 tts_service = None
 auth_service = None
+pipeline_service = None
 # Vision service is a singleton already initialized in its module
 
 @asynccontextmanager
@@ -48,17 +57,48 @@ async def lifespan(app: FastAPI):
     # Initialize services on startup
     logger.info("Initializing services...")
     
-    global transcription_service, llm_service, tts_service, auth_service
+    global transcription_service, llm_service, tts_service, auth_service, pipeline_service
+
+    # STT quality rungs to fall back to under load (none configured: fixed model)
+    ladder_rungs = parse_ladder(cfg["stt_quality_ladder"])
+    quality_ladder = QualityLadder(
+        ladder_rungs,
+        step_down_queue=cfg["stt_ladder_down_queue"],
+        step_up_queue=cfg["stt_ladder_up_queue"],
+        step_down_latency=cfg["stt_ladder_down_latency"],
+        step_up_latency=cfg["stt_ladder_up_latency"],
+        cooldown=cfg["stt_ladder_cooldown"]
+    ) if ladder_rungs else None
+
+    # English-only models never run language detection
+    english_only = sorted({
+        model for model in [cfg["whisper_model"]] + [rung.model_size for rung in ladder_rungs]
+        if model.endswith(".en")
+    })
+    if cfg["stt_language"] == "auto" and english_only:
+        logger.warning(f"STT_LANGUAGE=auto with English-only Whisper model(s) {', '.join(english_only)}: "
+                       f"every session will be transcribed as English")
 
     # Initialize transcription service
     transcription_service = WhisperTranscriber(
         model_size=cfg["whisper_model"],
-        sample_rate=cfg["audio_sample_rate"]
+        sample_rate=cfg["audio_sample_rate"],
+        executor_type=cfg["stt_executor"],
+        max_workers=cfg["stt_max_workers"],
+        max_queue_size=cfg["stt_max_queue_size"],
+        batch_size=cfg["stt_batch_size"],
+        batch_max_wait_ms=cfg["stt_batch_max_wait_ms"],
+        model_replicas=cfg["stt_model_replicas"],
+        cpu_threads=cfg["stt_cpu_threads"],
+        quality_ladder=quality_ladder
     )
 
     # Initialize LLM service
     llm_service = LLMClient(
-        api_endpoint=cfg["llm_api_endpoint"]
+        api_endpoint=cfg["llm_api_endpoint"],
+        pool_size=cfg["llm_pool_size"],
+        pool_per_host=cfg["llm_pool_per_host"],
+        keepalive_timeout=cfg["llm_keepalive_timeout"]
     )
 
     # Initialize TTS service
@@ -66,7 +106,21 @@ async def lifespan(app: FastAPI):
         api_endpoint=cfg["tts_api_endpoint"],
         model=cfg["tts_model"],
         voice=cfg["tts_voice"],
-        output_format=cfg["tts_format"]
+        output_format=cfg["tts_format"],
+        chunk_size=cfg["tts_stream_chunk_bytes"],
+        cache=TTSCache(
+            memory_bytes=cfg["tts_cache_memory_bytes"],
+            disk_dir=cfg["tts_cache_dir"],
+            disk_bytes=cfg["tts_cache_disk_bytes"]
+        ) if cfg["tts_cache_enabled"] else None,
+        cache_max_chars=cfg["tts_cache_max_chars"],
+        pool_size=cfg["tts_pool_size"],
+        pool_per_host=cfg["tts_pool_per_host"],
+        keepalive_timeout=cfg["tts_keepalive_timeout"],
+        split_chars=cfg["tts_split_chars"],
+        split_segment_chars=cfg["tts_split_segment_chars"],
+        split_concurrency=cfg["tts_split_concurrency"],
+        split_retries=cfg["tts_split_retries"]
     )
 
     # Initialize authentication service
@@ -78,6 +132,59 @@ async def lifespan(app: FastAPI):
         max_concurrent=cfg["ws_max_concurrent_requests"]
     )
     
+    # Initialize per-session conversation contexts
+    context_store = SessionContextStore(
+        max_sessions=cfg["session_context_max_sessions"],
+        max_bytes=cfg["session_context_max_bytes"],
+        ttl=cfg["session_context_ttl"],
+        spill_storage=ConversationStorage(
+            storage_dir=os.path.join("conversations", ".context_spill")
+        ) if cfg["session_context_spill"] else None
+    )
+
+    # Initialize the unified pipeline shared by every WebSocket connection,
+    # so queue size and concurrency limits apply server-wide
+    pipeline_service = UnifiedPipeline(
+        transcriber=transcription_service,
+        llm_client=llm_service,
+        tts_client=tts_service,
+        auth_service=auth_service,
+        context_store=context_store,
+        max_queue_size=cfg["pipeline_max_queue_size"],
+        max_concurrent=cfg["pipeline_max_concurrent"],
+        request_timeout=cfg["pipeline_request_timeout"],
+        llm_workers=cfg["pipeline_llm_workers"],
+        llm_queue_size=cfg["pipeline_llm_queue_size"],
+        tts_workers=cfg["pipeline_tts_workers"],
+        tts_queue_size=cfg["pipeline_tts_queue_size"],
+        partial_min_tokens=cfg["llm_stream_partial_tokens"],
+        partial_interval=cfg["llm_stream_partial_interval_ms"] / 1000.0,
+        tts_segment_concurrency=cfg["tts_segment_concurrency"],
+        tts_segment_min_chars=cfg["tts_segment_min_chars"],
+        tts_segment_max_chars=cfg["tts_segment_max_chars"],
+        trim_silence=cfg["stt_trim_silence"],
+        trim_pad_ms=cfg["stt_trim_pad_ms"],
+        stt_language=cfg["stt_language"],
+        language_detect_utterances=cfg["stt_language_detect_utterances"],
+        language_pin_probability=cfg["stt_language_pin_probability"],
+        language_recheck_logprob=cfg["stt_language_recheck_logprob"],
+        tts_transcoder=TTSTranscoder(
+            source_format=cfg["tts_format"],
+            opus_bitrate=cfg["tts_opus_bitrate"],
+            mp3_bitrate=cfg["tts_mp3_bitrate"],
+            page_ms=cfg["tts_transcode_page_ms"]
+        ) if cfg["tts_transcode_enabled"] else None,
+        tts_wire_format=cfg["tts_wire_format"]
+    )
+    await pipeline_service.start()
+
+    # Warm the TTS cache with fixed phrases in the background; startup does not wait for it
+    prerender_task = None
+    if cfg["tts_prerender_phrases"] and tts_service.cache is not None:
+        prerender_task = asyncio.create_task(
+            pipeline_service.prerender_speech(cfg["tts_prerender_phrases"], cfg["tts_prerender_concurrency"])
+        )
+    
     # Initialize vision service (will download model if not cached)
     logger.info("Initializing vision service...")
     vision_service.initialize()
@@ -89,8 +196,14 @@ async def lifespan(app: FastAPI):
     # Cleanup on shutdown
     logger.info("Shutting down services...")
     
-    # No specific cleanup needed for these services,
-    # but we could add resource release code here if needed (maybe in a future release lex 31/03/25)
+    if prerender_task is not None and not prerender_task.done():
+        prerender_task.cancel()
+
+    # Stop the dispatcher and cancel any in-flight pipeline requests
+    await pipeline_service.stop()
+    transcription_service.close()
+    await llm_service.aclose()
+    await tts_service.aclose()
     
     logger.info("Shutdown complete")
 
@@ -137,6 +250,7 @@ async def health_check():
             "llm": llm_service is not None,
             "tts": tts_service is not None,
             "auth": auth_service is not None,
+            "pipeline": pipeline_service is not None and pipeline_service.is_running,
             "vision": vision_service.is_ready()
         },
         "config": {
@@ -150,7 +264,7 @@ async def health_check():
 @app.get("/config")
 async def get_full_config():
     """Get full configuration."""
-    if not all([transcription_service, llm_service, tts_service, auth_service]) or not vision_service.is_ready():
+    if not all([transcription_service, llm_service, tts_service, auth_service, pipeline_service]) or not vision_service.is_ready():
         raise HTTPException(status_code=503, detail="Services not initialized")
 
     return {
@@ -163,6 +277,7 @@ async def get_full_config():
             "rate_limit_window": auth_service.rate_limit_window,
             "max_concurrent": auth_service.max_concurrent
         },
+        "pipeline": pipeline_service.get_stats(),
         "system": config.get_config()
     }
 
@@ -172,10 +287,22 @@ async def websocket_route(websocket: WebSocket):
     """WebSocket endpoint for bidirectional audio streaming."""
     await websocket_endpoint(
         websocket,
-        transcription_service,
-        llm_service,
-        tts_service,
-        auth_service
+        pipeline_service,
+        binary_frames=config.WS_BINARY_FRAMES,
+        tts_stream=config.TTS_STREAM_ENABLED,
+        audio_stream_settings={
+            "sample_rate": config.AUDIO_SAMPLE_RATE,
+            "frame_ms": config.VAD_BUFFER_SIZE,
+            "threshold": config.VAD_THRESHOLD,
+            "end_silence_ms": config.VAD_END_SILENCE_MS,
+            "min_speech_ms": config.VAD_MIN_SPEECH_MS,
+            "pre_roll_ms": config.VAD_PRE_ROLL_MS,
+            "max_utterance_seconds": config.STREAM_MAX_UTTERANCE_SECONDS
+        },
+        partial_settings={
+            "interval": config.STT_PARTIAL_INTERVAL,
+            "window_seconds": config.STT_PARTIAL_WINDOW
+        }
     )
 
 # Run server directly if executed as script
@@ -10,17 +10,20 @@ import asyncio
 import numpy as np
 import base64
 import os
+import time
 from typing import Dict, Any, List, Optional, AsyncGenerator
 from fastapi import WebSocket, WebSocketDisconnect, BackgroundTasks
 from pydantic import BaseModel
 from datetime import datetime
 
-from services.transcription import WhisperTranscriber
+from services.transcription import WhisperTranscriber, StreamingTranscription
 from services.llm import LLMClient
 from services.tts import TTSClient
 from services.auth import AuthService
 from services.pipeline import UnifiedPipeline, RequestType
 from services.conversation_storage import ConversationStorage
+from services.framing import FrameKind, AudioCodec, decode_frame
+from services.audio_ingest import StreamingAudioIngest, pcm16_to_float16k, can_resample
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -81,6 +84,11 @@ class MessageType:
     SILENT_FOLLOWUP = "silent_followup"
     USER_PROFILE = "user_profile"
     USER_PROFILE_UPDATED = "user_profile_updated"
+
+    # Streamed audio ingest (chunks as binary AUDIO_STREAM frames or JSON)
+    AUDIO_STREAM_START = "audio_stream_start"
+    AUDIO_STREAM_CHUNK = "audio_stream_chunk"
+    AUDIO_STREAM_END = "audio_stream_end"
     
     # Session storage message types
     SAVE_SESSION = "save_session"
@@ -102,39 +110,58 @@ class MessageType:
 
 class WebSocketManager:
     """
-    Manages WebSocket connections and delegates to unified pipeline.
+    Manages a WebSocket connection and delegates to the shared unified pipeline.
     """
     
-    def __init__(
-        self,
-        transcriber: WhisperTranscriber,
-        llm_client: LLMClient,
-        tts_client: TTSClient,
-        auth_service: AuthService
-    ):
+    def __init__(self, pipeline: UnifiedPipeline, binary_frames_enabled: bool = True,
+                 tts_stream_enabled: bool = True,
+                 audio_stream_settings: Optional[Dict[str, Any]] = None,
+                 partial_settings: Optional[Dict[str, Any]] = None):
         """
         Initialize the WebSocket manager.
         
         Args:
-            transcriber: Whisper transcription service
-            llm_client: LLM client service
-            tts_client: TTS client service
-            auth_service: Authentication service
+            pipeline: Server-wide unified pipeline shared by all connections
+            binary_frames_enabled: Whether clients may negotiate binary audio frames
+            tts_stream_enabled: Whether clients may negotiate chunk-by-chunk TTS audio
+            audio_stream_settings: StreamingAudioIngest arguments for streamed audio
+            partial_settings: Partial transcription of streamed audio ("interval" seconds,
+                0 disables, and "window_seconds")
         """
-        # Create unified pipeline
-        self.pipeline = UnifiedPipeline(
-            transcriber=transcriber,
-            llm_client=llm_client,
-            tts_client=tts_client,
-            auth_service=auth_service,
-            max_queue_size=50,
-            max_concurrent=3,
-            request_timeout=30
-        )
+        # Shared pipeline (created once in main.lifespan)
+        self.pipeline = pipeline
         
         # State tracking
         self.active_connections: Dict[str, WebSocket] = {}  # session_token -> websocket
         self.client_sessions: Dict[str, str] = {}  # websocket -> session_token
+        self.client_ip = "unknown"
+
+        # Binary framing (negotiated in the authenticate message; JSON + base64 otherwise)
+        self.binary_frames_enabled = binary_frames_enabled
+        self.binary_frames = False
+        self._uploads: Dict[str, List[Any]] = {}  # request id -> [next sequence, bytearray, started at]
+        self.max_pending_uploads = 4  # Multi-frame uploads in progress at once
+        self.upload_timeout = 30.0  # Seconds an incomplete upload is kept
+
+        # TTS audio forwarded chunk by chunk as it is rendered (negotiated in the
+        # authenticate message; one self-contained tts_chunk per sentence otherwise)
+        self.tts_stream_enabled = tts_stream_enabled
+        self.tts_stream = False
+
+        # Wire format TTS audio is transcoded to ("" sends it as synthesized)
+        self.tts_format = ""
+
+        # Streamed audio ingest with server-side endpointing (created on audio_stream_start)
+        self.audio_stream_settings = audio_stream_settings or {}
+        self.audio_stream: Optional[StreamingAudioIngest] = None
+
+        # Partial transcriptions while the user speaks (one decode in flight at a time)
+        partial_settings = partial_settings or {}
+        self.partial_interval = partial_settings.get("interval", 1.0)
+        self.partial_window = partial_settings.get("window_seconds", 15.0)
+        self.stream_transcription: Optional[StreamingTranscription] = None
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial_position = 0.0  # Utterance seconds covered by the last partial
         
         # File paths
         self.prompt_path = os.path.join("prompts", "system_prompt.md")
@@ -233,10 +260,19 @@ class WebSocketManager:
             session_token = session_token_or_error
             self.active_connections[session_token] = websocket
             self.client_sessions[str(id(websocket))] = session_token
+            self.client_ip = client_ip
+
+            # Old clients don't ask for binary frames and keep getting base64 JSON
+            self.binary_frames = self.binary_frames_enabled and bool(auth_message.get("binary_frames", False))
+            self.tts_stream = self.tts_stream_enabled and bool(auth_message.get("tts_stream", False))
+            self.tts_format = self.pipeline.negotiate_tts_format(auth_message.get("tts_format"))
 
             # Send authentication success
             await self._send_status(websocket, "authenticated", {
                 "session_token": session_token,
+                "binary_frames": self.binary_frames,
+                "tts_stream": self.tts_stream,
+                "tts_format": self.tts_format or self.pipeline.tts_client.output_format,
                 "pipeline_stats": self.pipeline.get_stats()
             })
 
@@ -268,6 +304,20 @@ class WebSocketManager:
                 del self.active_connections[session_token]
             del self.client_sessions[websocket_id]
 
+            # Release this connection's queued and in-flight pipeline work
+            self.pipeline.cancel_session_requests(session_token)
+
+            # Stop streamed-audio partials, which would otherwise send to the closed socket
+            if self._partial_task is not None and not self._partial_task.done():
+                self._partial_task.cancel()
+            self._partial_task = None
+            self.stream_transcription = None
+            self.audio_stream = None
+            self._uploads.clear()
+
+            # Session tokens are not reused, so the conversation context is unreachable now
+            self.pipeline.context_store.release(session_token)
+
             # Clean up expired sessions periodically (every 10 disconnections)
             if len(self.active_connections) % 10 == 0:
                 self.pipeline.auth_service.cleanup_expired_sessions()
@@ -492,18 +542,20 @@ class WebSocketManager:
 
     # Greeting and silent followup handlers removed - now handled by unified pipeline
     
-    async def _handle_save_session(self, websocket: WebSocket, title: Optional[str] = None, session_id: Optional[str] = None):
+    async def _handle_save_session(self, websocket: WebSocket, session_token: str, title: Optional[str] = None, session_id: Optional[str] = None):
         """
         Handle save session request.
         
         Args:
             websocket: The WebSocket connection
+            session_token: Client session token
             title: Optional title for the session
             session_id: Optional ID for the session (for overwriting existing)
         """
         try:
-            # Get current conversation history from LLM client
-            messages = self.llm_client.conversation_history.copy()
+            # Get this session's conversation history
+            context = await self.pipeline.context_store.acquire(session_token)
+            messages = context.messages.copy()
             
             # Don't save empty conversations
             if not messages:
@@ -545,12 +597,13 @@ class WebSocketManager:
             logger.error(f"Error saving session: {e}")
             await self._send_error(websocket, f"Failed to save conversation: {str(e)}")
     
-    async def _handle_load_session(self, websocket: WebSocket, session_id: str):
+    async def _handle_load_session(self, websocket: WebSocket, session_token: str, session_id: str):
         """
         Handle load session request.
         
         Args:
             websocket: The WebSocket connection
+            session_token: Client session token
             session_id: ID of the session to load
         """
         try:
@@ -561,8 +614,9 @@ class WebSocketManager:
                 await self._send_error(websocket, f"Session not found: {session_id}")
                 return
             
-            # Update LLM client's conversation history
-            self.llm_client.conversation_history = session.get("messages", [])
+            # Replace this session's conversation history
+            context = await self.pipeline.context_store.acquire(session_token)
+            context.replace(session.get("messages", []))
             
             # Send confirmation
             await websocket.send_json({
@@ -659,16 +713,33 @@ class WebSocketManager:
                         message.get("client_ip", "unknown"),
                         session_token,
                         websocket,
-                        {"audio_bytes": audio_bytes}
+                        {"audio_bytes": audio_bytes},
+                        binary_frames=self.binary_frames,
+                        tts_stream=self.tts_stream,
+                        tts_format=self.tts_format
                     )
                 
+            elif message_type == MessageType.AUDIO_STREAM_START:
+                await self._handle_audio_stream_start(websocket, message)
+
+            elif message_type == MessageType.AUDIO_STREAM_CHUNK:
+                audio_base64 = message.get("audio_data", "")
+                if audio_base64:
+                    await self._feed_audio_stream(websocket, session_token, base64.b64decode(audio_base64))
+
+            elif message_type == MessageType.AUDIO_STREAM_END:
+                await self._handle_audio_stream_end(websocket, session_token)
+
             elif message_type == MessageType.GREETING:
                 await self.pipeline.submit_request(
                     RequestType.GREETING,
                     message.get("client_ip", "unknown"),
                     session_token,
                     websocket,
-                    {}
+                    {},
+                    binary_frames=self.binary_frames,
+                    tts_stream=self.tts_stream,
+                    tts_format=self.tts_format
                 )
                 
             elif message_type == MessageType.SILENT_FOLLOWUP:
@@ -678,7 +749,10 @@ class WebSocketManager:
                     message.get("client_ip", "unknown"),
                     session_token,
                     websocket,
-                    {"tier": tier}
+                    {"tier": tier},
+                    binary_frames=self.binary_frames,
+                    tts_stream=self.tts_stream,
+                    tts_format=self.tts_format
                 )
 
             # Vision handling
@@ -703,7 +777,7 @@ class WebSocketManager:
                 
             elif message_type == "update_user_profile":
                 name = message.get("name", "")
-                await self._handle_update_user_profile(websocket, name)
+                await self._handle_update_user_profile(websocket, session_token, name)
             
             elif message_type == "get_vision_settings":
                 await self._handle_get_vision_settings(websocket)
@@ -716,14 +790,14 @@ class WebSocketManager:
             elif message_type == MessageType.SAVE_SESSION:
                 title = message.get("title")
                 session_id = message.get("session_id")
-                await self._handle_save_session(websocket, title, session_id)
+                await self._handle_save_session(websocket, session_token, title, session_id)
                 
             elif message_type == MessageType.LOAD_SESSION:
                 session_id = message.get("session_id")
                 if not session_id:
                     await self._send_error(websocket, "Session ID is required")
                     return
-                await self._handle_load_session(websocket, session_id)
+                await self._handle_load_session(websocket, session_token, session_id)
                 
             elif message_type == MessageType.LIST_SESSIONS:
                 await self._handle_list_sessions(websocket)
@@ -737,14 +811,16 @@ class WebSocketManager:
                 
             # Utility messages
             elif message_type == "clear_history":
-                # Clear conversation history in pipeline's LLM client
-                self.pipeline.llm_client.clear_history(keep_system_prompt=True)
-                self.pipeline._initialize_conversation_context()
+                # Clear this session's conversation history
+                context = await self.pipeline.context_store.acquire(session_token)
+                context.clear(keep_system_prompt=True)
+                self.pipeline._initialize_conversation_context(context)
                 await self._send_status(websocket, "history_cleared", {})
 
             elif message_type == "interrupt":
-                # For now, just acknowledge - pipeline handles its own interruption
-                await self._send_status(websocket, "interrupt_acknowledged", {})
+                # Barge-in: stop work on the answer the user just talked over
+                freed = self.pipeline.cancel_session_requests(session_token, reason="interrupt")
+                await self._send_status(websocket, "interrupt_acknowledged", freed)
 
             elif message_type == "ping":
                 await websocket.send_json({
@@ -769,6 +845,234 @@ class WebSocketManager:
             logger.error(f"Error handling client message: {e}")
             await self._send_error(websocket, "Internal server error", {"code": ErrorCode.INTERNAL_ERROR})
     
+    async def handle_binary_frame(self, websocket: WebSocket, data: bytes):
+        """
+        Handle a binary frame (raw audio upload) from a client.
+
+        An utterance may span several frames with the same request id and
+        increasing sequence numbers; it is submitted once the final frame arrives.
+
+        Args:
+            websocket: The WebSocket connection
+            data: The received frame
+        """
+        try:
+            session_token = await self._validate_websocket_auth(websocket)
+            if not session_token:
+                return  # Error already sent
+
+            if not self.binary_frames:
+                raise ValueError("Binary frames were not negotiated|INVALID_MESSAGE_TYPE")
+
+            frame = decode_frame(data)
+            if frame.kind == FrameKind.AUDIO_STREAM:
+                if frame.codec not in (AudioCodec.PCM_S16LE, AudioCodec.UNKNOWN):
+                    raise ValueError(f"Streamed audio must be 16-bit PCM, got {frame.codec.name}|INVALID_REQUEST_DATA")
+                await self._feed_audio_stream(websocket, session_token, frame.payload)
+                return
+
+            if frame.kind != FrameKind.AUDIO_UPLOAD:
+                raise ValueError(f"Unexpected binary frame kind {frame.kind.name}|INVALID_MESSAGE_TYPE")
+
+            audio_bytes = self._collect_upload(frame)
+            if audio_bytes is None:
+                return  # More frames to come
+
+            await self.pipeline.submit_request(
+                RequestType.AUDIO,
+                self.client_ip,
+                session_token,
+                websocket,
+                {"audio_bytes": audio_bytes},
+                binary_frames=True,
+                tts_stream=self.tts_stream,
+                tts_format=self.tts_format
+            )
+
+        except ValueError as e:
+            error_msg = str(e)
+            await self._send_error(websocket, error_msg, {"code": self._map_error_to_code(error_msg)})
+        except Exception as e:
+            logger.error(f"Error handling binary frame: {e}")
+            await self._send_error(websocket, "Internal server error", {"code": ErrorCode.INTERNAL_ERROR})
+
+    async def _handle_audio_stream_start(self, websocket: WebSocket, message: Dict[str, Any]):
+        """
+        Start streamed audio ingest for this connection.
+
+        Args:
+            websocket: The WebSocket connection
+            message: Start message (optional "sample_rate" of the 16-bit mono PCM)
+        """
+        settings = dict(self.audio_stream_settings)
+        if "sample_rate" in message:
+            settings["sample_rate"] = int(message["sample_rate"])
+        sample_rate = settings.get("sample_rate", 48000)
+        if not 8000 <= sample_rate <= 48000 or not can_resample(sample_rate):
+            raise ValueError(f"Unsupported sample rate {settings['sample_rate']}|INVALID_REQUEST_DATA")
+
+        self.audio_stream = StreamingAudioIngest(**settings)
+        self._reset_partials()
+        await self._send_status(websocket, "audio_stream_started", {
+            "sample_rate": self.audio_stream.sample_rate,
+            "encoding": "pcm_s16le",
+            "frame_ms": settings.get("frame_ms", 30)
+        })
+
+    async def _feed_audio_stream(self, websocket: WebSocket, session_token: str, chunk: bytes):
+        """
+        Append a streamed audio chunk and submit utterances as endpointing completes them.
+
+        Args:
+            websocket: The WebSocket connection
+            session_token: Client session token
+            chunk: 16-bit mono PCM
+        """
+        if self.audio_stream is None:
+            raise ValueError("Audio stream not started|INVALID_REQUEST_DATA")
+
+        for event, utterance in self.audio_stream.feed(chunk):
+            if event == "speech_start":
+                await self._send_status(websocket, "speech_started", {})
+            else:
+                self._reset_partials()
+                await self._submit_utterance(websocket, session_token, utterance, self.audio_stream.sample_rate)
+
+        self._maybe_start_partial(websocket, session_token)
+
+    async def _handle_audio_stream_end(self, websocket: WebSocket, session_token: str):
+        """
+        End streamed audio ingest, submitting any utterance still in progress.
+
+        Args:
+            websocket: The WebSocket connection
+            session_token: Client session token
+        """
+        if self.audio_stream is None:
+            return
+
+        stream, self.audio_stream = self.audio_stream, None
+        self._reset_partials()
+        utterance = stream.flush()
+        if utterance is not None:
+            await self._submit_utterance(websocket, session_token, utterance, stream.sample_rate)
+        await self._send_status(websocket, "audio_stream_ended", {})
+
+    def _reset_partials(self):
+        """Start partial transcription afresh for the next utterance."""
+        # A decode still running for the previous utterance finishes in the background
+        # and its result is dropped; no new one starts until it is done
+        if self.stream_transcription is not None and self.stream_transcription.updates:
+            logger.debug(f"Partial transcription stats: {self.stream_transcription.get_stats()}")
+        self.stream_transcription = None
+        self._partial_position = 0.0
+        if self.partial_interval > 0 and hasattr(self.pipeline.transcriber, "atranscribe_partial"):
+            self.stream_transcription = StreamingTranscription(self.pipeline.transcriber, self.partial_window)
+
+    def _maybe_start_partial(self, websocket: WebSocket, session_token: str):
+        """Start a partial decode once enough new speech has arrived since the last one."""
+        stream, transcription = self.audio_stream, self.stream_transcription
+        if stream is None or transcription is None or not stream.in_speech:
+            return
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        duration = stream.utterance_duration
+        if duration - self._partial_position < self.partial_interval:
+            return
+
+        self._partial_position = duration
+        transcription.language = self.pipeline.get_session_language(session_token)
+        audio = pcm16_to_float16k(stream.current_utterance(), stream.sample_rate)
+        self._partial_task = asyncio.create_task(self._send_stream_partial(websocket, transcription, audio))
+
+    async def _send_stream_partial(self, websocket: WebSocket, transcription: StreamingTranscription, audio: np.ndarray):
+        """Decode the utterance so far and send it as a transcription_partial message."""
+        try:
+            result = await transcription.update(audio)
+        except Exception as e:
+            logger.error(f"Partial transcription failed: {e}")
+            return
+        if result is None or transcription is not self.stream_transcription:
+            # Workers busy, or the utterance already ended
+            return
+
+        text = " ".join(part for part in (result["committed"], result["tentative"]) if part)
+        if not text:
+            return
+        try:
+            await websocket.send_json({
+                "type": "transcription_partial",
+                "request_id": None,
+                "text": text,
+                "committed": result["committed"],
+                "tentative": result["tentative"],
+                "is_final": False,
+                "timestamp": datetime.now().isoformat(),
+                "version": "1.0"
+            })
+        except Exception as e:
+            logger.error(f"Failed to send partial transcription: {e}")
+
+    async def _submit_utterance(self, websocket: WebSocket, session_token: str, utterance: bytes, sample_rate: int):
+        """Submit an endpointed utterance (16-bit mono WAV) to the pipeline."""
+        await self._send_status(websocket, "speech_ended", {
+            "duration": round((len(utterance) - 44) / 2 / sample_rate, 2)
+        })
+        await self.pipeline.submit_request(
+            RequestType.AUDIO,
+            self.client_ip,
+            session_token,
+            websocket,
+            {"audio_bytes": utterance},
+            binary_frames=self.binary_frames,
+            tts_stream=self.tts_stream,
+            tts_format=self.tts_format
+        )
+
+    def _collect_upload(self, frame) -> Optional[bytes]:
+        """
+        Accumulate a multi-frame upload.
+
+        Args:
+            frame: Decoded audio upload frame
+
+        Returns:
+            The complete audio once the final frame has arrived, else None
+        """
+        # Common case: the whole utterance in one frame
+        if frame.sequence == 0 and frame.final:
+            self._uploads.pop(frame.request_id, None)
+            return bytes(frame.payload)
+
+        # Drop uploads whose remaining frames never came
+        now = time.time()
+        for request_id in [rid for rid, upload in self._uploads.items() if now - upload[2] > self.upload_timeout]:
+            logger.warning(f"Dropped incomplete audio upload {request_id} after {self.upload_timeout}s")
+            del self._uploads[request_id]
+
+        if frame.sequence == 0:
+            self._uploads.pop(frame.request_id, None)
+            if len(self._uploads) >= self.max_pending_uploads:
+                raise ValueError(f"Too many audio uploads in progress (limit {self.max_pending_uploads})|RESOURCE_LIMIT_EXCEEDED")
+            self._uploads[frame.request_id] = [0, bytearray(), now]
+
+        upload = self._uploads.get(frame.request_id)
+        if upload is None or frame.sequence != upload[0]:
+            self._uploads.pop(frame.request_id, None)
+            raise ValueError(f"Out-of-order audio frame {frame.sequence} for {frame.request_id}|INVALID_REQUEST_DATA")
+
+        upload[1] += frame.payload
+        upload[0] += 1
+        if len(upload[1]) > self.pipeline.max_audio_size_mb * 1024 * 1024:
+            self._uploads.pop(frame.request_id, None)
+            raise ValueError(f"Audio upload exceeds limit of {self.pipeline.max_audio_size_mb}MB|RESOURCE_LIMIT_EXCEEDED")
+
+        if not frame.final:
+            return None
+
+        self._uploads.pop(frame.request_id, None)
+        return bytes(upload[1])
+
     async def _handle_get_user_profile(self, websocket: WebSocket):
         """
         Send the current user profile to the client.
@@ -787,12 +1091,13 @@ class WebSocketManager:
             logger.error(f"Error sending user profile: {e}")
             await self._send_error(websocket, f"Error sending user profile: {str(e)}")
     
-    async def _handle_update_user_profile(self, websocket: WebSocket, name: str):
+    async def _handle_update_user_profile(self, websocket: WebSocket, session_token: str, name: str):
         """
         Update the user profile.
         
         Args:
             websocket: The WebSocket connection
+            session_token: Client session token
             name: User name to set
         """
         try:
@@ -802,7 +1107,9 @@ class WebSocketManager:
             # Update conversation context with the new name
             if success:
                 # Initialize conversation context with the updated name
-                self._initialize_conversation_context()
+                self.pipeline.user_profile = self.user_profile
+                context = await self.pipeline.context_store.acquire(session_token)
+                self.pipeline._initialize_conversation_context(context)
                 logger.info(f"Updated user profile name to: {name} and refreshed conversation context")
             else:
                 logger.error("Failed to update user profile")
@@ -1013,9 +1320,9 @@ class WebSocketManager:
                 prompt
             )
             
-            # Store the vision context in pipeline for this session
-            # Note: This is a simplified approach - in production you'd want per-session vision context
-            self.pipeline.current_vision_context = vision_context
+            # Store the vision context for this session's next question
+            context = await self.pipeline.context_store.acquire(session_token)
+            context.vision_context = vision_context
             
             # Send vision ready notification with the generated context
             await websocket.send_json({
@@ -1029,31 +1336,28 @@ class WebSocketManager:
             logger.error(f"Error processing vision image: {e}")
             await self._send_error(websocket, f"Vision processing error: {str(e)}")
 
-async def websocket_endpoint(
-    websocket: WebSocket,
-    transcriber: WhisperTranscriber,
-    llm_client: LLMClient,
-    tts_client: TTSClient,
-    auth_service: AuthService
-):
+async def websocket_endpoint(websocket: WebSocket, pipeline: UnifiedPipeline, binary_frames: bool = True,
+                             tts_stream: bool = True,
+                             audio_stream_settings: Optional[Dict[str, Any]] = None,
+                             partial_settings: Optional[Dict[str, Any]] = None):
     """
     FastAPI WebSocket endpoint.
     
     Args:
         websocket: The WebSocket connection
-        transcriber: Whisper transcription service
-        llm_client: LLM client service
-        tts_client: TTS client service
-        auth_service: Authentication service
+        pipeline: Server-wide unified pipeline (started in main.lifespan)
+        binary_frames: Whether clients may negotiate binary audio frames
+        tts_stream: Whether clients may negotiate chunk-by-chunk TTS audio
+        audio_stream_settings: StreamingAudioIngest arguments for streamed audio
+        partial_settings: Partial transcription settings for streamed audio
     """
     # Get client IP for rate limiting
     client_ip = websocket.client.host if websocket.client else "unknown"
 
-    # Create WebSocket manager
-    manager = WebSocketManager(transcriber, llm_client, tts_client, auth_service)
-
-    # Start the pipeline
-    await manager.pipeline.start()
+    # Create per-connection manager on top of the shared pipeline
+    manager = WebSocketManager(pipeline, binary_frames_enabled=binary_frames, tts_stream_enabled=tts_stream,
+                               audio_stream_settings=audio_stream_settings,
+                               partial_settings=partial_settings)
     
     try:
         # Accept connection and authenticate
@@ -1064,12 +1368,17 @@ async def websocket_endpoint(
             try:
                 # Receive message with a timeout
                 message = await asyncio.wait_for(
-                    websocket.receive_json(),
+                    websocket.receive(),
                     timeout=30.0  # 30 second timeout
                 )
-                
-                # Process message
-                await manager.handle_client_message(websocket, message)
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                # Binary frames carry raw audio; text frames carry JSON control messages
+                if message.get("bytes") is not None:
+                    await manager.handle_binary_frame(websocket, message["bytes"])
+                else:
+                    await manager.handle_client_message(websocket, json.loads(message["text"]))
                 
             except asyncio.TimeoutError:
                 # Send a ping to keep the connection alive
@@ -0,0 +1,684 @@
+"""
+Audio Ingest Service
+
+Incremental audio ingest with server-side endpointing for streamed uploads.
+"""
+
+import io
+import math
+import wave
+import struct
+import logging
+import functools
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import av
+import numpy as np
+
+from .framing import AudioCodec
+
+logger = logging.getLogger(__name__)
+
+# Largest reduced up/down factor resample_poly accepts. Every standard rate fits
+# (11025 Hz is 640/441 against 16 kHz) and the filter stays under 13k taps;
+# other rates, which come from client-supplied headers, are not resampled here.
+MAX_RESAMPLE_FACTOR = 640
+
+
+def pcm16_to_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Wrap mono 16-bit PCM samples in a WAV container.
+
+    Args:
+        samples: int16 samples
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        WAV file bytes
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.astype("<i2", copy=False).tobytes())
+    return buffer.getvalue()
+
+
+def _lowpass_kernel(up: int, down: int, zero_crossings: int = 10, beta: float = 5.0) -> np.ndarray:
+    """Kaiser-windowed sinc anti-aliasing filter for resampling by up/down (gain `up`)."""
+    max_rate = max(up, down)
+    half_length = zero_crossings * max_rate
+    taps = np.arange(-half_length, half_length + 1, dtype=np.float64)
+    kernel = np.sinc(taps / max_rate) * np.kaiser(len(taps), beta)
+    return kernel * (up / kernel.sum())
+
+
+def can_resample(sample_rate: int, target_rate: int = 16000) -> bool:
+    """Whether resample_poly handles a conversion between the two rates."""
+    if sample_rate <= 0 or target_rate <= 0:
+        return False
+    divisor = math.gcd(sample_rate, target_rate)
+    return max(sample_rate, target_rate) // divisor <= MAX_RESAMPLE_FACTOR
+
+
+@functools.lru_cache(maxsize=16)
+def _polyphase_filter(up: int, down: int) -> Tuple[Tuple[np.ndarray, ...], int]:
+    """Filter split into its `up` phases, plus the filter's group delay."""
+    kernel = _lowpass_kernel(up, down).astype(np.float32)
+    return tuple(kernel[phase::up] for phase in range(up)), len(kernel) // 2
+
+
+def resample_poly(samples: np.ndarray, up: int, down: int, scale: float = 1.0) -> np.ndarray:
+    """
+    Resample by the rational factor up/down with a polyphase FIR filter.
+
+    Only the output samples that are kept are computed: each output is the
+    dot product of one filter phase with the input window around it. For
+    each phase the windows are a strided view of the input, so the filter
+    runs as blocked matrix-vector products with no Python loop per sample
+    or per tap.
+
+    Args:
+        samples: Mono samples (int16 or float)
+        up: Upsampling factor
+        down: Downsampling factor
+        scale: Gain applied to the output (e.g. 1 / 32768 for int16 input)
+
+    Returns:
+        float32 samples
+
+    Raises:
+        ValueError: If the reduced factors exceed MAX_RESAMPLE_FACTOR
+    """
+    if up <= 0 or down <= 0:
+        raise ValueError(f"Invalid resampling factors {up}/{down}")
+    divisor = math.gcd(up, down)
+    up, down = up // divisor, down // divisor
+    if max(up, down) > MAX_RESAMPLE_FACTOR:
+        raise ValueError(f"Resampling by {up}/{down} is not supported")
+    if up == down == 1:
+        return samples.astype(np.float32) * np.float32(scale)
+
+    phases, delay = _polyphase_filter(up, down)
+    width = len(phases[0])
+    output_length = -(-len(samples) * up // down)
+
+    # Scaled float copy with zero padding so every window reads valid indices
+    padding = width + 1
+    padded = np.zeros(len(samples) + 2 * padding + down, dtype=np.float32)
+    np.multiply(samples, np.float32(scale), out=padded[padding:padding + len(samples)], casting="unsafe")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, width)
+
+    output = np.empty(output_length, dtype=np.float32)
+    inverse_down = pow(down, -1, up) if up > 1 else 0
+    block = 8192  # Outputs per matrix-vector product (bounds the strided copy to ~block * width floats)
+
+    for phase, taps in enumerate(phases):
+        # Outputs using this phase: (n * down + delay) % up == phase
+        first = ((phase - delay) * inverse_down) % up
+        count = len(range(first, output_length, up))
+        if count == 0:
+            continue
+        # Output first + t * up reads input base + t * down - j for tap j
+        base = padding + (first * down + delay) // up
+        kernel = np.zeros(width, dtype=np.float32)
+        kernel[width - len(taps):] = taps[::-1]
+        result = output[first::up]
+        for offset in range(0, count, block):
+            rows = windows[base - width + 1 + offset * down::down][:min(block, count - offset)]
+            result[offset:offset + len(rows)] = rows @ kernel
+    return output
+
+
+def pcm16_to_float16k(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Convert int16 PCM to the 16 kHz float32 input Whisper expects.
+
+    Args:
+        samples: Mono int16 samples
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        float32 samples in [-1, 1] at 16 kHz
+
+    Raises:
+        ValueError: If the sample rate fails can_resample()
+    """
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return resample_poly(samples, 16000, sample_rate, scale=1.0 / 32768.0)
+
+
+def parse_wav(data: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Parse a 16-bit PCM WAV file without copying its samples.
+
+    Walks the RIFF chunks for "fmt " and "data"; the samples are a NumPy
+    view into the given buffer (read-only for bytes).
+
+    Args:
+        data: WAV file bytes
+
+    Returns:
+        Tuple of (int16 samples shaped (frames, channels), sample rate), or
+        None if the data is not 16-bit PCM WAV
+    """
+    view = memoryview(data)
+    if len(view) < 12 or view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+
+    channels = sample_rate = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = int.from_bytes(view[offset + 4:offset + 8], "little")
+        body = offset + 8
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", view, body)
+            bits_per_sample = struct.unpack_from("<H", view, body + 14)[0]
+            if audio_format == 0xFFFE and chunk_size >= 40:
+                # WAVE_FORMAT_EXTENSIBLE: the real format is the first field of the sub-format GUID
+                audio_format = struct.unpack_from("<H", view, body + 24)[0]
+            if audio_format != 1 or bits_per_sample != 16 or channels == 0 or sample_rate == 0:
+                return None
+        elif chunk_id == b"data" and channels:
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF: take the rest of the file
+            if chunk_size == 0 or body + chunk_size > len(view):
+                chunk_size = len(view) - body
+            frames = chunk_size // (2 * channels)
+            samples = np.frombuffer(view, dtype="<i2", count=frames * channels, offset=body)
+            return samples.reshape(frames, channels), sample_rate
+        offset = body + chunk_size + (chunk_size & 1)  # Chunks are word aligned
+    return None
+
+
+def concat_wav(parts: List[Union[bytes, bytearray, memoryview]]) -> Optional[bytes]:
+    """
+    Join 16-bit PCM WAV files end to end into one WAV file.
+
+    Args:
+        parts: WAV files in playback order
+
+    Returns:
+        WAV file bytes, or None if a part is not 16-bit PCM WAV or the parts
+        differ in sample rate or channel count
+    """
+    parsed = [parse_wav(part) for part in parts]
+    if not parsed or any(p is None for p in parsed):
+        return None
+    channels, sample_rate = parsed[0][0].shape[1], parsed[0][1]
+    if any(samples.shape[1] != channels or rate != sample_rate for samples, rate in parsed):
+        return None
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        for samples, _ in parsed:
+            wav_file.writeframes(samples)
+    return buffer.getvalue()
+
+
+# Demuxer per detected codec, so PyAV does not have to probe the input
+_CONTAINER_FORMATS = {
+    AudioCodec.WEBM_OPUS: "matroska",
+    AudioCodec.OGG_OPUS: "ogg",
+    AudioCodec.FLAC: "flac",
+    AudioCodec.MP3: "mp3",
+    AudioCodec.AAC: None  # ADTS or MP4: let PyAV probe
+}
+
+
+def decode_compressed(data: Union[bytes, bytearray, memoryview], codec: AudioCodec) -> np.ndarray:
+    """
+    Decode a compressed upload (Opus in WebM/OGG, FLAC, MP3, AAC) for Whisper.
+
+    Packets are demuxed and decoded one at a time and resampled straight
+    into a preallocated float32 buffer (grown if the container's duration
+    was missing or short), so no intermediate copy of the whole decoded
+    stream is made. A truncated stream, e.g. the last MediaRecorder chunk
+    cut off, yields the audio decoded up to the damage.
+
+    Args:
+        data: Compressed audio file bytes
+        codec: Codec detected from the magic bytes
+
+    Returns:
+        float32 mono samples in [-1, 1] at 16 kHz
+
+    Raises:
+        ValueError: If the data cannot be decoded at all
+    """
+    try:
+        container = av.open(io.BytesIO(data), mode="r", format=_CONTAINER_FORMATS.get(codec))
+    except av.FFmpegError as e:
+        raise ValueError(f"Cannot decode {codec.name} audio: {e}|INVALID_REQUEST_DATA")
+
+    with container:
+        if not container.streams.audio:
+            raise ValueError(f"No audio stream in {codec.name} upload|INVALID_REQUEST_DATA")
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=16000)
+
+        # Browser WebM usually has no duration: start with 10 s and grow by doubling
+        duration = container.duration / av.time_base if container.duration else 10.0
+        buffer = np.empty(int(duration * 16000) + 16000, dtype=np.float32)
+        length = 0
+
+        def append(frames):
+            nonlocal buffer, length
+            for frame in frames:
+                samples = frame.to_ndarray().reshape(-1)
+                if length + len(samples) > len(buffer):
+                    grown = np.empty(max(2 * len(buffer), length + len(samples)), dtype=np.float32)
+                    grown[:length] = buffer[:length]
+                    buffer = grown
+                buffer[length:length + len(samples)] = samples
+                length += len(samples)
+
+        try:
+            for packet in container.demux(stream):
+                for frame in packet.decode():
+                    append(resampler.resample(frame))
+        except av.FFmpegError as e:
+            if length == 0:
+                raise ValueError(f"Cannot decode {codec.name} audio: {e}|INVALID_REQUEST_DATA")
+            logger.warning(f"{codec.name} upload truncated after {length / 16000:.2f}s: {e}")
+        append(resampler.resample(None))
+
+    return buffer[:length]
+
+
+def pcm_to_mono(samples: np.ndarray) -> np.ndarray:
+    """Mix (frames, channels) int16 samples down to mono (a view when already mono)."""
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1).astype(np.int16)
+
+
+def speech_bounds(samples: np.ndarray, sample_rate: int, frame_ms: int = 30,
+                  pad_ms: int = 200) -> Optional[Tuple[int, int]]:
+    """
+    Locate speech in an utterance by frame energy.
+
+    Frame levels are compared against the utterance's own noise floor (10th
+    percentile level): frames 6-10 dB above it, and above the absolute
+    silence level, count as speech. Stationary noise has too little
+    dynamic range to produce such frames, so it is reported as no speech.
+
+    Args:
+        samples: Mono int16 samples
+        sample_rate: Sample rate in Hz
+        frame_ms: Analysis frame length in milliseconds
+        pad_ms: Audio kept around the first and last speech frame
+
+    Returns:
+        (start, end) sample indices of the speech, or None if there is none
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return None
+
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)) / 32768.0
+    levels = 20.0 * np.log10(rms + 1e-9)
+
+    # 10 dB above the floor, relaxed towards 6 dB when the loudest frame is quiet
+    noise_db = float(np.percentile(levels, 10))
+    threshold = max(EnergyEndpointDetector.MIN_LEVEL_DB, noise_db + 6.0,
+                    min(noise_db + 10.0, float(levels.max()) - 20.0))
+    speech = np.flatnonzero(levels >= threshold)
+    if len(speech) == 0:
+        return None
+
+    pad = sample_rate * pad_ms // 1000
+    start = max(0, int(speech[0]) * frame_size - pad)
+    end = min(len(samples), (int(speech[-1]) + 1) * frame_size + pad)
+    return start, end
+
+
+def trim_silence(audio: bytes, pad_ms: int = 200) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Trim leading and trailing silence from a WAV upload before transcription.
+
+    Args:
+        audio: Uploaded audio (non-WAV or non-16-bit data is returned unchanged)
+        pad_ms: Audio kept around the detected speech
+
+    Returns:
+        Tuple of (audio to transcribe, stats with "speech" (False when there is
+        nothing to transcribe), "audio_seconds" and "trimmed_seconds")
+    """
+    decoded = parse_wav(audio)
+    if decoded is None:
+        return audio, {"speech": True, "audio_seconds": None, "trimmed_seconds": 0.0}
+
+    samples, sample_rate = decoded
+    mono = pcm_to_mono(samples)
+    audio_seconds = len(samples) / sample_rate
+    bounds = speech_bounds(mono, sample_rate, pad_ms=pad_ms)
+    if bounds is None:
+        return b"", {"speech": False, "audio_seconds": audio_seconds, "trimmed_seconds": audio_seconds}
+
+    start, end = bounds
+    trimmed_seconds = (len(samples) - (end - start)) / sample_rate
+    if start == 0 and end == len(samples):
+        return audio, {"speech": True, "audio_seconds": audio_seconds, "trimmed_seconds": 0.0}
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(samples.shape[1])
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples[start:end].tobytes())
+    return buffer.getvalue(), {"speech": True, "audio_seconds": audio_seconds, "trimmed_seconds": trimmed_seconds}
+
+
+class AudioRingBuffer:
+    """
+    Preallocated ring buffer of int16 samples addressed by absolute position.
+
+    Positions count every sample ever written, so callers can remember where
+    an utterance started and read it back later as long as it has not been
+    overwritten (i.e. it is within the last `capacity` samples).
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Number of samples kept
+        """
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.written = 0  # Absolute position of the next sample
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest ones when full."""
+        if len(samples) > self.capacity:
+            self.written += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """
+        Copy out samples between two absolute positions.
+
+        Args:
+            start: First position (clamped to the oldest sample still held)
+            end: Position after the last sample
+
+        Returns:
+            int16 samples
+        """
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        first, count = start % self.capacity, end - start
+        if first + count <= self.capacity:
+            return self._data[first:first + count].copy()
+        return np.concatenate((self._data[first:], self._data[:first + count - self.capacity]))
+
+
+class EnergyEndpointDetector:
+    """
+    Cheap energy-based speech endpoint detector.
+
+    Audio is scored in fixed frames: the frame's RMS level above an adaptive
+    noise floor, mapped to 0..1 over 20 dB. Frames scoring at or above the
+    threshold are speech. An utterance starts at the first speech frame and
+    ends after end_silence_ms of non-speech.
+
+    The floor is seeded from the first frame and follows non-speech frames;
+    a minimum over the last NOISE_WINDOW_MS (kept during speech too) lifts it
+    when the background is louder than the floor assumed, so steady noise
+    cannot hold an utterance open.
+    """
+
+    SNR_RANGE_DB = 20.0      # SNR that maps to a score of 1.0
+    MIN_LEVEL_DB = -55.0     # Frames quieter than this are never speech
+    SEED_MAX_DB = -40.0      # Loudest floor taken from the first frame (a stream may open mid-word)
+    NOISE_WINDOW_MS = 3000   # Minimum-statistics window of the noise floor
+    NOISE_WINDOW_BLOCKS = 8  # Sub-blocks the window minimum is kept in
+
+    def __init__(self, sample_rate: int, frame_ms: int = 30, threshold: float = 0.5,
+                 end_silence_ms: int = 600):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            frame_ms: Analysis frame length in milliseconds
+            threshold: Speech score threshold (0..1)
+            end_silence_ms: Non-speech duration that ends an utterance
+        """
+        self.frame_size = max(1, sample_rate * frame_ms // 1000)
+        self.threshold = threshold
+        self.end_silence_frames = max(1, math.ceil(end_silence_ms / frame_ms))
+        self.noise_db = -60.0
+        self.in_speech = False
+        self.silence_frames = 0
+
+        window_frames = max(self.NOISE_WINDOW_BLOCKS, self.NOISE_WINDOW_MS // frame_ms)
+        self._block_frames = window_frames // self.NOISE_WINDOW_BLOCKS
+        self._block_min = math.inf
+        self._block_count = 0
+        self._block_minima: deque = deque(maxlen=self.NOISE_WINDOW_BLOCKS)
+        self._seeded = False
+
+    def score(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of frames.
+
+        Args:
+            frames: int16 array of shape (n, frame_size)
+
+        Returns:
+            Per-frame level in dBFS
+        """
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)) / 32768.0
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def update(self, level_db: float) -> Tuple[bool, bool]:
+        """
+        Advance the state machine by one frame.
+
+        Args:
+            level_db: Frame level in dBFS
+
+        Returns:
+            Tuple of (speech started on this frame, speech ended on this frame)
+        """
+        if not self._seeded:
+            self.noise_db = min(level_db, self.SEED_MAX_DB)
+            self._seeded = True
+        self._track_minimum(level_db)
+
+        speech_score = min(1.0, max(0.0, (level_db - self.noise_db) / self.SNR_RANGE_DB))
+        is_speech = level_db > self.MIN_LEVEL_DB and speech_score >= self.threshold
+
+        if not is_speech:
+            # Track the noise floor: follow drops immediately, rises slowly
+            if level_db < self.noise_db:
+                self.noise_db = level_db
+            else:
+                self.noise_db += 0.05 * (level_db - self.noise_db)
+
+        if not self.in_speech:
+            if is_speech:
+                self.in_speech = True
+                self.silence_frames = 0
+                return True, False
+            return False, False
+
+        if is_speech:
+            self.silence_frames = 0
+            return False, False
+
+        self.silence_frames += 1
+        if self.silence_frames >= self.end_silence_frames:
+            self.in_speech = False
+            return False, True
+        return False, False
+
+    def _track_minimum(self, level_db: float) -> None:
+        """Update the windowed minimum level and lift the floor to it once the window is full."""
+        self._block_min = min(self._block_min, level_db)
+        self._block_count += 1
+        if self._block_count < self._block_frames:
+            return
+        self._block_minima.append(self._block_min)
+        self._block_min = math.inf
+        self._block_count = 0
+        if len(self._block_minima) == self._block_minima.maxlen:
+            self.noise_db = max(self.noise_db, min(self._block_minima))
+
+
+class StreamingAudioIngest:
+    """
+    Per-connection ingest for audio streamed in small chunks.
+
+    Chunks of mono 16-bit PCM are appended to a preallocated ring buffer and
+    run through the endpoint detector frame by frame. When end-of-speech is
+    detected the utterance (with a little pre-roll) is returned as WAV, ready
+    for transcription, so the client no longer waits for silence and uploads
+    the whole recording in one burst.
+    """
+
+    def __init__(self, sample_rate: int = 48000, frame_ms: int = 30, threshold: float = 0.5,
+                 end_silence_ms: int = 600, min_speech_ms: int = 250, pre_roll_ms: int = 300,
+                 max_utterance_seconds: float = 30.0):
+        """
+        Initialize the ingest.
+
+        Args:
+            sample_rate: Sample rate of the streamed PCM
+            frame_ms: Endpoint detector frame length in milliseconds
+            threshold: Endpoint detector speech score threshold (0..1)
+            end_silence_ms: Non-speech duration that ends an utterance
+            min_speech_ms: Utterances with less speech than this are dropped as noise
+            pre_roll_ms: Audio kept before the first speech frame
+            max_utterance_seconds: Longest utterance before it is cut (ring buffer size)
+        """
+        self.sample_rate = sample_rate
+        self.detector = EnergyEndpointDetector(sample_rate, frame_ms, threshold, end_silence_ms)
+        self.frame_size = self.detector.frame_size
+        self.min_speech_samples = sample_rate * min_speech_ms // 1000
+        self.pre_roll = sample_rate * pre_roll_ms // 1000
+        self.max_utterance = int(sample_rate * max_utterance_seconds)
+
+        self.buffer = AudioRingBuffer(self.max_utterance + self.pre_roll + self.frame_size)
+        self._pending = np.zeros(0, dtype=np.int16)  # Samples not yet forming a full frame
+        self._odd_byte = b""  # Trailing byte of a chunk split mid-sample
+        self._processed = 0  # Absolute position up to which frames were analyzed
+        self._utterance_start: Optional[int] = None
+        self._speech_samples = 0
+        self._last_speech_end = 0
+
+    @property
+    def in_speech(self) -> bool:
+        """Whether an utterance is currently in progress."""
+        return self._utterance_start is not None
+
+    @property
+    def utterance_duration(self) -> float:
+        """Seconds of the utterance in progress analyzed so far (0 when idle)."""
+        if self._utterance_start is None:
+            return 0.0
+        return (self._processed - self._utterance_start) / self.sample_rate
+
+    def current_utterance(self) -> Optional[np.ndarray]:
+        """
+        Audio of the utterance in progress, up to the last analyzed frame.
+
+        Returns:
+            int16 samples, or None when no utterance is in progress
+        """
+        if not self.in_speech:
+            return None
+        return self.buffer.read(self._utterance_start, self._processed)
+
+    def feed(self, chunk: Union[bytes, bytearray, memoryview]) -> List[Tuple[str, Optional[bytes]]]:
+        """
+        Append a chunk of PCM and run endpointing on the complete frames.
+
+        Args:
+            chunk: Little-endian 16-bit mono PCM
+
+        Returns:
+            Events in order: ("speech_start", None) once min_speech_ms of speech
+            has been heard, and ("speech_end", wav_bytes) at end-of-speech
+        """
+        data = self._odd_byte + bytes(chunk) if self._odd_byte else chunk
+        usable = len(data) - len(data) % 2
+        self._odd_byte = bytes(data[usable:])
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2)
+
+        self.buffer.write(samples)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        frame_count = len(samples) // self.frame_size
+        self._pending = samples[frame_count * self.frame_size:].copy()
+        if frame_count == 0:
+            return []
+
+        events: List[Tuple[str, Optional[bytes]]] = []
+        levels = self.detector.score(samples[:frame_count * self.frame_size].reshape(frame_count, self.frame_size))
+
+        for level in levels:
+            frame_start = self._processed
+            self._processed += self.frame_size
+            started, ended = self.detector.update(float(level))
+
+            if started:
+                self._utterance_start = max(0, frame_start - self.pre_roll, self._last_speech_end)
+                self._speech_samples = 0
+
+            if self.in_speech:
+                if self.detector.silence_frames == 0:
+                    self._speech_samples += self.frame_size
+                    # Announce speech only once it is long enough not to be a click or cough
+                    if self._speech_samples - self.frame_size < self.min_speech_samples <= self._speech_samples:
+                        events.append(("speech_start", None))
+                if ended or self._processed - self._utterance_start >= self.max_utterance:
+                    utterance = self._finish()
+                    if utterance is not None:
+                        events.append(("speech_end", utterance))
+
+        return events
+
+    def flush(self) -> Optional[bytes]:
+        """
+        End the stream, returning any utterance still in progress.
+
+        Returns:
+            WAV bytes of the utterance, or None
+        """
+        if not self.in_speech:
+            return None
+        return self._finish()
+
+    def _finish(self) -> Optional[bytes]:
+        """Close the current utterance and return it as WAV (None if too little speech)."""
+        # Keep at most pre_roll of the trailing silence that ended the utterance
+        trailing_silence = self.detector.silence_frames * self.frame_size
+        start, end = self._utterance_start, self._processed - max(0, trailing_silence - self.pre_roll)
+        self._utterance_start = None
+        self._last_speech_end = end
+        self.detector.in_speech = False
+        self.detector.silence_frames = 0
+
+        if self._speech_samples < self.min_speech_samples:
+            logger.debug(f"Dropped {self._speech_samples / self.sample_rate:.2f}s of speech as noise")
+            return None
+        return pcm16_to_wav(self.buffer.read(start, end), self.sample_rate)
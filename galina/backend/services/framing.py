@@ -0,0 +1,177 @@
+"""
+Binary Framing Service
+
+Header format for raw audio carried in binary WebSocket frames.
+"""
+
+import struct
+import logging
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+FRAME_VERSION = 1
+
+# version, kind, codec, flags, request id length, sequence (network byte order),
+# followed by the UTF-8 request id and the raw payload
+FRAME_HEADER = struct.Struct("!BBBBHI")
+
+# Flag set on the last frame of an upload (TTS responses end with a tts_end message)
+FLAG_FINAL = 0x01
+
+
+class FrameKind(IntEnum):
+    """What a binary frame carries."""
+    AUDIO_UPLOAD = 1  # Client -> server utterance audio
+    TTS_AUDIO = 2     # Server -> client synthesized speech
+    AUDIO_STREAM = 3  # Client -> server streamed PCM chunk (server-side endpointing)
+
+
+class AudioCodec(IntEnum):
+    """Codec of the frame payload."""
+    UNKNOWN = 0
+    WAV = 1
+    PCM_S16LE = 2
+    MP3 = 3
+    OPUS = 4
+    WEBM_OPUS = 5
+    OGG_OPUS = 6
+    FLAC = 7
+    AAC = 8
+
+
+# Format names used in JSON messages (tts_chunk "format", TTS_FORMAT) -> codec
+_CODEC_NAMES = {
+    "wav": AudioCodec.WAV,
+    "pcm": AudioCodec.PCM_S16LE,
+    "mp3": AudioCodec.MP3,
+    "opus": AudioCodec.OPUS,
+    "webm": AudioCodec.WEBM_OPUS,
+    "ogg": AudioCodec.OGG_OPUS,
+    "flac": AudioCodec.FLAC,
+    "aac": AudioCodec.AAC
+}
+
+
+@dataclass
+class Frame:
+    """Decoded binary frame."""
+    kind: FrameKind
+    codec: AudioCodec
+    flags: int
+    request_id: str
+    sequence: int
+    payload: memoryview  # View into the received message, no copy
+
+    @property
+    def final(self) -> bool:
+        """Whether this is the last frame of its upload."""
+        return bool(self.flags & FLAG_FINAL)
+
+
+def codec_from_format(audio_format: str) -> AudioCodec:
+    """Map a format name (e.g. "wav", "mp3") to its codec id."""
+    return _CODEC_NAMES.get((audio_format or "").lower(), AudioCodec.UNKNOWN)
+
+
+def format_from_codec(codec: int) -> str:
+    """Map a codec id back to its format name ("" if unknown)."""
+    for name, value in _CODEC_NAMES.items():
+        if value == codec:
+            return name
+    return ""
+
+
+def detect_codec(data: Union[bytes, bytearray, memoryview]) -> AudioCodec:
+    """
+    Identify an audio upload's container/codec from its magic bytes.
+
+    Args:
+        data: Start of the audio file (the first 64 bytes are enough)
+
+    Returns:
+        Detected codec (UNKNOWN if not recognized)
+    """
+    head = bytes(memoryview(data)[:64])
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return AudioCodec.WAV
+    if head[:4] == b"\x1a\x45\xdf\xa3":  # EBML header (WebM / Matroska)
+        return AudioCodec.WEBM_OPUS
+    if head[:4] == b"OggS":
+        return AudioCodec.OGG_OPUS
+    if head[:4] == b"fLaC":
+        return AudioCodec.FLAC
+    if head[4:8] == b"ftyp":  # MP4 / M4A (Safari's MediaRecorder)
+        return AudioCodec.AAC
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xF6 in (0xF2, 0xF4, 0xF6)):
+        return AudioCodec.MP3  # ID3 tag or MPEG-1/2 layer II/III frame sync
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xF6 == 0xF0:
+        return AudioCodec.AAC  # ADTS frame sync
+    return AudioCodec.UNKNOWN
+
+
+def encode_frame(kind: FrameKind, codec: AudioCodec, request_id: str, sequence: int,
+                 payload: Union[bytes, bytearray, memoryview], flags: int = 0) -> bytes:
+    """
+    Build a binary frame.
+
+    Args:
+        kind: Frame kind
+        codec: Payload codec
+        request_id: Request the audio belongs to
+        sequence: Position of the frame within its request (0-based)
+        payload: Raw audio bytes
+        flags: Frame flags (e.g. FLAG_FINAL)
+
+    Returns:
+        Header, request id and payload as one bytes object
+    """
+    request_id_bytes = request_id.encode("utf-8")
+    header = FRAME_HEADER.pack(FRAME_VERSION, kind, codec, flags, len(request_id_bytes), sequence)
+    return b"".join((header, request_id_bytes, payload))
+
+
+def decode_frame(data: Union[bytes, bytearray, memoryview]) -> Frame:
+    """
+    Parse a binary frame without copying its payload.
+
+    Args:
+        data: Received frame
+
+    Returns:
+        Decoded frame
+
+    Raises:
+        ValueError: If the frame is truncated or has an unknown version/kind
+    """
+    view = memoryview(data)
+    if len(view) < FRAME_HEADER.size:
+        raise ValueError("Binary frame is too short|INVALID_REQUEST_DATA")
+
+    version, kind, codec, flags, request_id_length, sequence = FRAME_HEADER.unpack_from(view)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported binary frame version {version}|INVALID_REQUEST_DATA")
+    try:
+        kind = FrameKind(kind)
+    except ValueError:
+        raise ValueError(f"Unknown binary frame kind {kind}|INVALID_REQUEST_DATA")
+
+    payload_offset = FRAME_HEADER.size + request_id_length
+    if len(view) < payload_offset:
+        raise ValueError("Binary frame header is truncated|INVALID_REQUEST_DATA")
+
+    try:
+        codec = AudioCodec(codec)
+    except ValueError:
+        codec = AudioCodec.UNKNOWN
+
+    return Frame(
+        kind=kind,
+        codec=codec,
+        flags=flags,
+        request_id=bytes(view[FRAME_HEADER.size:payload_offset]).decode("utf-8", errors="replace"),
+        sequence=sequence,
+        payload=view[payload_offset:]
+    )
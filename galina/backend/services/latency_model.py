@@ -0,0 +1,266 @@
+"""
+Latency Model Service
+
+Online per-stage latency estimates used for queue ETAs.
+"""
+
+import math
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P² algorithm (Jain & Chlamtac).
+
+    Keeps five markers instead of the samples, so updates and queries are O(1)
+    in time and memory.
+    """
+
+    def __init__(self, quantile: float):
+        """
+        Initialize the estimator.
+
+        Args:
+            quantile: Quantile to track, between 0 and 1 (e.g. 0.95)
+        """
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self._desired = [1.0, 1.0 + 2 * quantile, 1.0 + 4 * quantile, 3.0 + 2 * quantile, 5.0]
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        """Add an observation."""
+        self.count += 1
+        if self.count <= 5:
+            self._heights.append(value)
+            self._heights.sort()
+            return
+
+        heights, positions = self._heights, self._positions
+
+        # Find the cell the value falls into, extending the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+               (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        """Piecewise-parabolic prediction of marker i's height after moving it by step."""
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        """Current quantile estimate, or None before the first observation."""
+        if not self._heights:
+            return None
+        if self.count <= 5:
+            index = min(len(self._heights) - 1, int(round(self.quantile * (len(self._heights) - 1))))
+            return self._heights[index]
+        return self._heights[2]
+
+
+class StageEstimate:
+    """
+    Exponentially weighted fit of duration = base + rate * units for one stage.
+
+    The weighted sums decay by (1 - alpha) on every observation, so the fit
+    follows load and model changes while staying O(1) per update. Units are
+    the stage's input size (audio KB, prompt tokens or output characters).
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        """
+        Initialize the estimate.
+
+        Args:
+            alpha: Weight of the newest observation (higher adapts faster)
+        """
+        self.alpha = alpha
+        self.count = 0
+        self._weight = 0.0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+
+    def record(self, duration: float, units: float = 0.0) -> None:
+        """Add an observed duration for an input of the given size."""
+        decay = 1.0 - self.alpha
+        self._weight = self._weight * decay + 1.0
+        self._sum_x = self._sum_x * decay + units
+        self._sum_y = self._sum_y * decay + duration
+        self._sum_xx = self._sum_xx * decay + units * units
+        self._sum_xy = self._sum_xy * decay + units * duration
+        self.count += 1
+        self.p50.add(duration)
+        self.p95.add(duration)
+
+    @property
+    def mean(self) -> float:
+        """Exponentially weighted mean duration."""
+        return self._sum_y / self._weight if self._weight else 0.0
+
+    def coefficients(self) -> Tuple[float, float]:
+        """Fitted (base seconds, seconds per unit)."""
+        if not self._weight:
+            return 0.0, 0.0
+        mean_x = self._sum_x / self._weight
+        mean_y = self._sum_y / self._weight
+        var_x = self._sum_xx / self._weight - mean_x * mean_x
+        if var_x <= 1e-9 * max(1.0, mean_x * mean_x):
+            # All inputs about the same size: no slope to learn yet
+            return mean_y, 0.0
+        rate = max(0.0, (self._sum_xy / self._weight - mean_x * mean_y) / var_x)
+        return mean_y - rate * mean_x, rate
+
+    def predict(self, units: float = 0.0) -> float:
+        """Predicted duration for an input of the given size."""
+        base, rate = self.coefficients()
+        return max(0.0, base + rate * units)
+
+
+class LatencyModel:
+    """
+    Learned latency of each pipeline stage, per request type.
+
+    Stages are recorded as the sequential phases of a request: "stt" (units:
+    audio KB), "llm" streaming (units: prompt tokens) and the "tts" tail after
+    the last token (units: response characters). Output length is not known
+    when a request is queued, so the expected response size per request type
+    is tracked as well. Until a (stage, request type) pair has observations
+    its prior is used.
+    """
+
+    def __init__(self, priors: Dict[str, Dict[str, float]], alpha: float = 0.1):
+        """
+        Initialize the model.
+
+        Args:
+            priors: Request type -> stage -> prior duration in seconds
+            alpha: Weight of the newest observation in the running estimates
+        """
+        self.priors = priors
+        self.alpha = alpha
+        self._estimates: Dict[Tuple[str, str], StageEstimate] = {}
+        self._output_chars: Dict[str, float] = {}
+        self._totals: Dict[str, StageEstimate] = {}
+
+    def _estimate(self, stage: str, request_type: str) -> StageEstimate:
+        key = (stage, request_type)
+        estimate = self._estimates.get(key)
+        if estimate is None:
+            estimate = self._estimates[key] = StageEstimate(self.alpha)
+        return estimate
+
+    def record(self, stage: str, request_type: str, duration: float, units: float = 0.0) -> None:
+        """
+        Record an observed stage duration.
+
+        Args:
+            stage: Stage name ("stt", "llm" or "tts")
+            request_type: Request type value
+            duration: Observed duration in seconds
+            units: Input size for the stage
+        """
+        if duration < 0 or math.isnan(duration):
+            return
+        self._estimate(stage, request_type).record(duration, units)
+
+    def record_request(self, request_type: str, duration: float, output_chars: int) -> None:
+        """
+        Record a completed request's total duration and response size.
+
+        Args:
+            request_type: Request type value
+            duration: Total processing time in seconds
+            output_chars: Characters in the assistant response
+        """
+        total = self._totals.get(request_type)
+        if total is None:
+            total = self._totals[request_type] = StageEstimate(self.alpha)
+        total.record(duration)
+
+        previous = self._output_chars.get(request_type)
+        self._output_chars[request_type] = float(output_chars) if previous is None else \
+            previous + self.alpha * (output_chars - previous)
+
+    def predict_stage(self, stage: str, request_type: str, units: float = 0.0) -> float:
+        """Predicted duration of one stage, falling back to the prior."""
+        estimate = self._estimates.get((stage, request_type))
+        if estimate is None or estimate.count == 0:
+            return self.priors.get(request_type, {}).get(stage, 0.0)
+        return estimate.predict(units)
+
+    def predict(self, request_type: str, audio_kb: float = 0.0, prompt_tokens: float = 0.0) -> float:
+        """
+        Predicted processing time of a request, excluding queue wait.
+
+        Args:
+            request_type: Request type value
+            audio_kb: Size of the uploaded audio in KB
+            prompt_tokens: Approximate tokens sent to the LLM
+
+        Returns:
+            Estimated seconds from dispatch to the last audio chunk
+        """
+        output_chars = self._output_chars.get(request_type, 0.0)
+        stages = self.priors.get(request_type, {})
+        return (
+            (self.predict_stage("stt", request_type, audio_kb) if "stt" in stages else 0.0) +
+            self.predict_stage("llm", request_type, prompt_tokens) +
+            self.predict_stage("tts", request_type, output_chars)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get learned estimates per request type and stage."""
+        stats: Dict[str, Any] = {}
+        for (stage, request_type), estimate in self._estimates.items():
+            base, rate = estimate.coefficients()
+            stats.setdefault(request_type, {})[stage] = {
+                "samples": estimate.count,
+                "mean": round(estimate.mean, 3),
+                "p50": estimate.p50.value(),
+                "p95": estimate.p95.value(),
+                "base": round(base, 3),
+                "per_unit": round(rate, 6)
+            }
+        for request_type, total in self._totals.items():
+            stats.setdefault(request_type, {})["total"] = {
+                "samples": total.count,
+                "mean": round(total.mean, 3),
+                "p50": total.p50.value(),
+                "p95": total.p95.value(),
+                "output_chars": round(self._output_chars.get(request_type, 0.0), 1)
+            }
+        return stats
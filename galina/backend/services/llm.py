@@ -5,9 +5,12 @@ Handles communication with the local LLM API endpoint.
 """
 
 import json
+import time
+import asyncio
 import requests
+import aiohttp
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncGenerator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +21,13 @@ class LLMClient:
     Client for communicating with a local LLM API.
     
     This class handles requests to a locally hosted LLM API that follows
-    the OpenAI API format.
+    the OpenAI API format. get_response() is a blocking call kept for scripts;
+    async code should use aget_response(), which shares a pooled keep-alive
+    HTTP session across all callers.
+    
+    The client is shared by all sessions, so server code passes each
+    conversation's message list explicitly via `history`; the client's own
+    conversation_history is only used when no context is given.
     """
     
     def __init__(
@@ -27,7 +36,10 @@ class LLMClient:
         model: str = "default",
         temperature: float = 0.7,
         max_tokens: int = 2048,
-        timeout: int = 60
+        timeout: int = 60,
+        pool_size: int = 100,
+        pool_per_host: int = 20,
+        keepalive_timeout: float = 30.0
     ):
         """
         Initialize the LLM client.
@@ -38,113 +50,265 @@ class LLMClient:
             temperature: Sampling temperature (0.0 to 1.0)
             max_tokens: Maximum tokens to generate
             timeout: Request timeout in seconds
+            pool_size: Maximum open connections in the async connection pool
+            pool_per_host: Maximum open connections per host in the async pool
+            keepalive_timeout: Seconds an idle pooled connection is kept open
         """
         self.api_endpoint = api_endpoint
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool_per_host = pool_per_host
+        self.keepalive_timeout = keepalive_timeout
+        
+        # HTTP sessions (keep-alive); the async one is created on first use
+        self._sync_session = requests.Session()
+        self._session: Optional[aiohttp.ClientSession] = None
         
         # State tracking
         self.is_processing = False
+        self.active_requests = 0
         self.conversation_history = []
+        self.http_stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0
+        }
         
         logger.info(f"Initialized LLM Client with endpoint={api_endpoint}")
         
     def add_to_history(self, role: str, content: str) -> None:
         """
-        Add a message to the conversation history.
+        Add a message to the client's own conversation history.
+        
+        Args:
+            role: Message role ('system', 'user', or 'assistant')
+            content: Message content
+        """
+        self._append_message(self.conversation_history, role, content)
+    
+    @staticmethod
+    def _append_message(history: List[Dict[str, str]], role: str, content: str) -> None:
+        """
+        Append a message to a conversation context, trimming it in place.
         
         Args:
+            history: Conversation context to update
             role: Message role ('system', 'user', or 'assistant')
             content: Message content
         """
-        self.conversation_history.append({
+        history.append({
             "role": role,
             "content": content
         })
         
         # Allow deeper history for models with large context windows
-        if len(self.conversation_history) > 50:
+        if len(history) > 50:
             # Always keep the system message if it exists
-            if self.conversation_history[0]["role"] == "system":
-                self.conversation_history = (
-                    [self.conversation_history[0]] + 
-                    self.conversation_history[-49:]
-                )
+            if history[0]["role"] == "system":
+                del history[1:-49]
             else:
-                self.conversation_history = self.conversation_history[-50:]
+                del history[:-50]
+    
+    def _resolve_history(self, history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """Use the explicit conversation context if given, else the client's own history."""
+        return self.conversation_history if history is None else history
+    
+    def _build_messages(self, user_input: str, system_prompt: Optional[str],
+                        add_to_history: bool, history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Build the message list for a request, updating history if requested.
+        
+        Args:
+            user_input: User's text input
+            system_prompt: Optional system prompt to set context
+            add_to_history: Whether to add the user input to the conversation context
+            history: Conversation context to read and update
+            
+        Returns:
+            List of messages to send to the API
+        """
+        messages = []
+        
+        # Add system prompt if provided and not already in history
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        # Add user input to history if it's not empty and add_to_history is True
+        if user_input.strip() and add_to_history:
+            self._append_message(history, "user", user_input)
+        
+        # Add conversation history (which now includes the user input if add_to_history=True)
+        messages.extend(history)
+        
+        # Only add user input directly if not adding to history
+        # This ensures special cases (greetings/followups) work while preventing duplication for normal speech
+        if user_input.strip() and not add_to_history:
+            messages.append({
+                "role": "user",
+                "content": user_input
+            })
+        
+        return messages
+    
+    def _build_payload(self, messages: List[Dict[str, str]], temperature: Optional[float]) -> Dict[str, Any]:
+        """
+        Build the request payload, logging a summary of it.
+        
+        Args:
+            messages: Messages to send
+            temperature: Optional temperature override
+            
+        Returns:
+            Request payload
+        """
+        # Prepare request payload with custom temperature if provided
+        payload = {
+            "model": self.model if self.model != "default" else None,
+            "messages": messages,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        
+        # Remove None values
+        payload = {k: v for k, v in payload.items() if v is not None}
+        
+        # Log the full payload (truncated for readability)
+        payload_str = json.dumps(payload)
+        logger.info(f"Sending request to LLM API with {len(messages)} messages")
+        
+        # Add more detailed logging to help debug message duplication
+        message_roles = [msg["role"] for msg in messages]
+        user_message_count = message_roles.count("user")
+        logger.info(f"Message roles: {message_roles}, user messages: {user_message_count}")
+        
+        if len(payload_str) > 500:
+            logger.debug(f"Payload (truncated): {payload_str[:500]}...")
+        else:
+            logger.debug(f"Payload: {payload_str}")
+        
+        return payload
+    
+    def _handle_result(self, result: Dict[str, Any], add_to_history: bool, start_time: float,
+                       history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Turn a parsed API response into the client's response dictionary.
+        
+        Args:
+            result: Parsed JSON response from the API
+            add_to_history: Whether the exchange is being added to history
+            start_time: time.time() when the request started
+            history: Conversation context to update
+            
+        Returns:
+            Dictionary containing the LLM response and metadata
+        """
+        # Extract assistant response
+        assistant_message = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+        
+        # Add assistant response to history (only if we added the user input)
+        if assistant_message and add_to_history:
+            self._append_message(history, "assistant", assistant_message)
+        
+        # Calculate processing time
+        processing_time = time.time() - start_time
+        
+        logger.info(f"Received response from LLM API after {processing_time:.2f}s")
+        
+        return {
+            "text": assistant_message,
+            "processing_time": processing_time,
+            "finish_reason": result.get("choices", [{}])[0].get("finish_reason"),
+            "model": result.get("model", "unknown")
+        }
+    
+    def _handle_request_error(self, e: Exception, add_to_history: bool, status_code: Optional[int],
+                              history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Build the error response for a failed API request.
+        
+        Args:
+            e: The request exception
+            add_to_history: Whether the exchange is being added to history
+            status_code: HTTP status code if the server answered with an error
+            history: Conversation context to update
+            
+        Returns:
+            Dictionary containing the error response
+        """
+        logger.error(f"LLM API request error: {e}")
+        # A fixed phrase is spoken (and served from the pre-rendered TTS cache); the cause is in "error"
+        error_response = "I'm sorry, I encountered a problem connecting to my language model."
+        
+        # Add the error to history if requested and clear history on 400 errors
+        # to prevent the same error from happening repeatedly
+        if add_to_history:
+            self._append_message(history, "assistant", error_response)
+            
+            # If we get a 400 Bad Request, the context might be corrupt
+            if status_code == 400:
+                logger.warning("Received 400 error, clearing conversation history to recover")
+                # Keep only system prompt if it exists
+                self._clear_messages(history, keep_system_prompt=True)
+        
+        return {
+            "text": error_response,
+            "error": str(e)
+        }
+    
+    def _handle_unexpected_error(self, e: Exception, history: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Build the error response for an unexpected processing error.
+        
+        Args:
+            e: The exception
+            history: Conversation context to update
+            
+        Returns:
+            Dictionary containing the error response
+        """
+        logger.error(f"LLM processing error: {e}")
+        error_response = "I'm sorry, I encountered an unexpected error. Please try again."
+        self._append_message(history, "assistant", error_response)
+        return {
+            "text": error_response,
+            "error": str(e)
+        }
     
     def get_response(self, user_input: str, system_prompt: Optional[str] = None, 
-                    add_to_history: bool = True, temperature: Optional[float] = None) -> Dict[str, Any]:
+                    add_to_history: bool = True, temperature: Optional[float] = None,
+                    history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
         Get a response from the LLM for the given user input.
         
+        This call blocks until the completion is received; use aget_response()
+        from async code.
+        
         Args:
             user_input: User's text input
             system_prompt: Optional system prompt to set context
             add_to_history: Whether to add this exchange to conversation history
             temperature: Optional temperature override (0.0 to 1.0)
+            history: Conversation context to read and update (defaults to the client's own history)
             
         Returns:
             Dictionary containing the LLM response and metadata
         """
         self.is_processing = True
-        start_time = logging.Formatter.converter()
+        start_time = time.time()
+        history = self._resolve_history(history)
         
         try:
-            # Prepare messages
-            messages = []
-            
-            # Add system prompt if provided and not already in history
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            # Add user input to history if it's not empty and add_to_history is True
-            if user_input.strip() and add_to_history:
-                self.add_to_history("user", user_input)
-            
-            # Add conversation history (which now includes the user input if add_to_history=True)
-            messages.extend(self.conversation_history)
-            
-            # Only add user input directly if not adding to history
-            # This ensures special cases (greetings/followups) work while preventing duplication for normal speech
-            if user_input.strip() and not add_to_history:
-                messages.append({
-                    "role": "user",
-                    "content": user_input
-                })
-            
-            # Prepare request payload with custom temperature if provided
-            payload = {
-                "model": self.model if self.model != "default" else None,
-                "messages": messages,
-                "temperature": temperature if temperature is not None else self.temperature,
-                "max_tokens": self.max_tokens
-            }
-            
-            # Remove None values
-            payload = {k: v for k, v in payload.items() if v is not None}
-            
-            # Log the full payload (truncated for readability)
-            payload_str = json.dumps(payload)
-            logger.info(f"Sending request to LLM API with {len(messages)} messages")
-            
-            # Add more detailed logging to help debug message duplication
-            message_roles = [msg["role"] for msg in messages]
-            user_message_count = message_roles.count("user")
-            logger.info(f"Message roles: {message_roles}, user messages: {user_message_count}")
-            
-            if len(payload_str) > 500:
-                logger.debug(f"Payload (truncated): {payload_str[:500]}...")
-            else:
-                logger.debug(f"Payload: {payload_str}")
+            messages = self._build_messages(user_input, system_prompt, add_to_history, history)
+            payload = self._build_payload(messages, temperature)
             
             # Send request to LLM API
-            response = requests.post(
+            response = self._sync_session.post(
                 self.api_endpoint,
                 json=payload,
                 timeout=self.timeout
@@ -153,70 +317,215 @@ class LLMClient:
             # Check if request was successful
             response.raise_for_status()
             
-            # Parse response
-            result = response.json()
+            return self._handle_result(response.json(), add_to_history, start_time, history)
+            
+        except requests.RequestException as e:
+            status_code = e.response.status_code if isinstance(e, requests.exceptions.HTTPError) else None
+            return self._handle_request_error(e, add_to_history, status_code, history)
+        except Exception as e:
+            return self._handle_unexpected_error(e, history)
+        finally:
+            self.is_processing = False
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled keep-alive session on first use."""
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace_config]
+            )
+        return self._session
+    
+    async def _on_connection_created(self, session, context, params):
+        """Trace hook: a new TCP connection was opened."""
+        self.http_stats["connections_created"] += 1
+    
+    async def _on_connection_reused(self, session, context, params):
+        """Trace hook: a pooled keep-alive connection was reused."""
+        self.http_stats["connections_reused"] += 1
+    
+    async def aget_response(self, user_input: str, system_prompt: Optional[str] = None,
+                            add_to_history: bool = True, temperature: Optional[float] = None,
+                            history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Asynchronously get a response from the LLM for the given user input.
+        
+        Uses the pooled keep-alive session, so concurrent callers overlap
+        without blocking the event loop or opening a connection per call.
+        
+        Args:
+            user_input: User's text input
+            system_prompt: Optional system prompt to set context
+            add_to_history: Whether to add this exchange to conversation history
+            temperature: Optional temperature override (0.0 to 1.0)
+            history: Conversation context to read and update (defaults to the client's own history)
+            
+        Returns:
+            Dictionary containing the LLM response and metadata
+        """
+        self.active_requests += 1
+        self.is_processing = True
+        start_time = time.time()
+        history = self._resolve_history(history)
+        
+        try:
+            messages = self._build_messages(user_input, system_prompt, add_to_history, history)
+            payload = self._build_payload(messages, temperature)
             
-            # Extract assistant response
-            assistant_message = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            # Send request to LLM API over the shared connection pool
+            self.http_stats["requests"] += 1
+            async with self._get_session().post(self.api_endpoint, json=payload) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+            
+            return self._handle_result(result, add_to_history, start_time, history)
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status_code = e.status if isinstance(e, aiohttp.ClientResponseError) else None
+            return self._handle_request_error(e, add_to_history, status_code, history)
+        except Exception as e:
+            return self._handle_unexpected_error(e, history)
+        finally:
+            self.active_requests -= 1
+            self.is_processing = self.active_requests > 0
+    
+    async def astream_response(self, user_input: str, system_prompt: Optional[str] = None,
+                               add_to_history: bool = True, temperature: Optional[float] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a response from the LLM as it is generated.
+        
+        Sends the request with "stream": true and parses the server-sent events
+        of the OpenAI-compatible endpoint. Endpoints that ignore the flag and
+        answer with a single JSON body are handled as one delta.
+        
+        Args:
+            user_input: User's text input
+            system_prompt: Optional system prompt to set context
+            add_to_history: Whether to add this exchange to conversation history
+            temperature: Optional temperature override (0.0 to 1.0)
+            history: Conversation context to read and update (defaults to the client's own history)
+            
+        Yields:
+            {"type": "delta", "text": ...} for each content delta, followed by a
+            final {"type": "done", ...} event carrying the same fields as
+            aget_response() plus first_token_time
+        """
+        self.active_requests += 1
+        self.is_processing = True
+        start_time = time.time()
+        first_token_time = None
+        parts: List[str] = []
+        finish_reason = None
+        model = "unknown"
+        history = self._resolve_history(history)
+        
+        try:
+            messages = self._build_messages(user_input, system_prompt, add_to_history, history)
+            payload = self._build_payload(messages, temperature)
+            payload["stream"] = True
+            
+            self.http_stats["requests"] += 1
+            async with self._get_session().post(self.api_endpoint, json=payload) as response:
+                response.raise_for_status()
+                
+                if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                    # Endpoint does not stream; treat the whole completion as one delta
+                    result = await response.json(content_type=None)
+                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                    finish_reason = result.get("choices", [{}])[0].get("finish_reason")
+                    model = result.get("model", model)
+                    if content:
+                        first_token_time = time.time() - start_time
+                        parts.append(content)
+                        yield {"type": "delta", "text": content}
+                else:
+                    async for raw_line in response.content:
+                        line = raw_line.decode("utf-8").strip()
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        chunk = json.loads(data)
+                        model = chunk.get("model", model)
+                        choice = (chunk.get("choices") or [{}])[0]
+                        finish_reason = choice.get("finish_reason") or finish_reason
+                        content = choice.get("delta", {}).get("content")
+                        if content:
+                            if first_token_time is None:
+                                first_token_time = time.time() - start_time
+                            parts.append(content)
+                            yield {"type": "delta", "text": content}
+            
+            assistant_message = "".join(parts)
             
             # Add assistant response to history (only if we added the user input)
             if assistant_message and add_to_history:
-                self.add_to_history("assistant", assistant_message)
+                self._append_message(history, "assistant", assistant_message)
             
-            # Calculate processing time
-            end_time = logging.Formatter.converter()
-            processing_time = end_time[0] - start_time[0]
+            processing_time = time.time() - start_time
+            logger.info(f"Streamed response from LLM API in {processing_time:.2f}s "
+                       f"(first token after {first_token_time or 0:.2f}s)")
             
-            logger.info(f"Received response from LLM API after {processing_time:.2f}s")
-            
-            return {
+            yield {
+                "type": "done",
                 "text": assistant_message,
                 "processing_time": processing_time,
-                "finish_reason": result.get("choices", [{}])[0].get("finish_reason"),
-                "model": result.get("model", "unknown")
+                "first_token_time": first_token_time,
+                "finish_reason": finish_reason,
+                "model": model
             }
             
-        except requests.RequestException as e:
-            logger.error(f"LLM API request error: {e}")
-            error_response = f"I'm sorry, I encountered a problem connecting to my language model. {str(e)}"
-            
-            # Add the error to history if requested and clear history on 400 errors
-            # to prevent the same error from happening repeatedly
-            if add_to_history:
-                self.add_to_history("assistant", error_response)
-                
-                # If we get a 400 Bad Request, the context might be corrupt
-                if isinstance(e, requests.exceptions.HTTPError) and e.response.status_code == 400:
-                    logger.warning("Received 400 error, clearing conversation history to recover")
-                    # Keep only system prompt if it exists
-                    self.clear_history(keep_system_prompt=True)
-            
-            return {
-                "text": error_response,
-                "error": str(e)
-            }
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status_code = e.status if isinstance(e, aiohttp.ClientResponseError) else None
+            yield {"type": "done", **self._handle_request_error(e, add_to_history, status_code, history)}
         except Exception as e:
-            logger.error(f"LLM processing error: {e}")
-            error_response = "I'm sorry, I encountered an unexpected error. Please try again."
-            self.add_to_history("assistant", error_response)
-            return {
-                "text": error_response,
-                "error": str(e)
-            }
+            yield {"type": "done", **self._handle_unexpected_error(e, history)}
         finally:
-            self.is_processing = False
+            self.active_requests -= 1
+            self.is_processing = self.active_requests > 0
+    
+    async def aclose(self) -> None:
+        """Close pooled HTTP connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._sync_session.close()
     
     def clear_history(self, keep_system_prompt: bool = True) -> None:
         """
-        Clear conversation history.
+        Clear the client's own conversation history.
+        
+        Args:
+            keep_system_prompt: Whether to keep the system prompt if it exists
+        """
+        self._clear_messages(self.conversation_history, keep_system_prompt)
+    
+    @staticmethod
+    def _clear_messages(history: List[Dict[str, str]], keep_system_prompt: bool = True) -> None:
+        """
+        Clear a conversation context in place.
         
         Args:
+            history: Conversation context to clear
             keep_system_prompt: Whether to keep the system prompt if it exists
         """
-        if keep_system_prompt and self.conversation_history and self.conversation_history[0]["role"] == "system":
-            self.conversation_history = [self.conversation_history[0]]
+        if keep_system_prompt and history and history[0]["role"] == "system":
+            del history[1:]
         else:
-            self.conversation_history = []
+            history.clear()
     
     def get_config(self) -> Dict[str, Any]:
         """
@@ -231,6 +540,11 @@ class LLMClient:
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
             "timeout": self.timeout,
+            "pool_size": self.pool_size,
+            "pool_per_host": self.pool_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
             "is_processing": self.is_processing,
+            "active_requests": self.active_requests,
+            "http_stats": dict(self.http_stats),
             "history_length": len(self.conversation_history)
         }
@@ -5,9 +5,9 @@ Handles STT → LLM → TTS pipeline with proper queuing, authentication, and re
 """
 
 import asyncio
+import base64
 import logging
 import time
-import heapq
 from typing import Dict, Any, Optional, Callable, Awaitable, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
@@ -16,7 +16,15 @@ from datetime import datetime
 from .transcription import WhisperTranscriber
 from .llm import LLMClient
 from .tts import TTSClient
+from .tts_transcode import TTSTranscoder
 from .auth import AuthService
+from .request_queue import PriorityRequestQueue
+from .segmentation import SentenceSegmenter
+from .session_context import SessionContextStore, ConversationContext
+from .stage_pool import StageWorkerPool
+from .latency_model import LatencyModel
+from .framing import FrameKind, codec_from_format, encode_frame
+from .audio_ingest import trim_silence
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +83,11 @@ class PipelineRequest:
     priority: int = 1  # Higher priority = processed first (1=normal, 2=high, 3=critical)
     estimated_duration: float = 5.0  # Estimated processing time in seconds
     resource_usage: Dict[str, Any] = None  # Resource usage tracking
+    context: Optional[ConversationContext] = None  # Session conversation context (set when processing starts)
+    started_at: Optional[float] = None  # time.time() when dispatched from the queue
+    binary_frames: bool = False  # Send audio as binary frames instead of base64 JSON
+    tts_stream: bool = False  # Forward TTS audio chunk by chunk as the TTS server renders it
+    tts_format: str = ""  # Wire format TTS audio is transcoded to ("" sends it as synthesized)
 
 
 @dataclass
@@ -100,9 +113,29 @@ class UnifiedPipeline:
         llm_client: LLMClient,
         tts_client: TTSClient,
         auth_service: AuthService,
+        context_store: Optional[SessionContextStore] = None,
         max_queue_size: int = 50,
-        max_concurrent: int = 3,
-        request_timeout: int = 30
+        max_concurrent: int = 16,
+        request_timeout: int = 60,
+        stt_workers: Optional[int] = None,
+        stt_queue_size: Optional[int] = None,
+        llm_workers: int = 8,
+        llm_queue_size: int = 32,
+        tts_workers: int = 8,
+        tts_queue_size: int = 32,
+        partial_min_tokens: int = 8,
+        partial_interval: float = 0.15,
+        tts_segment_concurrency: int = 2,
+        tts_segment_min_chars: int = 20,
+        tts_segment_max_chars: int = 200,
+        trim_silence: bool = True,
+        trim_pad_ms: int = 200,
+        stt_language: str = "auto",
+        language_detect_utterances: int = 2,
+        language_pin_probability: float = 0.9,
+        language_recheck_logprob: float = -1.0,
+        tts_transcoder: Optional[TTSTranscoder] = None,
+        tts_wire_format: str = ""
     ):
         """
         Initialize the unified pipeline.
@@ -112,29 +145,99 @@ class UnifiedPipeline:
             llm_client: LLM client service
             tts_client: TTS client service
             auth_service: Authentication and rate limiting service
+            context_store: Per-session conversation context store (a default one is created if None)
             max_queue_size: Maximum number of queued requests
-            max_concurrent: Maximum concurrent processing requests
+            max_concurrent: Maximum requests in flight across all stages
             request_timeout: Timeout for individual requests in seconds
+            stt_workers: Transcriptions handed to the transcriber at once (None: its
+                workers times its batch size, so it never queues work itself)
+            stt_queue_size: Transcriptions allowed to wait for a worker (None: the
+                transcriber's max_queue_size)
+            llm_workers: LLM responses streamed concurrently
+            llm_queue_size: LLM responses allowed to wait for a worker
+            tts_workers: TTS segments synthesized concurrently
+            tts_queue_size: TTS segments allowed to wait for a worker
+            partial_min_tokens: Streamed LLM tokens to coalesce into one partial message
+            partial_interval: Maximum seconds between partial LLM messages while tokens arrive
+            tts_segment_concurrency: Sentences of one response synthesized concurrently
+            tts_segment_min_chars: Minimum characters per synthesized segment
+            tts_segment_max_chars: Characters after which a long sentence is cut at a clause
+            trim_silence: Trim leading/trailing silence before STT and skip utterances without speech
+            trim_pad_ms: Audio kept around the detected speech when trimming
+            stt_language: Language code to transcribe every session in, or "auto" to
+                detect each session's language and pin it
+            language_detect_utterances: Detected utterances after which the most likely
+                language is pinned
+            language_pin_probability: Detection probability that pins a language at once
+            language_recheck_logprob: Average log probability below which the next
+                utterance of a pinned session is detected again
+            tts_transcoder: Transcoder of TTS output for the wire (None sends it as synthesized)
+            tts_wire_format: Wire format for clients that do not negotiate one
+                ("" sends TTS output as synthesized)
         """
         self.transcriber = transcriber
         self.llm_client = llm_client
         self.tts_client = tts_client
         self.auth_service = auth_service
+        self.context_store = context_store or SessionContextStore()
 
         self.max_queue_size = max_queue_size
         self.max_concurrent = max_concurrent
         self.request_timeout = request_timeout
+        self.partial_min_tokens = partial_min_tokens
+        self.partial_interval = partial_interval
+        self.tts_segment_concurrency = tts_segment_concurrency
+        self.tts_segment_min_chars = tts_segment_min_chars
+        self.tts_segment_max_chars = tts_segment_max_chars
+        self.trim_silence = trim_silence
+        self.trim_pad_ms = trim_pad_ms
+        self.stt_language = stt_language
+        self.language_detect_utterances = max(1, language_detect_utterances)
+        self.language_pin_probability = language_pin_probability
+        self.language_recheck_logprob = language_recheck_logprob
+        self.tts_transcoder = tts_transcoder
+        self.tts_wire_format = tts_wire_format
 
         # Request queue and processing state
-        self.request_queue: List[Tuple[int, int, PipelineRequest]] = []  # Priority queue: (priority, counter, request)
-        self.request_queue_counter = 0  # For FIFO ordering within same priority
-        self.request_queue_max_size = max_queue_size
+        self.request_queue = PriorityRequestQueue(maxsize=max_queue_size)  # Ordered by (-priority, counter)
         self.active_requests: Dict[str, PipelineRequest] = {}
         self.processing_semaphore = asyncio.Semaphore(max_concurrent)
 
+        # STT work waits in the stage queue only: by default the stage passes on no more
+        # than the transcriber's workers (and batches) take, under the transcriber's limit
+        if stt_workers is None:
+            stt_workers = transcriber.max_workers * transcriber.batch_size
+        if stt_queue_size is None:
+            stt_queue_size = transcriber.max_queue_size
+
+        # Per-stage worker pools: a request only holds capacity in its current stage
+        self.stages: Dict[str, StageWorkerPool] = {
+            "stt": StageWorkerPool("stt", max_workers=stt_workers, max_queue_size=stt_queue_size),
+            "llm": StageWorkerPool("llm", max_workers=llm_workers, max_queue_size=llm_queue_size),
+            "tts": StageWorkerPool("tts", max_workers=tts_workers, max_queue_size=tts_queue_size)
+        }
+
+        # Learned stage latencies; priors (seconds) are used until real durations are observed
+        self.latency_model = LatencyModel(priors={
+            RequestType.GREETING.value: {"llm": 2.0, "tts": 1.0},
+            RequestType.AUDIO.value: {"stt": 3.0, "llm": 3.0, "tts": 2.0},
+            RequestType.SILENT_FOLLOWUP.value: {"llm": 2.5, "tts": 1.5}
+        })
+
+        # Running queue aggregates so ETAs are O(1): priority -> [count, estimated seconds]
+        self._queued_work: Dict[int, List[float]] = {}
+        self._active_work = 0.0  # Sum of estimated durations of active requests
+        self._active_started = 0.0  # Sum of their dispatch times
+        # Requests processed side by side, bounded by the narrowest stage (conservative)
+        self._parallelism = max(1, min(max_concurrent, stt_workers, llm_workers, tts_workers))
+
+        # Background tasks owned by the pipeline (one dispatcher for the whole server)
+        self._dispatcher_task: Optional[asyncio.Task] = None
+        self._request_tasks: Dict[str, asyncio.Task] = {}
+        self.request_counter = 0
+
         # Resource limits
         self.max_audio_size_mb = 10.0  # Maximum audio size in MB
-        self.max_processing_time = 60.0  # Maximum processing time per request in seconds
         self.max_memory_usage_mb = 100.0  # Maximum memory usage per request in MB
         self.max_conversation_length = 100  # Maximum conversation history length
         self.max_request_rate_per_minute = 30  # Maximum requests per minute per client
@@ -148,7 +251,26 @@ class UnifiedPipeline:
             "queue_size": 0,
             "active_count": 0,
             "rejected_requests": 0,
+            "cancelled_requests": 0,
+            "interrupts": 0,
+            "freed_capacity": {
+                "queued_requests": 0,
+                "active_requests": 0,
+                "stage_jobs": 0,
+                "estimated_seconds": 0.0
+            },
             "avg_processing_time": 0.0,
+            "stt_audio": {
+                "audio_seconds": 0.0,
+                "trimmed_seconds": 0.0,
+                "skipped_no_speech": 0
+            },
+            "stt_language": {
+                "pinned": 0,
+                "rechecks": 0,
+                "changed": 0
+            },
+            "tts_prerender": None,
             "resource_usage": {}
         }
 
@@ -157,33 +279,38 @@ class UnifiedPipeline:
         self.user_profile = self._load_user_profile()
 
         logger.info(f"UnifiedPipeline initialized: max_queue={max_queue_size}, "
-                   f"max_concurrent={max_concurrent}, timeout={request_timeout}s")
+                   f"max_concurrent={max_concurrent}, timeout={request_timeout}s, "
+                   f"stage workers stt={stt_workers} llm={llm_workers} tts={tts_workers}")
 
     def _queue_put(self, request: PipelineRequest):
-        """Add request to priority queue."""
-        # Use negative priority for min-heap (higher priority = smaller number)
-        # Counter ensures FIFO ordering for same priority
-        heapq.heappush(self.request_queue, (-request.priority, self.request_queue_counter, request))
-        self.request_queue_counter += 1
+        """Add request to priority queue, waking the dispatcher immediately."""
+        self.request_queue.put_nowait(request, request.priority)
+        self._track_queued(request, 1)
+
+    def _track_queued(self, request: PipelineRequest, sign: int):
+        """Add (sign=1) or remove (sign=-1) a request from the queued-work aggregates."""
+        work = self._queued_work.setdefault(request.priority, [0, 0.0])
+        work[0] += sign
+        work[1] += sign * request.estimated_duration
+        if work[0] <= 0:
+            del self._queued_work[request.priority]
+
+    def _track_active(self, request: PipelineRequest, sign: int):
+        """Add (sign=1) or remove (sign=-1) a dispatched request from the active-work aggregates."""
+        self._active_work += sign * request.estimated_duration
+        self._active_started += sign * request.started_at
 
     async def _queue_get(self) -> PipelineRequest:
-        """Get next request from priority queue."""
-        while True:
-            if not self.request_queue:
-                # Wait for items to be added
-                await asyncio.sleep(0.1)
-                continue
-
-            priority, counter, request = heapq.heappop(self.request_queue)
-            return request
+        """Wait for the next request from the priority queue."""
+        return await self.request_queue.get()
 
     def _queue_size(self) -> int:
         """Get current queue size."""
-        return len(self.request_queue)
+        return self.request_queue.qsize()
 
     def _queue_full(self) -> bool:
         """Check if queue is full."""
-        return self._queue_size() >= self.request_queue_max_size
+        return self.request_queue.full()
 
     def _load_system_prompt(self) -> str:
         """Load system prompt (simplified version)."""
@@ -203,6 +330,49 @@ class UnifiedPipeline:
                 "Respond to user queries in a natural, conversational manner. "
                 "Keep responses brief and to the point, as you're communicating via voice.")
 
+    def _load_prerender_phrases(self, path: str) -> List[str]:
+        """Load phrases to pre-render: a JSON list, or an object of lists grouped by purpose."""
+        try:
+            import os
+            import json
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    phrases = json.load(f)
+                if isinstance(phrases, dict):
+                    phrases = [phrase for group in phrases.values() for phrase in group]
+                return [phrase for phrase in phrases if isinstance(phrase, str) and phrase.strip()]
+        except Exception as e:
+            logger.error(f"Error loading TTS phrases from {path}: {e}")
+        return []
+
+    async def prerender_speech(self, phrases_path: str, concurrency: int = 4) -> Dict[str, Any]:
+        """
+        Pre-render fixed phrases into the TTS cache.
+
+        Phrases are split with the same segmenter settings used for responses,
+        so the cached entries match the segments the pipeline synthesizes when
+        one of them is spoken (e.g. an LLM error message).
+
+        Args:
+            phrases_path: JSON file with the phrases
+            concurrency: Segments synthesized at the same time
+
+        Returns:
+            Pre-render report (also kept in the pipeline stats)
+        """
+        segments = []
+        for phrase in self._load_prerender_phrases(phrases_path):
+            segmenter = SentenceSegmenter(min_chars=self.tts_segment_min_chars,
+                                          max_chars=self.tts_segment_max_chars)
+            segments.extend(segmenter.feed(phrase) + segmenter.flush())
+
+        report = await self.tts_client.prerender(segments, concurrency=concurrency)
+        self.stats["tts_prerender"] = report
+        logger.info(f"TTS warm-up: {report['already_cached'] + report['rendered']}/{report['texts']} segments cached "
+                    f"({report['rendered']} rendered, {report['already_cached']} already cached, "
+                    f"{report['failed']} failed) in {report['duration']:.2f}s, coverage {report['coverage']:.0%}")
+        return report
+
     def _load_user_profile(self) -> Dict[str, Any]:
         """Load user profile (simplified version)."""
         try:
@@ -225,14 +395,89 @@ class UnifiedPipeline:
         self.is_running = True
         logger.info("Starting unified pipeline")
 
+        for stage in self.stages.values():
+            await stage.start()
+
         # Start the processing loop
-        asyncio.create_task(self._process_queue())
+        self._dispatcher_task = asyncio.create_task(self._process_queue())
 
     async def stop(self):
-        """Stop the pipeline processing."""
+        """Stop the pipeline processing and cancel outstanding work."""
         self.is_running = False
         logger.info("Stopping unified pipeline")
 
+        tasks = list(self._request_tasks.values())
+        if self._dispatcher_task:
+            tasks.append(self._dispatcher_task)
+            self._dispatcher_task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for stage in self.stages.values():
+            await stage.stop()
+
+    def cancel_session_requests(self, session_token: str, reason: str = "disconnect") -> Dict[str, Any]:
+        """
+        Drop queued requests and cancel in-flight requests for a session.
+
+        Used when a connection goes away, or when the user talks over the
+        assistant (barge-in), so the shared pipeline does not keep spending
+        Whisper CPU, LLM tokens and TTS calls on results nobody will receive.
+        Cancelling a request's task cancels its stage jobs, which closes any
+        outstanding LLM/TTS HTTP streams.
+
+        Args:
+            session_token: Session whose requests should be cancelled
+            reason: Why the requests are cancelled ("disconnect" or "interrupt")
+
+        Returns:
+            Capacity freed: queued/active requests, stage jobs and estimated seconds
+        """
+        owned = lambda request: request.session_token == session_token
+
+        # Queued requests never reached the dispatcher, so release them here
+        removed = self.request_queue.remove(owned)
+        for request in removed:
+            self._track_queued(request, -1)
+            self.auth_service.decrement_concurrent(request.client_ip)
+        self.stats["queue_size"] = self._queue_size()
+
+        # In-flight requests release their resources in _on_request_done
+        cancelled = []
+        for request_id, request in list(self.active_requests.items()):
+            if not owned(request):
+                continue
+            task = self._request_tasks.get(request_id)
+            if task and not task.done():
+                task.cancel()
+                cancelled.append(request)
+
+        # Free stage queue slots now rather than when the cancelled tasks resume
+        stage_jobs = 0
+        for stage in self.stages.values():
+            queued_jobs, running_jobs = stage.cancel(owned)
+            stage_jobs += queued_jobs + running_jobs
+
+        freed = {
+            "queued_requests": len(removed),
+            "active_requests": len(cancelled),
+            "stage_jobs": stage_jobs,
+            "estimated_seconds": round(sum(r.estimated_duration for r in removed + cancelled), 1)
+        }
+
+        if reason == "interrupt":
+            self.stats["interrupts"] += 1
+        self.stats["cancelled_requests"] += len(removed) + len(cancelled)
+        for key, value in freed.items():
+            self.stats["freed_capacity"][key] += value
+
+        if removed or cancelled:
+            logger.info(f"Cancelled {len(removed)} queued and {len(cancelled)} active requests "
+                       f"({stage_jobs} stage jobs) for session {session_token} on {reason}")
+        return freed
+
     async def submit_request(
         self,
         request_type: RequestType,
@@ -240,7 +485,10 @@ class UnifiedPipeline:
         session_token: str,
         websocket: Any,
         data: Dict[str, Any],
-        priority: int = 1
+        priority: int = 1,
+        binary_frames: bool = False,
+        tts_stream: bool = False,
+        tts_format: str = ""
     ) -> str:
         """
         Submit a request to the pipeline.
@@ -252,6 +500,9 @@ class UnifiedPipeline:
             websocket: WebSocket connection
             data: Request data
             priority: Request priority (higher = processed first)
+            binary_frames: Whether the connection negotiated binary audio frames
+            tts_stream: Whether the connection negotiated chunk-by-chunk TTS audio
+            tts_format: Wire format negotiated with negotiate_tts_format()
 
         Returns:
             Request ID
@@ -287,11 +538,12 @@ class UnifiedPipeline:
             elif request_type == RequestType.SILENT_FOLLOWUP:
                 priority = 3  # Critical priority for silent followups
 
-        # Generate request ID
-        request_id = f"{request_type.value}_{int(time.time() * 1000)}_{hash(session_token) % 1000}"
+        # Generate request ID (counter keeps IDs unique within the same millisecond)
+        self.request_counter += 1
+        request_id = f"{request_type.value}_{int(time.time() * 1000)}_{hash(session_token) % 1000}_{self.request_counter}"
 
-        # Estimate processing duration
-        estimated_duration = self._estimate_processing_duration(request_type, data)
+        # Estimate processing duration from learned stage latencies
+        estimated_duration = self._estimate_processing_duration(request_type, data, session_token)
 
         # Create request
         request = PipelineRequest(
@@ -304,7 +556,10 @@ class UnifiedPipeline:
             timestamp=datetime.now(),
             priority=priority,
             estimated_duration=estimated_duration,
-            resource_usage={}
+            resource_usage={},
+            binary_frames=binary_frames,
+            tts_stream=tts_stream,
+            tts_format=tts_format
         )
 
         # Increment concurrent counter
@@ -316,9 +571,11 @@ class UnifiedPipeline:
         self.stats["queue_size"] = self._queue_size()
 
         # Send initial status
+        queue_position, estimated_wait = self._estimate_wait_time(request)
         await self._send_status_update(websocket, request_id, PipelineStage.QUEUED, {
-            "queue_position": self.request_queue.qsize(),
-            "estimated_wait": self._estimate_wait_time()
+            "queue_position": queue_position,
+            "estimated_wait": round(estimated_wait, 2),
+            "estimated_duration": round(estimated_duration, 2)
         })
 
         logger.info(f"Request {request_id} submitted to pipeline (type: {request_type.value}, queue: {self.request_queue.qsize()})")
@@ -328,12 +585,28 @@ class UnifiedPipeline:
         """Main processing loop for the pipeline."""
         while self.is_running:
             try:
-                # Get next request from priority queue
-                request = await self._queue_get()
+                # Only dequeue once an in-flight slot is free, so waiting requests
+                # stay in the priority queue rather than piling up as tasks.
+                # Stage capacity is limited separately by the stage worker pools.
+                await self.processing_semaphore.acquire()
+                try:
+                    request = await self._queue_get()
+                except BaseException:
+                    self.processing_semaphore.release()
+                    raise
                 self.stats["queue_size"] = self._queue_size()
+                self._track_queued(request, -1)
+
+                # Track as active before the task starts so teardown can find it
+                request.started_at = time.time()
+                self._track_active(request, 1)
+                self.active_requests[request.request_id] = request
+                self.stats["active_count"] = len(self.active_requests)
 
                 # Process the request
-                asyncio.create_task(self._process_request(request))
+                task = asyncio.create_task(self._process_request(request))
+                self._request_tasks[request.request_id] = task
+                task.add_done_callback(lambda _task, request=request: self._on_request_done(request))
 
             except asyncio.CancelledError:
                 break
@@ -345,29 +618,25 @@ class UnifiedPipeline:
         """Process a single request through the pipeline with resource limits."""
         request_id = request.request_id
         websocket = request.websocket
-        client_ip = request.client_ip
 
         try:
-            # Add to active requests
-            self.active_requests[request_id] = request
-            self.stats["active_count"] = len(self.active_requests)
-
-            # Acquire processing semaphore
-            async with self.processing_semaphore:
-                # Process with timeout
-                try:
-                    result = await asyncio.wait_for(
-                        self._process_request_with_limits(request),
-                        timeout=self.max_processing_time
-                    )
-                except asyncio.TimeoutError:
-                    raise ValueError(f"Request processing timeout after {self.max_processing_time} seconds")
-
-                # Send result to client
-                await self._send_result(websocket, result)
-
-                # Mark as completed
-                self.stats["completed_requests"] += 1
+            # Process with timeout
+            try:
+                result = await asyncio.wait_for(
+                    self._process_request_with_limits(request),
+                    timeout=self.request_timeout
+                )
+            except asyncio.TimeoutError:
+                raise ValueError(f"Request processing timeout after {self.request_timeout} seconds")
+
+            # Send result to client
+            await self._send_result(websocket, result, binary_frames=request.binary_frames)
+
+            # Mark as completed and learn from the total duration
+            self.stats["completed_requests"] += 1
+            duration = time.time() - request.started_at
+            self.latency_model.record_request(request.request_type.value, duration, len(result.llm_response or ""))
+            self.stats["avg_processing_time"] += (duration - self.stats["avg_processing_time"]) / self.stats["completed_requests"]
 
         except Exception as e:
             logger.error(f"Error processing request {request_id}: {e}")
@@ -383,25 +652,40 @@ class UnifiedPipeline:
             await self._send_result(websocket, result)
             self.stats["failed_requests"] += 1
 
-        finally:
-            # Cleanup
-            if request_id in self.active_requests:
-                del self.active_requests[request_id]
-            self.stats["active_count"] = len(self.active_requests)
+    def _on_request_done(self, request: PipelineRequest):
+        """
+        Release resources held by a dispatched request.
 
-            # Decrement concurrent counter
-            self.auth_service.decrement_concurrent(client_ip)
+        Runs as a task done-callback so cleanup also happens when the task is
+        cancelled before it gets a chance to start.
+        """
+        request_id = request.request_id
+
+        # Cleanup
+        if self.active_requests.pop(request_id, None) is not None:
+            self._track_active(request, -1)
+        self._request_tasks.pop(request_id, None)
+        self.stats["active_count"] = len(self.active_requests)
+        if request.context is not None:
+            self.context_store.unpin(request.context)
 
-            # Mark queue task as done
-            self.request_queue.task_done()
+        # Decrement concurrent counter
+        self.auth_service.decrement_concurrent(request.client_ip)
+
+        # Mark queue task as done and free the processing slot
+        self.request_queue.task_done()
+        self.processing_semaphore.release()
 
     async def _process_request_with_limits(self, request: PipelineRequest) -> PipelineResult:
         """Process request with resource monitoring."""
+        # Each session has its own conversation context
+        request.context = await self.context_store.acquire(request.session_token, pin=True)
+
         # Check conversation length limit
-        if len(self.llm_client.conversation_history) > self.max_conversation_length:
+        if len(request.context.messages) > self.max_conversation_length:
             # Trim conversation history to prevent memory issues
             keep_messages = self.max_conversation_length // 2
-            self.llm_client.conversation_history = self.llm_client.conversation_history[-keep_messages:]
+            request.context.replace(request.context.messages[-keep_messages:])
             logger.warning(f"Trimmed conversation history to {keep_messages} messages for request {request.request_id}")
 
         # Process based on request type
@@ -425,42 +709,24 @@ class UnifiedPipeline:
         await self._send_status_update(websocket, request_id, PipelineStage.PROCESSING_LLM)
 
         # Generate greeting prompt
-        instruction = self._get_greeting_prompt()
-
-        # Temporarily clear conversation history for greeting
-        saved_history = self.llm_client.conversation_history.copy()
-        self.llm_client.conversation_history = []
-
-        try:
-            # Get LLM response
-            llm_response = self.llm_client.get_response(instruction, self.system_prompt, add_to_history=False, temperature=0.7)
+        instruction = self._get_greeting_prompt(request.context)
 
-            # Send partial LLM response
-            await self._send_partial_llm_response(websocket, request_id, llm_response["text"], is_final=True)
-
-            # Restore conversation history
-            self.llm_client.conversation_history = saved_history
-
-            # Initialize conversation context
-            self._initialize_conversation_context()
+        # Greeting is generated without conversation history
+        llm_response, tts_metadata = await self._respond_with_speech(
+            request, instruction, add_to_history=False, temperature=0.7, history=[]
+        )
 
-            # Generate TTS
-            await self._send_status_update(websocket, request_id, PipelineStage.GENERATING_SPEECH)
-            audio_data = await self.tts_client.async_text_to_speech(llm_response["text"])
+        # Initialize conversation context
+        self._initialize_conversation_context(request.context)
 
-            return PipelineResult(
-                request_id=request_id,
-                success=True,
-                transcript=None,  # Greeting has no transcript
-                llm_response=llm_response["text"],
-                audio_data=audio_data,
-                metadata={"type": "greeting"}
-            )
-
-        except Exception as e:
-            # Restore conversation history on error
-            self.llm_client.conversation_history = saved_history
-            raise
+        return PipelineResult(
+            request_id=request_id,
+            success=True,
+            transcript=None,  # Greeting has no transcript
+            llm_response=llm_response["text"],
+            audio_data=None,  # Already streamed sentence by sentence
+            metadata={"type": "greeting", "tts_metadata": tts_metadata}
+        )
 
     async def _process_audio(self, request: PipelineRequest) -> PipelineResult:
         """Process an audio request through STT → LLM → TTS with partial updates."""
@@ -474,9 +740,40 @@ class UnifiedPipeline:
         # STT Stage
         await self._send_status_update(websocket, request_id, PipelineStage.TRANSCRIBING)
 
-        # For partial transcription, we'll simulate streaming by sending intermediate results
-        # In a real implementation, the transcriber would support streaming transcription
-        transcript, stt_metadata = self.transcriber.transcribe(audio_data)
+        # Silence costs Whisper as much as speech: trim it, and skip STT when there is no speech
+        trim_stats = None
+        if self.trim_silence:
+            audio_data, trim_stats = trim_silence(audio_data, self.trim_pad_ms)
+            stt_audio = self.stats["stt_audio"]
+            stt_audio["audio_seconds"] += trim_stats["audio_seconds"] or 0.0
+            stt_audio["trimmed_seconds"] += trim_stats["trimmed_seconds"]
+            if not trim_stats["speech"]:
+                stt_audio["skipped_no_speech"] += 1
+                logger.info(f"No speech in {trim_stats['audio_seconds']:.2f}s of audio, skipping STT: {request_id}")
+                return PipelineResult(
+                    request_id=request_id,
+                    success=True,
+                    transcript="",
+                    llm_response=None,
+                    audio_data=None,
+                    metadata={"type": "audio", "empty_transcript": True, "no_speech": True, "trim": trim_stats}
+                )
+
+        # Whisper decoding is CPU-bound, so it runs in the transcriber's worker pool.
+        # The STT stage backlog and wait feed the transcriber's quality ladder.
+        stt_submitted_at = time.time()
+        language = self._stt_language_for(request.context)
+        transcript, stt_metadata = await self._run_stage(
+            "stt", request,
+            lambda: self.transcriber.atranscribe(
+                audio_data, backlog=self.stages["stt"].queue.qsize(), submitted_at=stt_submitted_at,
+                language=language
+            ),
+            units=len(audio_data) / 1024
+        )
+        if trim_stats is not None:
+            stt_metadata["trimmed_seconds"] = trim_stats["trimmed_seconds"]
+        self._update_stt_language(request.context, stt_metadata)
 
         # Send partial transcription (could be broken into chunks in real streaming)
         if transcript.strip():
@@ -496,35 +793,28 @@ class UnifiedPipeline:
         # LLM Stage
         await self._send_status_update(websocket, request_id, PipelineStage.PROCESSING_LLM)
 
-        # Check for vision context
+        # Check for vision context (consumed by the first question after the upload)
         enhanced_transcript = transcript
-        if hasattr(request, 'vision_context') and request.vision_context:
+        if request.context.vision_context:
             enhanced_transcript = f"{transcript} [Note: This question refers to the image I just analyzed.]"
             # Add vision context to conversation
-            self._add_vision_context_to_conversation(request.vision_context)
+            self._add_vision_context_to_conversation(request.context, request.context.vision_context)
+            request.context.vision_context = None
 
-        # For partial LLM responses, we'll simulate streaming by sending chunks
-        # In a real implementation, the LLM client would support streaming responses
-        llm_response = self.llm_client.get_response(enhanced_transcript, self.system_prompt)
-
-        # Send partial LLM response (could be streamed in real implementation)
-        if llm_response["text"]:
-            await self._send_partial_llm_response(websocket, request_id, llm_response["text"], is_final=True)
-
-        # TTS Stage
-        await self._send_status_update(websocket, request_id, PipelineStage.GENERATING_SPEECH)
-        audio_data = await self.tts_client.async_text_to_speech(llm_response["text"])
+        # Stream the LLM response and speak it sentence by sentence as it arrives
+        llm_response, tts_metadata = await self._respond_with_speech(request, enhanced_transcript)
 
         return PipelineResult(
             request_id=request_id,
             success=True,
             transcript=transcript,
             llm_response=llm_response["text"],
-            audio_data=audio_data,
+            audio_data=None,  # Already streamed sentence by sentence
             metadata={
                 "type": "audio",
                 "stt_metadata": stt_metadata,
-                "llm_metadata": {k: v for k, v in llm_response.items() if k != "text"}
+                "llm_metadata": {k: v for k, v in llm_response.items() if k != "text"},
+                "tts_metadata": tts_metadata
             }
         )
 
@@ -540,29 +830,372 @@ class UnifiedPipeline:
         # Get appropriate silence indicator
         user_input = self._get_silence_indicator(tier)
 
-        # Get LLM response with context
-        llm_response = self.llm_client.get_response(user_input, self.system_prompt, add_to_history=False, temperature=0.7)
-
-        # Send partial LLM response
-        await self._send_partial_llm_response(websocket, request_id, llm_response["text"], is_final=True)
-
-        # Generate TTS
-        await self._send_status_update(websocket, request_id, PipelineStage.GENERATING_SPEECH)
-        audio_data = await self.tts_client.async_text_to_speech(llm_response["text"])
+        # Get LLM response with context, speaking it as it arrives
+        llm_response, tts_metadata = await self._respond_with_speech(
+            request, user_input, add_to_history=False, temperature=0.7
+        )
 
         return PipelineResult(
             request_id=request_id,
             success=True,
             transcript=None,
             llm_response=llm_response["text"],
-            audio_data=audio_data,
-            metadata={"type": "silent_followup", "tier": tier}
+            audio_data=None,  # Already streamed sentence by sentence
+            metadata={"type": "silent_followup", "tier": tier, "tts_metadata": tts_metadata}
+        )
+
+    def _stt_language_for(self, context: ConversationContext) -> Optional[str]:
+        """Language to transcribe a session's next utterance in (None: detect it)."""
+        if self.stt_language != "auto":
+            return self.stt_language
+        if context.stt_language is None or context.stt_language_recheck:
+            return None
+        return context.stt_language
+
+    def negotiate_tts_format(self, requested: Any = None) -> str:
+        """
+        Pick the wire format of a connection's TTS audio.
+
+        Args:
+            requested: Format name or preference list from the client's authenticate message
+
+        Returns:
+            Wire format to transcode to, or "" to send TTS output as synthesized
+        """
+        if self.tts_transcoder is None:
+            return ""
+        return self.tts_transcoder.negotiate(requested, default=self.tts_wire_format)
+
+    def get_session_language(self, session_token: str) -> Optional[str]:
+        """
+        Language a session's speech is transcribed in.
+
+        Args:
+            session_token: Session token
+
+        Returns:
+            Fixed or pinned language code, or None while it is still being detected
+        """
+        if self.stt_language != "auto":
+            return self.stt_language
+        context = self.context_store.get(session_token)
+        return context.stt_language if context is not None else None
+
+    def _update_stt_language(self, context: ConversationContext, stt_metadata: Dict[str, Any]) -> None:
+        """
+        Pin, re-pin or schedule a re-check of a session's language after a transcription.
+
+        Detection costs an extra encoder pass, so it runs only until the session's
+        language is pinned: at once for a confident detection, otherwise after
+        language_detect_utterances detections by summed probability. A pinned
+        session whose transcript confidence drops below language_recheck_logprob
+        gets its next utterance detected again.
+
+        Args:
+            context: Session the utterance belongs to
+            stt_metadata: Transcriber metadata of the utterance
+        """
+        if self.stt_language != "auto":
+            return
+        language_stats = self.stats["stt_language"]
+
+        if stt_metadata.get("language_detected"):
+            language = stt_metadata["language"]
+            probability = stt_metadata.get("language_probability", 0.0)
+            votes = context.stt_language_votes
+            votes[language] = votes.get(language, 0.0) + probability
+            context.stt_language_detections += 1
+            if probability >= self.language_pin_probability or \
+                    context.stt_language_detections >= self.language_detect_utterances:
+                pinned = max(votes, key=votes.get)
+                if context.stt_language is not None and pinned != context.stt_language:
+                    language_stats["changed"] += 1
+                logger.info(f"Pinned STT language '{pinned}' for session {context.session_token[:8]}... "
+                            f"after {context.stt_language_detections} detection(s)")
+                context.stt_language = pinned
+                context.stt_language_votes = {}
+                context.stt_language_detections = 0
+                context.stt_language_recheck = False
+                language_stats["pinned"] += 1
+        elif context.stt_language is not None and not context.stt_language_recheck and \
+                stt_metadata.get("segments_count") and \
+                stt_metadata.get("confidence", 0.0) < self.language_recheck_logprob:
+            # The pin stays in use for partials until the re-check has pinned again
+            context.stt_language_recheck = True
+            language_stats["rechecks"] += 1
+
+    async def _run_stage(self, stage: str, request: PipelineRequest, func: Callable[[], Awaitable[Any]],
+                         units: Optional[float] = None) -> Any:
+        """
+        Run one stage of a request on that stage's worker pool.
+
+        Args:
+            stage: Stage name ("stt", "llm" or "tts")
+            request: Request the work belongs to
+            func: Coroutine factory performing the work
+            units: Input size; when given, the run time (excluding queue wait)
+                is recorded in the latency model
+
+        Returns:
+            Result of the work
+        """
+        if units is None:
+            return await self.stages[stage].run(func, priority=request.priority, owner=request)
+
+        async def timed():
+            started_at = time.time()
+            result = await func()
+            self.latency_model.record(stage, request.request_type.value, time.time() - started_at, units)
+            return result
+
+        return await self.stages[stage].run(timed, priority=request.priority, owner=request)
+
+    async def _stream_llm_response(self, request: PipelineRequest, user_input: str,
+                                   on_text: Optional[Callable[[str], None]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Stream an LLM response, forwarding coalesced partial text to the client.
+
+        The first token is sent immediately; after that a partial message goes out
+        every partial_min_tokens tokens or partial_interval seconds, whichever comes
+        first. Each partial carries the full text generated so far.
+
+        Args:
+            request: Request being processed
+            user_input: Text to send to the LLM
+            on_text: Optional callback receiving each text delta
+            **kwargs: Extra arguments for LLMClient.astream_response
+
+        Returns:
+            Final response dictionary (same shape as LLMClient.aget_response)
+        """
+        # Use the session's own message window unless the caller overrides it
+        kwargs.setdefault("history", request.context.messages)
+
+        text = ""
+        pending_tokens = 0
+        last_sent = 0.0
+        llm_response: Dict[str, Any] = {"text": ""}
+
+        async for event in self.llm_client.astream_response(user_input, self.system_prompt, **kwargs):
+            if event["type"] != "delta":
+                llm_response = {k: v for k, v in event.items() if k != "type"}
+                continue
+
+            text += event["text"]
+            if on_text:
+                on_text(event["text"])
+            pending_tokens += 1
+            now = time.time()
+            if pending_tokens >= self.partial_min_tokens or now - last_sent >= self.partial_interval:
+                await self._send_partial_llm_response(request.websocket, request.request_id, text, is_final=False)
+                pending_tokens = 0
+                last_sent = now
+
+        return llm_response
+
+    async def _respond_with_speech(self, request: PipelineRequest, user_input: str,
+                                   **kwargs) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Stream an LLM response and synthesize it sentence by sentence.
+
+        Text is segmented into sentences/clauses as tokens arrive; each segment is
+        sent to TTS immediately (at most tts_segment_concurrency at a time) and its
+        audio is emitted in order, so playback can start after the first sentence
+        instead of after the whole answer. If the connection negotiated tts_stream,
+        each segment's audio is forwarded chunk by chunk while the TTS server is
+        still rendering it; otherwise it is sent as one tts_chunk per segment.
+
+        Args:
+            request: Request being processed
+            user_input: Text to send to the LLM
+            **kwargs: Extra arguments for LLMClient.astream_response
+
+        Returns:
+            Tuple of (final LLM response dictionary, TTS metadata)
+        """
+        websocket = request.websocket
+        request_id = request.request_id
+        started_at = time.time()
+
+        segmenter = SentenceSegmenter(min_chars=self.tts_segment_min_chars,
+                                      max_chars=self.tts_segment_max_chars)
+        tts_slots = asyncio.Semaphore(self.tts_segment_concurrency)
+        ordered_segments: asyncio.Queue = asyncio.Queue()
+        segment_tasks: List[asyncio.Task] = []
+        streamed = False
+
+        wire_format = request.tts_format if self.tts_transcoder is not None else ""
+
+        async def stream_speech(text: str, chunks: asyncio.Queue):
+            if not wire_format:
+                async for chunk in self.tts_client.astream_text_to_speech(text):
+                    chunks.put_nowait(chunk)
+                return
+
+            # Encoded pages are forwarded as the encoder produces them
+            encoder = self.tts_transcoder.encoder(wire_format)
+            encode_time = 0.0
+            try:
+                async for chunk in self.tts_client.astream_text_to_speech(text):
+                    encode_started = time.perf_counter()
+                    chunks.put_nowait(await asyncio.to_thread(encoder.feed, chunk))
+                    encode_time += time.perf_counter() - encode_started
+                encode_started = time.perf_counter()
+                chunks.put_nowait(await asyncio.to_thread(encoder.finish))
+                self.tts_transcoder.record(encoder, encode_time + time.perf_counter() - encode_started)
+            except Exception:
+                self.tts_transcoder.record_failure()
+                raise
+            finally:
+                encoder.close()
+
+        async def speech(text: str) -> bytes:
+            audio_data = await self.tts_client.async_text_to_speech(text)
+            if wire_format:
+                audio_data = await asyncio.to_thread(self.tts_transcoder.transcode, audio_data, wire_format)
+            return audio_data
+
+        async def synthesize(text: str, chunks: asyncio.Queue):
+            try:
+                async with tts_slots:
+                    if request.tts_stream:
+                        await self._run_stage("tts", request, lambda: stream_speech(text, chunks))
+                    else:
+                        chunks.put_nowait(await self._run_stage("tts", request, lambda: speech(text)))
+            finally:
+                chunks.put_nowait(None)
+
+        def schedule(segments: List[str]):
+            for segment in segments:
+                chunks: asyncio.Queue = asyncio.Queue()
+                task = asyncio.create_task(synthesize(segment, chunks))
+                segment_tasks.append(task)
+                ordered_segments.put_nowait((task, chunks))
+
+        def on_text(delta: str):
+            nonlocal streamed
+            streamed = True
+            schedule(segmenter.feed(delta))
+
+        sender = asyncio.create_task(
+            self._send_speech_segments(websocket, request_id, ordered_segments, started_at,
+                                       binary_frames=request.binary_frames,
+                                       audio_format=wire_format or self.tts_client.output_format)
         )
 
-    def _get_greeting_prompt(self) -> str:
-        """Get greeting prompt based on user profile."""
+        try:
+            prompt_tokens = self._estimate_prompt_tokens(kwargs.get("history", request.context.messages), user_input)
+            llm_response = await self._run_stage(
+                "llm", request, lambda: self._stream_llm_response(request, user_input, on_text=on_text, **kwargs),
+                units=prompt_tokens
+            )
+            llm_done_at = time.time()
+
+            # Speak the remainder, or the whole text if nothing was streamed (e.g. error message)
+            if not streamed:
+                segmenter.feed(llm_response["text"])
+            schedule(segmenter.flush())
+            ordered_segments.put_nowait(None)
+
+            # Send final LLM response while the remaining audio is synthesized
+            if llm_response["text"]:
+                await self._send_partial_llm_response(websocket, request_id, llm_response["text"], is_final=True)
+
+            tts_metadata = await sender
+
+            # Speech still playing out after the last token is the TTS stage's latency
+            self.latency_model.record("tts", request.request_type.value, time.time() - llm_done_at,
+                                      len(llm_response["text"]))
+            return llm_response, tts_metadata
+
+        finally:
+            # Stop outstanding synthesis if the request failed or was cancelled
+            for task in segment_tasks + [sender]:
+                if not task.done():
+                    task.cancel()
+
+    async def _send_speech_segments(self, websocket: Any, request_id: str, ordered_segments: asyncio.Queue,
+                                    started_at: float, binary_frames: bool = False,
+                                    audio_format: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Emit synthesized segments to the client in order.
+
+        Chunks of the segment being emitted are forwarded as soon as they
+        arrive; later segments buffer until it is finished.
+
+        Args:
+            websocket: WebSocket connection
+            request_id: Request ID
+            ordered_segments: Queue of (TTS task, chunk queue) per segment, terminated by None;
+                each chunk queue is terminated by None
+            started_at: time.time() when the response started, for time-to-first-audio
+            binary_frames: Send audio as binary frames instead of base64 JSON
+            audio_format: Format reported with each chunk (default: the TTS output format)
+
+        Returns:
+            TTS metadata (segment and chunk counts, bytes, format, time to first audio)
+        """
+        sent = 0
+        chunks_sent = 0
+        total_bytes = 0
+        time_to_first_audio = None
+        status_sent = False
+
+        try:
+            while True:
+                item = await ordered_segments.get()
+                if item is None:
+                    break
+                task, chunks = item
+
+                if not status_sent:
+                    await self._send_status_update(websocket, request_id, PipelineStage.GENERATING_SPEECH)
+                    status_sent = True
+
+                chunk_index = 0
+                while True:
+                    audio_data = await chunks.get()
+                    if audio_data is None:
+                        break
+                    if not audio_data:
+                        continue
+
+                    if chunks_sent == 0:
+                        time_to_first_audio = time.time() - started_at
+                        await self._send_tts_start(websocket, request_id)
+
+                    await self._send_tts_chunk(websocket, request_id, audio_data, segment_index=sent,
+                                               binary_frames=binary_frames, chunk_index=chunk_index,
+                                               sequence=chunks_sent, audio_format=audio_format)
+                    chunk_index += 1
+                    chunks_sent += 1
+                    total_bytes += len(audio_data)
+
+                await task  # Surface a synthesis failure
+                if chunk_index:
+                    sent += 1
+        finally:
+            # Close the audio started with tts_start even when a segment failed or the
+            # response was cancelled, so the client leaves its speaking state
+            if chunks_sent:
+                try:
+                    await self._send_tts_end(websocket, request_id)
+                except Exception as e:
+                    logger.error(f"Failed to send TTS end: {e}")
+
+        return {
+            "segments": sent,
+            "chunks": chunks_sent,
+            "audio_bytes": total_bytes,
+            "format": audio_format or self.tts_client.output_format,
+            "time_to_first_audio": time_to_first_audio,
+            "total_time": time.time() - started_at
+        }
+
+    def _get_greeting_prompt(self, context: ConversationContext) -> str:
+        """Get greeting prompt based on user profile and the session's history."""
         user_name = self.user_profile.get("name", "")
-        has_history = len(self.llm_client.conversation_history) > 0
+        has_history = len(context.messages) > 0
 
         if user_name:
             if has_history:
@@ -580,8 +1213,8 @@ class UnifiedPipeline:
         indicators = ["[silent]", "[no response]", "[still waiting]"]
         return indicators[min(tier, len(indicators) - 1)]
 
-    def _initialize_conversation_context(self):
-        """Initialize conversation context with user information."""
+    def _initialize_conversation_context(self, context: ConversationContext):
+        """Initialize a session's conversation context with user information."""
         user_name = self.user_profile.get("name", "")
         if not user_name:
             return
@@ -590,23 +1223,25 @@ class UnifiedPipeline:
             "role": "system",
             "content": f"USER CONTEXT: The user's name is {user_name}."
         }
+        history = context.messages
 
         # Insert after main system prompt if it exists
-        if (self.llm_client.conversation_history and
-            self.llm_client.conversation_history[0]["role"] == "system"):
-            if (len(self.llm_client.conversation_history) > 1 and
-                "USER CONTEXT" in self.llm_client.conversation_history[1].get("content", "")):
+        if history and history[0]["role"] == "system":
+            if len(history) > 1 and "USER CONTEXT" in history[1].get("content", ""):
                 # Replace existing context
-                self.llm_client.conversation_history[1] = context_message
+                history[1] = context_message
             else:
                 # Insert after system prompt
-                self.llm_client.conversation_history.insert(1, context_message)
+                history.insert(1, context_message)
+        elif history and "USER CONTEXT" in history[0].get("content", ""):
+            # Replace context added as first message
+            history[0] = context_message
         else:
             # Add as first message
-            self.llm_client.conversation_history.insert(0, context_message)
+            history.insert(0, context_message)
 
-    def _add_vision_context_to_conversation(self, vision_context: str):
-        """Add vision context to conversation history."""
+    def _add_vision_context_to_conversation(self, context: ConversationContext, vision_context: str):
+        """Add vision context to a session's conversation history."""
         vision_message = {
             "role": "system",
             "content": f"[VISION CONTEXT]: {vision_context}"
@@ -614,14 +1249,14 @@ class UnifiedPipeline:
 
         # Find last system message that's not vision context
         last_system_idx = -1
-        for i, msg in enumerate(self.llm_client.conversation_history):
+        for i, msg in enumerate(context.messages):
             if msg["role"] == "system" and not msg["content"].startswith("[VISION CONTEXT]"):
                 last_system_idx = i
 
         if last_system_idx >= 0:
-            self.llm_client.conversation_history.insert(last_system_idx + 1, vision_message)
+            context.messages.insert(last_system_idx + 1, vision_message)
         else:
-            self.llm_client.conversation_history.insert(0, vision_message)
+            context.messages.insert(0, vision_message)
 
     async def _send_status_update(self, websocket: Any, request_id: str, stage: PipelineStage, data: Optional[Dict[str, Any]] = None):
         """Send status update to client."""
@@ -665,16 +1300,19 @@ class UnifiedPipeline:
         except Exception as e:
             logger.error(f"Failed to send partial LLM response: {e}")
 
-    async def _send_result(self, websocket: Any, result: PipelineResult):
+    async def _send_result(self, websocket: Any, result: PipelineResult, binary_frames: bool = False):
         """Send processing result to client in the expected message format."""
         try:
             if not result.success:
-                # Send error message
+                # Send error message, with the code of a "message|CODE" error
+                error, code = result.error_message or "Unknown error", "PROCESSING_FAILED"
+                if "|" in error:
+                    error, code = error.split("|", 1)
                 await websocket.send_json({
                     "type": "error",
                     "request_id": result.request_id,
-                    "error": result.error_message or "Unknown error",
-                    "code": "PROCESSING_FAILED",
+                    "error": error,
+                    "code": code,
                     "timestamp": datetime.now().isoformat(),
                     "version": "1.0"
                 })
@@ -705,57 +1343,90 @@ class UnifiedPipeline:
 
             if result.audio_data:
                 # Send TTS audio in the standardized format
-                import base64
-                await websocket.send_json({
-                    "type": "tts_start",
-                    "request_id": result.request_id,
-                    "timestamp": datetime.now().isoformat(),
-                    "version": "1.0"
-                })
-
-                # Send the audio chunk
-                encoded_audio = base64.b64encode(result.audio_data).decode("utf-8")
-                await websocket.send_json({
-                    "type": "tts_chunk",
-                    "request_id": result.request_id,
-                    "audio_chunk": encoded_audio,
-                    "format": self.tts_client.output_format,
-                    "timestamp": datetime.now().isoformat(),
-                    "version": "1.0"
-                })
-
-                # Send TTS end
-                await websocket.send_json({
-                    "type": "tts_end",
-                    "request_id": result.request_id,
-                    "timestamp": datetime.now().isoformat(),
-                    "version": "1.0"
-                })
+                await self._send_tts_start(websocket, result.request_id)
+                await self._send_tts_chunk(websocket, result.request_id, result.audio_data,
+                                           binary_frames=binary_frames)
+                await self._send_tts_end(websocket, result.request_id)
 
         except Exception as e:
             logger.error(f"Failed to send result: {e}")
 
-    def _estimate_wait_time(self) -> float:
-        """Estimate wait time for queued requests."""
-        queue_size = self._queue_size()
-        active_count = len(self.active_requests)
+    async def _send_tts_start(self, websocket: Any, request_id: str):
+        """Send TTS start marker."""
+        await websocket.send_json({
+            "type": "tts_start",
+            "request_id": request_id,
+            "timestamp": datetime.now().isoformat(),
+            "version": "1.0"
+        })
+
+    async def _send_tts_chunk(self, websocket: Any, request_id: str, audio_data: bytes, segment_index: int = 0,
+                              binary_frames: bool = False, chunk_index: int = 0,
+                              sequence: Optional[int] = None, audio_format: Optional[str] = None):
+        """
+        Send one audio chunk, as a binary frame if the client negotiated them.
+
+        Args:
+            websocket: WebSocket connection
+            request_id: Request ID
+            audio_data: Audio bytes (a whole segment, or part of one when streaming)
+            segment_index: Sentence segment the audio belongs to
+            binary_frames: Send a binary frame instead of base64 JSON
+            chunk_index: Position of the chunk within its segment
+            sequence: Position of the chunk within the request (binary frame
+                sequence; defaults to segment_index)
+            audio_format: Format of the audio (default: the TTS output format)
+        """
+        audio_format = audio_format or self.tts_client.output_format
+        if binary_frames:
+            await websocket.send_bytes(encode_frame(
+                FrameKind.TTS_AUDIO, codec_from_format(audio_format),
+                request_id, segment_index if sequence is None else sequence, audio_data
+            ))
+            return
+
+        encoded_audio = base64.b64encode(audio_data).decode("utf-8")
+        await websocket.send_json({
+            "type": "tts_chunk",
+            "request_id": request_id,
+            "audio_chunk": encoded_audio,
+            "format": audio_format,
+            "segment_index": segment_index,
+            "chunk_index": chunk_index,
+            "timestamp": datetime.now().isoformat(),
+            "version": "1.0"
+        })
+
+    async def _send_tts_end(self, websocket: Any, request_id: str):
+        """Send TTS end marker."""
+        await websocket.send_json({
+            "type": "tts_end",
+            "request_id": request_id,
+            "timestamp": datetime.now().isoformat(),
+            "version": "1.0"
+        })
 
-        if queue_size == 0:
-            return 0.0
+    def _estimate_wait_time(self, request: PipelineRequest) -> Tuple[int, float]:
+        """
+        Estimate a queued request's position and wait from the running aggregates.
 
-        # Calculate weighted average processing time based on queue contents
-        total_weighted_time = 0.0
-        total_weight = 0.0
+        Args:
+            request: Request that was just queued
 
-        for priority, counter, request in self.request_queue:
-            weight = 1.0 / (2 ** abs(priority))  # Higher priority = higher weight
-            total_weighted_time += request.estimated_duration * weight
-            total_weight += weight
+        Returns:
+            Tuple of (queue position, estimated seconds until it starts)
+        """
+        position = 0
+        work_ahead = -request.estimated_duration
+        for priority, (count, work) in self._queued_work.items():
+            if priority >= request.priority:
+                position += count
+                work_ahead += work
 
-        avg_processing_time = total_weighted_time / total_weight if total_weight > 0 else 5.0
+        # Remaining work of active requests: sum of (estimate - elapsed)
+        active_remaining = self._active_work - (len(self.active_requests) * time.time() - self._active_started)
 
-        # Estimate based on queue position and current active requests
-        return (queue_size + active_count) * avg_processing_time
+        return int(position), max(0.0, work_ahead + max(0.0, active_remaining)) / self._parallelism
 
     def _validate_resource_limits(self, data: Dict[str, Any]):
         """Validate resource limits for request data."""
@@ -774,23 +1445,21 @@ class UnifiedPipeline:
         if total_data_size > 50 * 1024 * 1024:  # 50MB total
             raise ValueError("Request payload too large")
 
-    def _estimate_processing_duration(self, request_type: RequestType, data: Dict[str, Any]) -> float:
-        """Estimate processing duration for request."""
-        base_times = {
-            RequestType.GREETING: 3.0,  # Quick LLM generation
-            RequestType.AUDIO: 8.0,     # STT + LLM + TTS
-            RequestType.SILENT_FOLLOWUP: 4.0  # LLM + TTS
-        }
+    def _estimate_processing_duration(self, request_type: RequestType, data: Dict[str, Any],
+                                      session_token: str) -> float:
+        """Estimate processing duration for request from learned stage latencies."""
+        audio_kb = len(data["audio_bytes"]) / 1024 if "audio_bytes" in data else 0.0
 
-        duration = base_times.get(request_type, 5.0)
+        context = self.context_store.get(session_token)
+        history_chars = context.size_bytes if context else 0
+        prompt_tokens = (len(self.system_prompt) + history_chars) / 4
 
-        # Adjust for audio size if present
-        if "audio_bytes" in data:
-            audio_size_mb = len(data["audio_bytes"]) / (1024 * 1024)
-            # Add time based on audio size (rough estimate)
-            duration += min(audio_size_mb * 0.5, 5.0)  # Max 5s extra for large audio
+        return self.latency_model.predict(request_type.value, audio_kb=audio_kb, prompt_tokens=prompt_tokens)
 
-        return duration
+    def _estimate_prompt_tokens(self, history: List[Dict[str, str]], user_input: str) -> float:
+        """Approximate prompt size in tokens (about four characters per token)."""
+        chars = len(self.system_prompt) + len(user_input) + sum(len(m.get("content", "")) for m in history)
+        return chars / 4
 
     def get_stats(self) -> Dict[str, Any]:
         """Get pipeline statistics."""
@@ -798,5 +1467,11 @@ class UnifiedPipeline:
             **self.stats,
             "queue_size": self._queue_size(),
             "active_requests": list(self.active_requests.keys()),
+            "max_queue_size": self.max_queue_size,
+            "max_concurrent": self.max_concurrent,
+            "stages": {name: stage.get_stats() for name, stage in self.stages.items()},
+            "sessions": self.context_store.get_stats(),
+            "latency_model": self.latency_model.get_stats(),
+            "tts_transcode": self.tts_transcoder.get_stats() if self.tts_transcoder is not None else None,
             "is_running": self.is_running
         }
@@ -0,0 +1,177 @@
+"""
+STT Quality Ladder Service
+
+Load-adaptive choice of Whisper model size and beam width.
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QualityRung:
+    """One quality level: a Whisper model and the beam width decoded with it."""
+    model_size: str
+    beam_size: int
+
+
+def parse_ladder(spec: str) -> List[QualityRung]:
+    """
+    Parse a ladder specification such as "small:2,base:1,tiny:1".
+
+    Rungs are listed from best to fastest; a rung without ":beam" uses beam 1.
+
+    Args:
+        spec: Comma-separated model[:beam] entries
+
+    Returns:
+        Rungs in the order given (empty for an empty spec)
+
+    Raises:
+        ValueError: If an entry has no model or an invalid beam size
+    """
+    rungs = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model_size, _, beam = entry.partition(":")
+        try:
+            beam_size = int(beam) if beam else 1
+        except ValueError:
+            beam_size = 0
+        if not model_size or beam_size < 1:
+            raise ValueError(f"Invalid STT quality ladder entry: {entry!r}")
+        rungs.append(QualityRung(model_size.strip(), beam_size))
+    return rungs
+
+
+class QualityLadder:
+    """
+    Steps STT between quality rungs as load rises and falls.
+
+    Load is the number of utterances waiting for or in STT, plus an
+    exponentially weighted average of STT latency (submission to transcript)
+    that halves every cooldown period without new transcriptions, so a burst
+    that has passed does not hold the ladder down once traffic goes quiet.
+    The ladder moves one rung down (faster) when either signal crosses its
+    step-down threshold and one rung up once both are below their lower
+    step-up thresholds. The gap between the thresholds and a minimum time
+    between changes keep it from flapping at a boundary.
+    """
+
+    def __init__(self, rungs: List[QualityRung], step_down_queue: int = 4, step_up_queue: int = 1,
+                 step_down_latency: float = 3.0, step_up_latency: float = 1.0,
+                 cooldown: float = 5.0, alpha: float = 0.3):
+        """
+        Initialize the ladder at its best rung.
+
+        Args:
+            rungs: Quality rungs from best to fastest
+            step_down_queue: Queue depth at which to step down
+            step_up_queue: Queue depth at or below which stepping up is allowed
+            step_down_latency: Average latency (seconds) at which to step down
+            step_up_latency: Average latency (seconds) at or below which stepping up is allowed
+            cooldown: Minimum seconds between rung changes
+            alpha: Weight of the newest latency observation
+        """
+        if not rungs:
+            raise ValueError("STT quality ladder needs at least one rung")
+        self.rungs = rungs
+        self.step_down_queue = step_down_queue
+        self.step_up_queue = step_up_queue
+        self.step_down_latency = step_down_latency
+        self.step_up_latency = step_up_latency
+        self.cooldown = cooldown
+        self.alpha = alpha
+
+        self.current = 0
+        self._latency: Optional[float] = None
+        self._recorded_at = 0.0
+        self.queue_depth = 0
+        self._changed_at = 0.0
+
+        self.stats = {
+            "steps_down": 0,
+            "steps_up": 0,
+            "served": [0] * len(rungs)
+        }
+
+    @property
+    def latency(self) -> float:
+        """Average STT latency, decayed by the time since the last observation."""
+        if self._latency is None:
+            return 0.0
+        idle = time.time() - self._recorded_at
+        if self.cooldown <= 0 or idle <= 0:
+            return self._latency
+        return self._latency * 0.5 ** (idle / self.cooldown)
+
+    @property
+    def rung(self) -> QualityRung:
+        """Rung currently in use."""
+        return self.rungs[self.current]
+
+    def select(self, queue_depth: int) -> int:
+        """
+        Pick the rung for a new utterance.
+
+        Args:
+            queue_depth: Utterances waiting for or in STT, including this one
+
+        Returns:
+            Index of the rung to use
+        """
+        self.queue_depth = queue_depth
+        now = time.time()
+        if len(self.rungs) > 1 and now - self._changed_at >= self.cooldown:
+            latency = self.latency
+            if self.current < len(self.rungs) - 1 and \
+                    (queue_depth >= self.step_down_queue or latency >= self.step_down_latency):
+                self._step(1, now, queue_depth, latency)
+            elif self.current > 0 and \
+                    queue_depth <= self.step_up_queue and latency <= self.step_up_latency:
+                self._step(-1, now, queue_depth, latency)
+        return self.current
+
+    def _step(self, direction: int, now: float, queue_depth: int, latency: float):
+        self.current += direction
+        self._changed_at = now
+        self.stats["steps_down" if direction > 0 else "steps_up"] += 1
+        logger.info(f"STT quality {'down' if direction > 0 else 'up'} to rung {self.current} "
+                    f"({self.rung.model_size}, beam {self.rung.beam_size}): "
+                    f"queue={queue_depth}, latency={latency:.2f}s")
+
+    def record(self, rung: int, latency: float):
+        """
+        Record a finished transcription.
+
+        Args:
+            rung: Rung that served it
+            latency: Seconds from submission to transcript
+        """
+        self.stats["served"][rung] += 1
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency = self.latency + self.alpha * (latency - self.latency)
+        self._recorded_at = time.time()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the current rung and step counts."""
+        return {
+            "rungs": [{"model_size": rung.model_size, "beam_size": rung.beam_size} for rung in self.rungs],
+            "current": self.current,
+            "queue_depth": self.queue_depth,
+            "avg_latency": round(self.latency, 3),
+            "step_down_queue": self.step_down_queue,
+            "step_up_queue": self.step_up_queue,
+            "step_down_latency": self.step_down_latency,
+            "step_up_latency": self.step_up_latency,
+            "cooldown": self.cooldown,
+            **self.stats
+        }
@@ -0,0 +1,178 @@
+"""
+Request Queue Service
+
+Awaitable priority queue used by the unified pipeline dispatcher.
+"""
+
+import asyncio
+import heapq
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriorityRequestQueue:
+    """
+    Awaitable priority queue for pipeline requests.
+
+    Items are kept in a binary heap ordered by (-priority, counter), so higher
+    priority requests are served first and requests with the same priority are
+    served in FIFO order. Waiting consumers are woken directly by put_nowait()
+    instead of polling, and size/fullness checks are O(1).
+    """
+
+    def __init__(self, maxsize: int = 0):
+        """
+        Initialize the queue.
+
+        Args:
+            maxsize: Maximum number of queued items (0 means unbounded)
+        """
+        self.maxsize = maxsize
+
+        # Heap entries: (-priority, counter, item)
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._counter = 0
+
+        # Consumers blocked in get(), woken in FIFO order
+        self._getters: Deque[asyncio.Future] = deque()
+
+        # task_done()/join() bookkeeping
+        self._unfinished_tasks = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self) -> int:
+        """Number of items currently queued."""
+        return len(self._heap)
+
+    def empty(self) -> bool:
+        """Return True if the queue is empty."""
+        return not self._heap
+
+    def full(self) -> bool:
+        """Return True if the queue has reached maxsize."""
+        if self.maxsize <= 0:
+            return False
+        return len(self._heap) >= self.maxsize
+
+    def put_nowait(self, item: Any, priority: int = 1) -> None:
+        """
+        Add an item to the queue without blocking.
+
+        Args:
+            item: Item to enqueue
+            priority: Item priority (higher = served first)
+
+        Raises:
+            asyncio.QueueFull: If the queue has reached maxsize
+        """
+        if self.full():
+            raise asyncio.QueueFull
+
+        heapq.heappush(self._heap, (-priority, self._counter, item))
+        self._counter += 1
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next()
+
+    def get_nowait(self) -> Any:
+        """
+        Remove and return the highest priority item without blocking.
+
+        Raises:
+            asyncio.QueueEmpty: If the queue is empty
+        """
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        return heapq.heappop(self._heap)[2]
+
+    async def get(self) -> Any:
+        """
+        Remove and return the highest priority item, waiting until one is available.
+
+        Returns:
+            The dequeued item
+        """
+        while not self._heap:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                # Pass the wakeup on if we were woken but are not going to consume
+                if self._heap and not getter.cancelled():
+                    self._wakeup_next()
+                raise
+        return self.get_nowait()
+
+    def task_done(self) -> None:
+        """
+        Mark a previously dequeued item as fully processed.
+
+        Raises:
+            ValueError: If called more times than there were items enqueued
+        """
+        if self._unfinished_tasks <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+
+    def remove(self, predicate: Callable[[Any], bool]) -> List[Any]:
+        """
+        Remove every queued item matching a predicate.
+
+        Removed items were never handed to a consumer, so they are also
+        dropped from the unfinished-task count used by join().
+
+        Args:
+            predicate: Function returning True for items to remove
+
+        Returns:
+            List of removed items in priority order
+        """
+        kept: List[Tuple[int, int, Any]] = []
+        removed: List[Tuple[int, int, Any]] = []
+        for entry in self._heap:
+            (removed if predicate(entry[2]) else kept).append(entry)
+        if not removed:
+            return []
+
+        heapq.heapify(kept)
+        self._heap = kept
+        removed.sort()
+
+        self._unfinished_tasks -= len(removed)
+        if self._unfinished_tasks <= 0:
+            self._unfinished_tasks = 0
+            self._finished.set()
+
+        return [entry[2] for entry in removed]
+
+    async def join(self) -> None:
+        """Wait until every enqueued item has been marked done."""
+        if self._unfinished_tasks > 0:
+            await self._finished.wait()
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over queued items in heap (not priority) order."""
+        return (entry[2] for entry in self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _wakeup_next(self) -> None:
+        """Wake the first consumer still waiting in get()."""
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
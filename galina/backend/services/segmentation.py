@@ -0,0 +1,157 @@
+"""
+Text Segmentation Service
+
+Splits assistant text into speakable segments for incremental TTS.
+"""
+
+import re
+import logging
+from typing import Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by
+# whitespace and the start of a new sentence, or a line break. Waiting for the
+# next sentence to start keeps "15.5" or "тыс. рублей" together; a digit does not
+# start a sentence, so "ст. 615" is not split either.
+SENTENCE_END = re.compile(r'[.!?…]+["»”)\]]*\s+(?=[A-ZА-ЯЁ"«(—–-])|\n+')
+
+# Clause boundary used when a sentence grows too long to wait for
+CLAUSE_END = re.compile(r'[,;:—–]\s+')
+
+# Abbreviations whose period does not end a sentence ("ст. Гражданского кодекса",
+# "г. Москва", "см. Приложение"); at most four letters, see _is_sentence_end()
+ABBREVIATIONS = frozenset({
+    "ст", "п", "пп", "ч", "г", "гг", "тыс", "млн", "млрд", "руб", "коп", "см", "т", "д", "др", "стр"
+})
+_WORD_BEFORE = re.compile(r'(?:^|\W)(\w{1,4})$')
+
+
+def _is_sentence_end(text: str, match: "re.Match") -> bool:
+    """Whether a SENTENCE_END match is a real boundary, not an abbreviation's period."""
+    if not match.group().startswith("."):
+        return True
+    word = _WORD_BEFORE.search(text[max(0, match.start() - 5):match.start()])
+    return word is None or word.group(1).lower() not in ABBREVIATIONS
+
+
+class SentenceSegmenter:
+    """
+    Incrementally splits streamed text into sentences or clauses.
+
+    Text is fed as it arrives from the LLM; complete segments are returned as
+    soon as their boundary is seen, so speech synthesis can start before the
+    full answer has been generated.
+    """
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 200):
+        """
+        Initialize the segmenter.
+
+        Args:
+            min_chars: Minimum segment length; shorter sentences are merged with the next
+            max_chars: Length after which a segment is cut at a clause or word boundary
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return any segments it completes.
+
+        Args:
+            text: Newly generated text
+
+        Returns:
+            List of complete segments (possibly empty)
+        """
+        self._buffer += text
+        segments = []
+
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            segment = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if segment:
+                segments.append(segment)
+
+        return segments
+
+    def flush(self) -> List[str]:
+        """
+        Return whatever text remains once the stream has ended.
+
+        Returns:
+            List containing the final segment, or empty if nothing is left
+        """
+        segment = self._buffer.strip()
+        self._buffer = ""
+        return [segment] if segment else []
+
+    def _find_cut(self):
+        """Find where the next segment ends in the buffer, or None if not yet known."""
+        for match in SENTENCE_END.finditer(self._buffer):
+            if match.end() >= self.min_chars and _is_sentence_end(self._buffer, match):
+                return match.end()
+
+        if len(self._buffer) < self.max_chars:
+            return None
+
+        # Sentence is too long: cut at the last clause boundary, else the last space
+        head = self._buffer[:self.max_chars]
+        clause_cuts = [m.end() for m in CLAUSE_END.finditer(head) if m.end() >= self.min_chars]
+        if clause_cuts:
+            return clause_cuts[-1]
+
+        space = head.rfind(" ")
+        return space + 1 if space >= self.min_chars else self.max_chars
+
+
+
+def split_text(text: str, max_chars: int = 300) -> List[str]:
+    """
+    Split a complete text into segments for parallel synthesis.
+
+    Sentences (paragraph breaks end a sentence too) are packed into
+    segments of at most max_chars; a longer sentence is cut at its last
+    clause boundary, else its last space, before the limit.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum segment length
+
+    Returns:
+        Segments in order (empty for blank text)
+    """
+    segments = []
+    current = ""
+    for sentence in _sentences(text, max_chars):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _sentences(text: str, max_chars: int) -> Iterator[str]:
+    """Sentences of a text, with those over max_chars cut into pieces."""
+    start = 0
+    ends = [m.end() for m in SENTENCE_END.finditer(text) if _is_sentence_end(text, m)]
+    for end in ends + [len(text)]:
+        sentence = text[start:end].strip()
+        start = end
+        while len(sentence) > max_chars:
+            head = sentence[:max_chars]
+            clause_cuts = [m.end() for m in CLAUSE_END.finditer(head)]
+            cut = clause_cuts[-1] if clause_cuts else (head.rfind(" ") + 1 or max_chars)
+            piece, sentence = sentence[:cut].strip(), sentence[cut:].strip()
+            if piece:
+                yield piece
+        if sentence:
+            yield sentence
@@ -0,0 +1,316 @@
+"""
+Session Context Service
+
+Keeps each conversation's message window separate, keyed by session token,
+with LRU/TTL eviction to a bounded memory budget.
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from .conversation_storage import ConversationStorage
+
+logger = logging.getLogger(__name__)
+
+
+def _spill_id(session_token: str) -> str:
+    """Storage ID of a spilled context: session tokens never end up in file names."""
+    return hashlib.sha256(session_token.encode("utf-8")).hexdigest()[:32]
+
+
+class ConversationContext:
+    """
+    Message window and per-session state for one conversation.
+    """
+
+    def __init__(self, session_token: str, messages: Optional[List[Dict[str, str]]] = None):
+        """
+        Initialize the context.
+
+        Args:
+            session_token: Session the context belongs to
+            messages: Initial messages (e.g. restored from storage)
+        """
+        self.session_token = session_token
+        self.messages: List[Dict[str, str]] = messages or []
+        self.vision_context: Optional[str] = None
+        # Speech language pinned after detection on the first utterances (see UnifiedPipeline)
+        self.stt_language: Optional[str] = None
+        self.stt_language_votes: Dict[str, float] = {}
+        self.stt_language_detections = 0
+        self.stt_language_recheck = False
+        self.last_access = time.time()
+        # In-flight requests using the context; a pinned context is never evicted
+        self.pins = 0
+        self.size_bytes = 0
+        self.refresh_size()
+
+    def refresh_size(self) -> int:
+        """
+        Recompute the approximate memory footprint of the messages.
+
+        Returns:
+            Size in bytes (UTF-8 length of message contents)
+        """
+        self.size_bytes = sum(len(m.get("content", "").encode("utf-8")) for m in self.messages)
+        return self.size_bytes
+
+    def replace(self, messages: List[Dict[str, str]]) -> None:
+        """
+        Replace the messages in place (callers may hold a reference to the list).
+
+        Args:
+            messages: New messages
+        """
+        self.messages[:] = messages
+        self.refresh_size()
+
+    def clear(self, keep_system_prompt: bool = True) -> None:
+        """
+        Clear the message window.
+
+        Args:
+            keep_system_prompt: Whether to keep a leading system message
+        """
+        if keep_system_prompt and self.messages and self.messages[0]["role"] == "system":
+            del self.messages[1:]
+        else:
+            self.messages.clear()
+        self.vision_context = None
+        self.refresh_size()
+
+
+class SessionContextStore:
+    """
+    Store of per-session conversation contexts.
+
+    Contexts are kept in LRU order. Idle contexts expire after ttl seconds, and
+    the least recently used ones are evicted once the session count or the
+    approximate byte budget is exceeded, except those pinned by a request
+    still using them. When a spill storage is configured, evicted contexts are
+    written to it (under a hash of the session token) and transparently
+    restored on next use.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 1800.0,
+        spill_storage: Optional[ConversationStorage] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            max_sessions: Maximum number of contexts kept in memory
+            max_bytes: Approximate memory budget for all message windows
+            ttl: Seconds of inactivity after which a context is evicted
+            spill_storage: Optional storage that evicted contexts are written to
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_storage = spill_storage
+
+        self._contexts: "OrderedDict[str, ConversationContext]" = OrderedDict()
+        self._total_bytes = 0
+
+        # Spilled session tokens -> task writing them to spill storage
+        self._spilled: Dict[str, Optional[asyncio.Task]] = {}
+
+        # Session tokens -> task creating/restoring their context
+        self._restoring: Dict[str, asyncio.Future] = {}
+
+        self.stats = {
+            "created": 0,
+            "evicted": 0,
+            "expired": 0,
+            "spilled": 0,
+            "restored": 0
+        }
+
+        logger.info(f"SessionContextStore initialized: max_sessions={max_sessions}, "
+                   f"max_bytes={max_bytes}, ttl={ttl}s, spill={'on' if spill_storage else 'off'}")
+
+    async def acquire(self, session_token: str, pin: bool = False) -> ConversationContext:
+        """
+        Get the context for a session, creating or restoring it if needed.
+
+        Args:
+            session_token: Session token
+            pin: Keep the context in memory until unpin() (for a request that
+                goes on using it across awaits)
+
+        Returns:
+            The session's conversation context
+        """
+        while True:
+            context = self._contexts.get(session_token)
+            if context is not None:
+                break
+            # Concurrent acquires of a session share one restore; re-check after it,
+            # since the context may have been evicted again while this caller waited
+            restoring = self._restoring.get(session_token)
+            if restoring is None:
+                restoring = asyncio.ensure_future(self._create(session_token))
+                self._restoring[session_token] = restoring
+            await asyncio.shield(restoring)
+
+        self._contexts.move_to_end(session_token)
+        previous_size = context.size_bytes
+        self._total_bytes += context.refresh_size() - previous_size
+
+        context.last_access = time.time()
+        if pin:
+            context.pins += 1
+        self._evict(keep=session_token)
+        return context
+
+    def unpin(self, context: ConversationContext) -> None:
+        """
+        Let a context pinned by acquire() be evicted again.
+
+        Args:
+            context: Context returned by acquire(pin=True)
+        """
+        context.pins = max(0, context.pins - 1)
+        if not context.pins and context.session_token in self._contexts:
+            self._evict(keep=None)
+
+    async def _create(self, session_token: str) -> None:
+        """Create a session's context, restoring its spilled messages if there are any."""
+        task = asyncio.current_task()
+        try:
+            messages = await self._restore(session_token)
+            # Skip if the session was released while its messages were loading
+            if self._restoring.get(session_token) is task and session_token not in self._contexts:
+                context = ConversationContext(session_token, messages)
+                self._contexts[session_token] = context
+                self._total_bytes += context.size_bytes
+                self.stats["created"] += 1
+        finally:
+            if self._restoring.get(session_token) is task:
+                del self._restoring[session_token]
+
+    def get(self, session_token: str) -> Optional[ConversationContext]:
+        """
+        Get a context that is already in memory, without creating, restoring or touching it.
+
+        Args:
+            session_token: Session token
+
+        Returns:
+            The context, or None if the session has none in memory
+        """
+        return self._contexts.get(session_token)
+
+    def release(self, session_token: str) -> None:
+        """
+        Drop a session's context without spilling it (its connection has closed).
+
+        Args:
+            session_token: Session token
+        """
+        context = self._contexts.pop(session_token, None)
+        if context is not None:
+            self._total_bytes -= context.size_bytes
+        self._restoring.pop(session_token, None)
+
+        if session_token in self._spilled:
+            task = self._spilled.pop(session_token)
+            asyncio.create_task(self._discard_spilled(session_token, task))
+
+    def _evict(self, keep: Optional[str]) -> None:
+        """
+        Evict expired contexts, then least recently used ones over budget.
+
+        Pinned contexts are skipped: evicting them would lose (or, with spill
+        storage, later overwrite) what their requests still add.
+
+        Args:
+            keep: Session token that must stay in memory (the one being acquired)
+        """
+        now = time.time()
+
+        # Contexts are in access order, so expired ones are at the front
+        expired = []
+        for token, context in self._contexts.items():
+            if now - context.last_access < self.ttl:
+                break
+            if token != keep and not context.pins:
+                expired.append(token)
+        for token in expired:
+            self._evict_one(token)
+            self.stats["expired"] += 1
+
+        if len(self._contexts) > self.max_sessions or self._total_bytes > self.max_bytes:
+            for token, context in list(self._contexts.items()):
+                if (len(self._contexts) <= self.max_sessions and self._total_bytes <= self.max_bytes) \
+                        or len(self._contexts) <= 1:
+                    break
+                if token != keep and not context.pins:
+                    self._evict_one(token)
+                    self.stats["evicted"] += 1
+
+    def _evict_one(self, session_token: str) -> None:
+        """Remove one context from memory, spilling it if storage is configured."""
+        context = self._contexts.pop(session_token)
+        self._total_bytes -= context.size_bytes
+
+        if self.spill_storage is not None and context.messages:
+            spill_id = _spill_id(session_token)
+            self._spilled[session_token] = asyncio.create_task(
+                self.spill_storage.save_session(
+                    messages=list(context.messages),
+                    title=f"Session context {spill_id}",
+                    session_id=spill_id
+                )
+            )
+            self.stats["spilled"] += 1
+
+    async def _discard_spilled(self, session_token: str, task: Optional[asyncio.Task]) -> None:
+        """Delete a spilled context once its write (if still pending) has finished."""
+        try:
+            if task is not None:
+                await task
+            await self.spill_storage.delete_session(_spill_id(session_token))
+        except Exception as e:
+            logger.error(f"Failed to discard spilled session context {_spill_id(session_token)}: {e}")
+
+    async def _restore(self, session_token: str) -> Optional[List[Dict[str, str]]]:
+        """Load a previously spilled context, if there is one."""
+        if session_token not in self._spilled:
+            return None
+
+        task = self._spilled.pop(session_token)
+        if task is not None:
+            try:
+                await task
+            except Exception as e:
+                logger.error(f"Spilling session context {_spill_id(session_token)} failed: {e}")
+                return None
+
+        session = await self.spill_storage.load_session(_spill_id(session_token))
+        if not session:
+            return None
+
+        await self.spill_storage.delete_session(_spill_id(session_token))
+        self.stats["restored"] += 1
+        return session.get("messages", [])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        return {
+            **self.stats,
+            "sessions": len(self._contexts),
+            "spilled_sessions": len(self._spilled),
+            "total_bytes": self._total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl
+        }
@@ -0,0 +1,207 @@
+"""
+Stage Worker Pool Service
+
+Bounded worker pools for the individual pipeline stages (STT, LLM, TTS).
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .request_queue import PriorityRequestQueue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageJob:
+    """Unit of work submitted to a stage pool."""
+    func: Callable[[], Awaitable[Any]]  # Coroutine factory run by a worker
+    future: asyncio.Future  # Resolved with the job's result
+    owner: Any = None  # Pipeline request the job belongs to
+    enqueued_at: float = 0.0
+    task: Optional[asyncio.Task] = None  # Set once a worker starts the job
+
+
+class StageWorkerPool:
+    """
+    Fixed set of workers pulling jobs for one pipeline stage.
+
+    Each stage has its own bounded priority queue and worker count, so a request
+    only occupies capacity in the stage it is currently in: a request waiting on
+    remote TTS no longer holds a slot that local transcription could use, and
+    CPU-bound STT overlaps with network-bound LLM and TTS across requests.
+
+    Callers await run(); cancelling the caller cancels the job whether it is
+    still queued or already running on a worker.
+    """
+
+    def __init__(self, name: str, max_workers: int = 2, max_queue_size: int = 32):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Stage name used in logs, errors and stats
+            max_workers: Jobs of this stage processed concurrently
+            max_queue_size: Jobs allowed to wait for a worker (0 means unbounded)
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self.queue = PriorityRequestQueue(maxsize=max_queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[int, StageJob] = {}
+
+        self.stats = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "total_wait_time": 0.0,
+            "total_run_time": 0.0
+        }
+
+        logger.info(f"StageWorkerPool '{name}' initialized: workers={max_workers}, max_queue={max_queue_size}")
+
+    async def start(self):
+        """Start the worker tasks."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-stage-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    async def stop(self):
+        """Stop the workers and cancel queued and running jobs."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        for job in self.queue.remove(lambda job: True):
+            job.future.cancel()
+
+    async def run(self, func: Callable[[], Awaitable[Any]], priority: int = 1, owner: Any = None) -> Any:
+        """
+        Run a job on this stage's workers and wait for its result.
+
+        Args:
+            func: Coroutine factory performing the stage's work
+            priority: Job priority (higher = served first)
+            owner: Pipeline request the job belongs to
+
+        Returns:
+            The job's result
+
+        Raises:
+            ValueError: If the stage queue is full
+        """
+        if self.queue.full():
+            self.stats["rejected"] += 1
+            raise ValueError(f"{self.name.upper()} stage queue is full|QUEUE_FULL")
+
+        job = StageJob(
+            func=func,
+            future=asyncio.get_running_loop().create_future(),
+            owner=owner,
+            enqueued_at=time.time()
+        )
+        self.queue.put_nowait(job, priority)
+        self.stats["submitted"] += 1
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Caller gave up: stop the job if a worker already started it
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+            raise
+
+    def cancel(self, predicate: Callable[[Any], bool]) -> Tuple[int, int]:
+        """
+        Cancel queued and running jobs whose owner matches a predicate.
+
+        Queued jobs are removed from the queue immediately, so their slots are
+        free for other requests before the cancelled callers have even resumed.
+
+        Args:
+            predicate: Function of the job owner returning True for jobs to cancel
+
+        Returns:
+            Tuple of (queued jobs removed, running jobs cancelled)
+        """
+        removed = self.queue.remove(lambda job: predicate(job.owner))
+        for job in removed:
+            job.future.cancel()
+        self.stats["cancelled"] += len(removed)
+
+        running = 0
+        for job in list(self._running.values()):
+            if predicate(job.owner) and not job.task.done():
+                job.task.cancel()
+                running += 1
+
+        return len(removed), running
+
+    async def _worker(self):
+        """Process jobs from the queue until cancelled."""
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.future.done():
+                    # Caller was cancelled while the job was queued
+                    self.stats["cancelled"] += 1
+                    continue
+
+                started_at = time.time()
+                self.stats["started"] += 1
+                self.stats["total_wait_time"] += started_at - job.enqueued_at
+
+                job.task = asyncio.ensure_future(job.func())
+                self._running[id(job)] = job
+                try:
+                    await asyncio.wait([job.task])
+                except asyncio.CancelledError:
+                    job.task.cancel()
+                    job.future.cancel()
+                    raise
+                finally:
+                    self._running.pop(id(job), None)
+                    self.stats["total_run_time"] += time.time() - started_at
+
+                self._resolve(job)
+            finally:
+                self.queue.task_done()
+
+    def _resolve(self, job: StageJob):
+        """Hand a finished job's outcome to the waiting caller."""
+        if job.task.cancelled():
+            self.stats["cancelled"] += 1
+            job.future.cancel()
+        elif job.task.exception() is not None:
+            self.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(job.task.exception())
+        else:
+            self.stats["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(job.task.result())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        started = self.stats["started"]
+        return {
+            **self.stats,
+            "queued": self.queue.qsize(),
+            "active": len(self._running),
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "avg_wait_time": self.stats["total_wait_time"] / started if started else 0.0,
+            "avg_run_time": self.stats["total_run_time"] / started if started else 0.0
+        }
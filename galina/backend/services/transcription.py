@@ -7,15 +7,142 @@ Uses Faster Whisper to transcribe speech audio.
 import numpy as np
 import logging
 import io  # For BytesIO
-from typing import Dict, Any, List, Optional, Tuple
-from faster_whisper import WhisperModel
+import os
+import queue
+import asyncio
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
 import time
 import torch  # For CUDA availability check
 
+from .audio_ingest import parse_wav, pcm_to_mono, pcm16_to_float16k, decode_compressed, can_resample
+from .framing import AudioCodec, detect_codec
+from .quality_ladder import QualityLadder, QualityRung
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@dataclass
+class ModelReplica:
+    """One loaded Whisper model in a WhisperModelPool."""
+    index: int
+    model: WhisperModel
+    cpu_threads: int
+    transcriptions: int = 0
+    busy_time: float = 0.0
+    checked_out_at: Optional[float] = None
+
+
+class WhisperModelPool:
+    """
+    Fixed set of Whisper model replicas, each used by one transcription at a time.
+    
+    The host's cores are split between the replicas (cpu_threads each), so
+    concurrent transcriptions run on their own share of threads instead of
+    all decoding on one model and oversubscribing its thread pool.
+    """
+    
+    def __init__(self, model_size: str, device: str, compute_type: str,
+                 replicas: int = 1, cpu_threads: int = 0):
+        """
+        Load the replicas.
+        
+        Args:
+            model_size: Whisper model size or path
+            device: Device to run the models on ('cpu' or 'cuda')
+            compute_type: Model computation type
+            replicas: Number of model replicas
+            cpu_threads: Threads per replica (0 splits the available cores evenly)
+        """
+        self.size = max(1, replicas)
+        self.cpu_threads = cpu_threads or max(1, available_cores() // self.size)
+        
+        self._idle: "queue.Queue[ModelReplica]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.replicas: List[ModelReplica] = []
+        for index in range(self.size):
+            model = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=self.cpu_threads
+            )
+            replica = ModelReplica(index=index, model=model, cpu_threads=self.cpu_threads)
+            self.replicas.append(replica)
+            self._idle.put(replica)
+        
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waits = 0  # Checkouts that found every replica busy
+        
+        logger.info(f"Loaded {self.size} Whisper replica(s) of {model_size} with {self.cpu_threads} CPU threads each")
+    
+    def checkout(self) -> ModelReplica:
+        """Take an idle replica, blocking until one is free."""
+        try:
+            replica = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.waits += 1
+            replica = self._idle.get()
+        
+        with self._lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+        replica.checked_out_at = time.time()
+        return replica
+    
+    def checkin(self, replica: ModelReplica):
+        """Return a replica taken with checkout()."""
+        replica.transcriptions += 1
+        replica.busy_time += time.time() - replica.checked_out_at
+        replica.checked_out_at = None
+        with self._lock:
+            self.in_use -= 1
+        self._idle.put(replica)
+    
+    @contextmanager
+    def model(self) -> Iterator[WhisperModel]:
+        """Check out a replica's model for the duration of a with block."""
+        replica = self.checkout()
+        try:
+            yield replica.model
+        finally:
+            self.checkin(replica)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool and per-replica statistics."""
+        return {
+            "replicas": self.size,
+            "cpu_threads_per_replica": self.cpu_threads,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "waits": self.waits,
+            "per_replica": [
+                {
+                    "index": replica.index,
+                    "transcriptions": replica.transcriptions,
+                    "busy_time": round(replica.busy_time, 3),
+                    "busy": replica.checked_out_at is not None
+                }
+                for replica in self.replicas
+            ]
+        }
+
+
 class WhisperTranscriber:
     """
     Speech-to-Text service using Faster Whisper.
@@ -29,7 +156,15 @@ class WhisperTranscriber:
         device: str = None,
         compute_type: str = None,
         beam_size: int = 2,
-        sample_rate: int = 44100
+        sample_rate: int = 44100,
+        executor_type: str = "thread",
+        max_workers: int = 2,
+        max_queue_size: int = 16,
+        batch_size: int = 1,
+        batch_max_wait_ms: float = 10.0,
+        model_replicas: int = 0,
+        cpu_threads: int = 0,
+        quality_ladder: Optional[QualityLadder] = None
     ):
         """
         Initialize the transcription service.
@@ -40,6 +175,15 @@ class WhisperTranscriber:
             compute_type: Model computation type (int8, int16, float16, float32), if None will select based on device
             beam_size: Beam size for decoding
             sample_rate: Audio sample rate in Hz
+            executor_type: Worker pool used by atranscribe ('thread' or 'process')
+            max_workers: Number of transcriptions that may run concurrently
+            max_queue_size: Number of transcriptions that may wait for a worker
+            batch_size: Most utterances decoded together by atranscribe (1 disables batching)
+            batch_max_wait_ms: Longest time an utterance waits for others to join its batch
+            model_replicas: Model replicas in this process (0 means one per thread worker)
+            cpu_threads: Threads per replica (0 splits the available cores evenly)
+            quality_ladder: Model/beam rungs to step between under load (default:
+                model_size with beam_size only); every rung's model is preloaded
         """
         self.model_size = model_size
         
@@ -55,76 +199,313 @@ class WhisperTranscriber:
         else:
             self.compute_type = compute_type
             
-        self.beam_size = beam_size
         self.sample_rate = sample_rate
+        self.ladder = quality_ladder or QualityLadder([QualityRung(model_size, beam_size)])
+        # The ladder's best rung is the model and beam width served without load
+        self.model_size = self.ladder.rungs[0].model_size
+        self.beam_size = self.ladder.rungs[0].beam_size
+        
+        # Dedicated STT worker pool (created lazily on first atranscribe)
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unsupported STT executor type: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.pending_transcriptions = 0
+        self._executor: Optional[Executor] = None
+        
+        # Micro-batching of concurrent utterances (see _dispatch_batches)
+        self.batch_size = max(1, batch_size)
+        self.batch_max_wait = batch_max_wait_ms / 1000
+        self._batch: List[Tuple[Union[bytes, np.ndarray], Optional[str], asyncio.Future]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: set = set()
+        self.batch_stats = {"batches": 0, "batched_utterances": 0}
+        
+        # Language detection runs only for utterances of sessions without a pinned language
+        self.language_stats = {"detections": 0, "detection_time": 0.0, "pinned_utterances": 0}
+        
+        # Model replicas: one per thread worker; process workers load their own
+        if model_replicas <= 0:
+            model_replicas = max_workers if executor_type == "thread" else 1
+        self.model_replicas = model_replicas
+        self.cpu_threads = cpu_threads
         
         # Initialize model
         self._initialize_model()
         
-        # State tracking
-        self.is_processing = False
-        
-        logger.info(f"Initialized Whisper Transcriber with model={model_size}, "
+        logger.info(f"Initialized Whisper Transcriber with model={self.model_size}, "
                    f"device={self.device}, compute_type={self.compute_type}")
     
     def _initialize_model(self):
-        """Initialize Whisper model."""
+        """Initialize the Whisper model replicas of every quality rung."""
+        # Rungs sharing a model (differing only in beam width) share its replicas
+        self.pools: Dict[str, WhisperModelPool] = {}
+        self.pool: Optional[WhisperModelPool] = None
+        if self.executor_type == "process":
+            # Every decode runs in a worker process, which loads its own replicas
+            logger.info("STT worker processes load the Whisper models; none loaded in the main process")
+            return
         try:
-            # Load the model
-            self.model = WhisperModel(
-                self.model_size,  # Pass as positional argument, not keyword
-                device=self.device,
-                compute_type=self.compute_type
-            )
-            logger.info(f"Successfully loaded Whisper model: {self.model_size}")
+            for rung in self.ladder.rungs:
+                if rung.model_size not in self.pools:
+                    self.pools[rung.model_size] = WhisperModelPool(
+                        rung.model_size,
+                        self.device,
+                        self.compute_type,
+                        replicas=self.model_replicas,
+                        cpu_threads=self.cpu_threads
+                    )
+                    logger.info(f"Successfully loaded Whisper model: {rung.model_size}")
+            self.pool = self.pools[self.ladder.rungs[0].model_size]
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
             raise
     
-    def transcribe(self, audio: np.ndarray) -> Tuple[str, Dict[str, Any]]:
+    def _rung(self, rung: int) -> Tuple[WhisperModelPool, QualityRung]:
+        """Model pool and settings of a quality rung."""
+        settings = self.ladder.rungs[rung]
+        return self.pools[settings.model_size], settings
+    
+    def _get_executor(self) -> Executor:
+        """Create the dedicated STT executor on first use."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                # Each worker process loads its own model replica on its share of the cores
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker_process,
+                    initargs=(self.ladder.rungs, self.device, self.compute_type, self.sample_rate,
+                              self.cpu_threads or max(1, available_cores() // self.max_workers))
+                )
+            else:
+                # CTranslate2 releases the GIL while decoding, so threads run in parallel
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="stt-worker"
+                )
+            logger.info(f"Started STT {self.executor_type} pool with {self.max_workers} workers")
+        return self._executor
+    
+    async def atranscribe(self, audio: Union[bytes, np.ndarray], backlog: int = 0,
+                          submitted_at: Optional[float] = None,
+                          language: Optional[str] = "en") -> Tuple[str, Dict[str, Any]]:
+        """
+        Transcribe audio data without blocking the event loop.
+        
+        The decode runs in the dedicated STT executor, so at most max_workers
+        transcriptions (batches) run at once and at most max_queue_size wait for a worker.
+        With batch_size > 1, utterances arriving together are decoded as one batch.
+        The quality ladder picks the model and beam width from the current load.
+        
+        Args:
+            audio: Audio data as raw bytes or numpy array
+            backlog: Utterances queued for STT outside the transcriber (e.g. in
+                the pipeline's STT stage), counted towards the ladder's queue depth
+            submitted_at: When the utterance entered the first STT queue
+                (default: now), the start of the latency the ladder observes
+            language: Language to decode in (None detects it, see transcribe())
+            
+        Returns:
+            Tuple[str, Dict[str, Any]]: Same as transcribe()
+            
+        Raises:
+            ValueError: If the STT queue is full, or the upload cannot be decoded
+        """
+        if self.pending_transcriptions >= self.max_workers * self.batch_size + self.max_queue_size:
+            raise ValueError("STT queue is full|QUEUE_FULL")
+        
+        self.pending_transcriptions += 1
+        started_at = time.time()
+        rung = self.ladder.select(self.pending_transcriptions + backlog)
+        
+        try:
+            # Utterances that need language detection are decoded on their own
+            if self.batch_size > 1 and language is not None:
+                text, metadata = await self._transcribe_batched(audio, language)
+            else:
+                loop = asyncio.get_running_loop()
+                worker_fn = _transcribe_in_worker if self.executor_type == "process" else self.transcribe
+                text, metadata = await loop.run_in_executor(self._get_executor(), worker_fn, audio, rung, language)
+            if metadata.get("rejected"):
+                raise ValueError(metadata["error"])
+            self._record_language(metadata)
+            
+            # Time spent waiting for a free worker
+            finished_at = time.time()
+            total_time = finished_at - started_at
+            metadata["queue_time"] = max(0.0, total_time - metadata.get("processing_time", total_time))
+            self.ladder.record(metadata.get("quality_rung", rung), finished_at - (submitted_at or started_at))
+            return text, metadata
+        finally:
+            self.pending_transcriptions -= 1
+    
+    def _record_language(self, metadata: Dict[str, Any]):
+        """Count detected and pinned-language utterances."""
+        if metadata.get("language_detected"):
+            self.language_stats["detections"] += 1
+            self.language_stats["detection_time"] += metadata.get("detection_time", 0.0)
+        elif metadata.get("language_pinned"):
+            self.language_stats["pinned_utterances"] += 1
+    
+    async def _transcribe_batched(self, audio: Union[bytes, np.ndarray], language: str) -> Tuple[str, Dict[str, Any]]:
+        """Add an utterance to the next batch of its language and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((audio, language, future))
+        self._dispatch_batches()
+        return await future
+    
+    def _dispatch_batches(self, flush: bool = False):
+        """
+        Start batches on free workers.
+        
+        A batch starts as soon as it is full, or batch_max_wait after its first
+        utterance arrived. While every worker is busy utterances keep
+        accumulating and go out together when one frees up, so batches grow
+        with load instead of queueing one-at-a-time decodes. A batch holds
+        utterances of one language, that of the oldest waiting utterance.
+        
+        Args:
+            flush: Start a batch even if it is not full
+        """
+        while self._batch and len(self._batch_tasks) < self.max_workers:
+            language = self._batch[0][1]
+            items = [item for item in self._batch if item[1] == language][:self.batch_size]
+            if not flush and len(items) < self.batch_size:
+                break
+            taken = {id(item) for item in items}
+            self._batch = [item for item in self._batch if id(item) not in taken]
+            items = [item for item in items if not item[2].done()]  # Skip cancelled callers
+            if items:
+                # A batch is decoded on the ladder's rung at the time it starts
+                task = asyncio.ensure_future(self._run_batch(items, self.ladder.current, language))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+        
+        if not self._batch:
+            if self._batch_timer is not None:
+                self._batch_timer.cancel()
+                self._batch_timer = None
+        elif self._batch_timer is None and len(self._batch_tasks) < self.max_workers:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_max_wait, self._on_batch_timer)
+    
+    def _on_batch_timer(self):
+        self._batch_timer = None
+        self._dispatch_batches(flush=True)
+    
+    async def _run_batch(self, items: List[Tuple[Union[bytes, np.ndarray], Optional[str], asyncio.Future]],
+                         rung: int = 0, language: str = "en"):
+        """Decode one batch in the STT executor and resolve its callers."""
+        try:
+            loop = asyncio.get_running_loop()
+            worker_fn = _transcribe_batch_in_worker if self.executor_type == "process" else self.transcribe_batch
+            results = await loop.run_in_executor(self._get_executor(), worker_fn,
+                                                 [audio for audio, _, _ in items], rung, language)
+            self.batch_stats["batches"] += 1
+            self.batch_stats["batched_utterances"] += len(items)
+            for (_, _, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Utterances that arrived while the workers were busy have waited long enough
+            self._batch_tasks.discard(asyncio.current_task())
+            self._dispatch_batches(flush=True)
+    
+    def close(self):
+        """Shut down the STT worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def _prepare_audio(self, audio: Union[bytes, np.ndarray]) -> Union[io.BytesIO, np.ndarray]:
+        """Turn an upload (WAV or compressed) into 16 kHz float32 samples, or a file-like object Whisper decodes itself."""
+        # The pipeline passes the decoded upload as raw bytes
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            audio = np.frombuffer(audio, dtype=np.uint8)
+        
+        # Handle WAV data (if audio is in uint8 format, it contains WAV headers)
+        if audio.dtype == np.uint8:
+            # First check the RIFF header to confirm this is WAV data
+            header = bytes(audio[:12])
+            if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+                # 16-bit PCM is viewed in place and resampled here, without a PyAV decoder per call
+                wav = parse_wav(audio)
+                if wav is not None and can_resample(wav[1]):
+                    samples, sample_rate = wav
+                    return pcm16_to_float16k(pcm_to_mono(samples), sample_rate)
+                # Other WAV encodings (float, 24-bit, ...) and unusual sample rates are decoded by Whisper itself
+                return io.BytesIO(audio.tobytes())
+            # Compressed uploads (Opus in WebM/OGG from browsers, FLAC, MP3, AAC)
+            codec = detect_codec(audio)
+            if codec != AudioCodec.UNKNOWN:
+                return decode_compressed(audio, codec)
+            # Not a proper WAV header
+            logger.warning("Received audio data with incorrect WAV header")
+        
+        # Attempt to process as raw data, normalized to [-1, 1]
+        return audio.astype(np.float32) / np.max(np.abs(audio)) if np.max(np.abs(audio)) > 0 else audio
+    
+    def transcribe(self, audio: Union[bytes, np.ndarray], rung: int = 0,
+                   language: Optional[str] = "en") -> Tuple[str, Dict[str, Any]]:
         """
         Transcribe audio data to text.
         
+        With language None and a multilingual model, the language is detected
+        first (one extra encoder pass over up to 30 s of audio) and reported
+        with its probability and the time the detection took. English-only
+        models always decode English.
+        
         Args:
-            audio: Audio data as numpy array
+            audio: Audio data as numpy array (raw bytes are viewed as uint8)
+            rung: Quality ladder rung (model and beam width) to decode with
+            language: Language code to decode in, or None to detect it
             
         Returns:
             Tuple[str, Dict[str, Any]]: 
                 - Transcribed text
-                - Dictionary with additional information (confidence, language, etc.)
+                - Dictionary with additional information (confidence, language, etc.);
+                  an upload that cannot be decoded gets "rejected" and its coded "error"
         """
         start_time = time.time()
-        self.is_processing = True
         
         try:
-            # Handle WAV data (if audio is in uint8 format, it contains WAV headers)
-            if audio.dtype == np.uint8:
-                # First check the RIFF header to confirm this is WAV data
-                header = bytes(audio[:44])
-                if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
-                    # Create a file-like object that Whisper can read from
-                    audio_file = io.BytesIO(bytes(audio))
-                    # The transcribe method expects a file-like object with read method
-                    audio = audio_file
-                else:
-                    # Not a proper WAV header
-                    logger.warning("Received audio data with incorrect WAV header")
-                    # Attempt to process as raw data
-                    audio = audio.astype(np.float32) / np.max(np.abs(audio)) if np.max(np.abs(audio)) > 0 else audio
-            else:
-                # Normalize audio if it's raw float data
-                audio = audio.astype(np.float32) / np.max(np.abs(audio)) if np.max(np.abs(audio)) > 0 else audio
-            
-            # Transcribe
-            segments, info = self.model.transcribe(
-                audio, 
-                beam_size=self.beam_size,
-                language="en",  # Force English language
-                vad_filter=False  # Disable VAD filter since we handle it in the frontend
-            )
+            audio = self._prepare_audio(audio)
+        except ValueError as e:
+            logger.warning(f"Rejected audio upload: {e}")
+            return "", {"error": str(e), "rejected": True}
+        
+        try:
+            pool, settings = self._rung(rung)
             
-            # Collect all segment texts
-            text_segments = [segment.text for segment in segments]
+            with pool.model() as model:
+                multilingual = model.model.is_multilingual
+                detection = None
+                if language is None and multilingual:
+                    if isinstance(audio, io.BytesIO):
+                        audio = decode_audio(audio, sampling_rate=16000)
+                    detection_start = time.time()
+                    language, probability, _ = model.detect_language(audio)
+                    detection = (probability, time.time() - detection_start)
+                elif not multilingual:
+                    language = "en"
+                
+                # Transcribe
+                segments, info = model.transcribe(
+                    audio, 
+                    beam_size=settings.beam_size,
+                    language=language,
+                    vad_filter=False  # Disable VAD filter since we handle it in the frontend
+                )
+                
+                # Collect all segment texts (segments decode lazily)
+                text_segments, logprobs = [], []
+                for segment in segments:
+                    text_segments.append(segment.text)
+                    logprobs.append(segment.avg_logprob)
             full_text = " ".join(text_segments).strip()
             
             # Calculate processing time
@@ -132,53 +513,196 @@ class WhisperTranscriber:
             logger.info(f"Transcription completed in {processing_time:.2f}s: {full_text[:50]}...")
             
             metadata = {
-                "confidence": getattr(info, "avg_logprob", 0),
-                "language": getattr(info, "language", "en"),
+                "confidence": float(np.mean(logprobs)) if logprobs else 0,
+                "language": language,
                 "processing_time": processing_time,
-                "segments_count": len(text_segments)
+                "segments_count": len(text_segments),
+                "quality_rung": rung,
+                "model": settings.model_size,
+                "beam_size": settings.beam_size
             }
+            if detection is not None:
+                metadata.update(language_detected=True, language_probability=detection[0],
+                                detection_time=detection[1])
+            elif multilingual:
+                metadata["language_pinned"] = True
             
             return full_text, metadata
             
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return "", {"error": str(e)}
-        finally:
-            self.is_processing = False
     
-    def transcribe_streaming(self, audio_generator):
+    def transcribe_batch(self, audios: List[Union[bytes, np.ndarray]], rung: int = 0,
+                         language: str = "en") -> List[Tuple[str, Dict[str, Any]]]:
         """
-        Stream transcription results from an audio generator.
+        Transcribe several utterances in one batched decode.
+        
+        The utterances are laid end to end and passed to faster-whisper's
+        batched pipeline as clips (at most 30 s each), so their encoder and
+        decoder passes run as one batch.
         
         Args:
-            audio_generator: Generator yielding audio chunks
+            audios: Audio data per utterance, as accepted by transcribe()
+            rung: Quality ladder rung (model and beam width) to decode with
+            language: Language code of every utterance in the batch
             
-        Yields:
-            Partial transcription results as they become available
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: transcribe() result per utterance, in order
         """
-        self.is_processing = True
+        start_time = time.time()
         
         try:
-            # Process the streaming transcription
-            segments = self.model.transcribe_with_vad(
-                audio_generator,
-                language="en"
-            )
+            pool, settings = self._rung(rung)
+            arrays, rejected = [], {}
+            for index, audio in enumerate(audios):
+                try:
+                    audio = self._prepare_audio(audio)
+                except ValueError as e:
+                    # Only this utterance fails; it is left out of the decode
+                    logger.warning(f"Rejected audio upload: {e}")
+                    rejected[index] = ("", {"error": str(e), "rejected": True})
+                    audio = np.zeros(0, dtype=np.float32)
+                if isinstance(audio, io.BytesIO):
+                    audio = decode_audio(audio, sampling_rate=16000)
+                arrays.append(audio.astype(np.float32, copy=False))
             
-            # Yield each segment as it's transcribed
-            for segment in segments:
-                yield {
-                    "text": segment.text,
-                    "start": segment.start,
-                    "end": segment.end,
-                    "confidence": segment.avg_logprob
-                }
-                
+            clip_samples = 30 * 16000
+            clips, owners, offset = [], {}, 0
+            for index, samples in enumerate(arrays):
+                for clip_start in range(0, len(samples), clip_samples):
+                    clip = {"start": offset + clip_start, "end": offset + min(len(samples), clip_start + clip_samples)}
+                    clips.append(clip)
+                    # Segments report their clip's start as seek (10 ms feature frames)
+                    owners[int(clip["start"] / 16000 * 100)] = index
+                offset += len(samples)
+            
+            texts: List[List[str]] = [[] for _ in arrays]
+            logprobs: List[List[float]] = [[] for _ in arrays]
+            multilingual = False
+            if clips:
+                with pool.model() as model:
+                    multilingual = model.model.is_multilingual
+                    if not multilingual:
+                        language = "en"
+                    segments, _ = BatchedInferencePipeline(model).transcribe(
+                        np.concatenate(arrays),
+                        beam_size=settings.beam_size,
+                        language=language,
+                        vad_filter=False,
+                        clip_timestamps=clips,
+                        batch_size=len(clips)
+                    )
+                    for segment in segments:
+                        index = owners[segment.seek]
+                        texts[index].append(segment.text)
+                        logprobs[index].append(segment.avg_logprob)
+            
+            processing_time = time.time() - start_time
+            logger.info(f"Batch of {len(audios)} transcriptions completed in {processing_time:.2f}s")
+            
+            return [
+                rejected.get(index) or (" ".join(text).strip(), {
+                    "confidence": float(np.mean(logprob)) if logprob else 0,
+                    "language": language,
+                    "language_pinned": multilingual,
+                    "processing_time": processing_time,
+                    "segments_count": len(text),
+                    "batch_size": len(audios),
+                    "quality_rung": rung,
+                    "model": settings.model_size,
+                    "beam_size": settings.beam_size
+                })
+                for index, (text, logprob) in enumerate(zip(texts, logprobs))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Batch transcription error: {e}")
+            return [("", {"error": str(e)}) for _ in audios]
+    
+    def transcribe_words(self, audio: np.ndarray, prompt: Optional[str] = None, rung: int = 0,
+                         language: Optional[str] = "en") -> Tuple[List[Tuple[str, float, float]], Dict[str, Any]]:
+        """
+        Transcribe a window of streamed audio into timestamped words.
+        
+        Used for partial hypotheses: greedy decoding, no conditioning on
+        earlier windows except through the prompt.
+        
+        Args:
+            audio: 16 kHz mono float32 samples in [-1, 1]
+            prompt: Text already committed before this window
+            rung: Quality ladder rung whose model decodes the window
+            language: Language code, or None to let Whisper detect it
+            
+        Returns:
+            Tuple[List[Tuple[str, float, float]], Dict[str, Any]]:
+                - (word, start, end) with times in seconds from the window start
+                - Dictionary with processing_time and real_time_factor
+        """
+        start_time = time.time()
+        try:
+            pool, _ = self._rung(rung)
+            with pool.model() as model:
+                segments, info = model.transcribe(
+                    audio,
+                    beam_size=1,
+                    language=language if model.model.is_multilingual else "en",
+                    vad_filter=False,
+                    word_timestamps=True,
+                    condition_on_previous_text=False,
+                    initial_prompt=prompt or None
+                )
+                words = [
+                    (word.word, word.start, word.end)
+                    for segment in segments
+                    for word in (segment.words or [])
+                ]
         except Exception as e:
-            logger.error(f"Streaming transcription error: {e}")
-            yield {"error": str(e)}
+            logger.error(f"Partial transcription error: {e}")
+            return [], {"error": str(e)}
+        
+        processing_time = time.time() - start_time
+        audio_seconds = len(audio) / 16000
+        return words, {
+            "processing_time": processing_time,
+            "audio_seconds": audio_seconds,
+            "real_time_factor": processing_time / audio_seconds if audio_seconds else 0.0
+        }
+    
+    async def atranscribe_partial(self, audio: np.ndarray, prompt: Optional[str] = None,
+                                  language: Optional[str] = "en") -> Optional[Tuple[List[Tuple[str, float, float]], Dict[str, Any]]]:
+        """
+        Transcribe a streaming window without blocking the event loop.
+        
+        Partials are best effort: when every STT worker is busy the window is
+        skipped instead of queued, so partials never delay final transcriptions.
+        
+        Args:
+            audio: 16 kHz mono float32 samples in [-1, 1]
+            prompt: Text already committed before this window
+            language: Language code, or None to let Whisper detect it
+            
+        Returns:
+            Same as transcribe_words(), or None if the workers are busy
+        """
+        if self.pending_transcriptions >= self.max_workers:
+            return None
+        
+        self.pending_transcriptions += 1
+        try:
+            loop = asyncio.get_running_loop()
+            worker_fn = _transcribe_words_in_worker if self.executor_type == "process" else self.transcribe_words
+            return await loop.run_in_executor(self._get_executor(), worker_fn, audio, prompt,
+                                              self.ladder.current, language)
         finally:
-            self.is_processing = False
+            self.pending_transcriptions -= 1
+    
+    @property
+    def is_processing(self) -> bool:
+        """Whether any model replica is decoding."""
+        if self.executor_type == "process":
+            return self.pending_transcriptions > 0
+        return any(pool.in_use > 0 for pool in self.pools.values())
     
     def get_config(self) -> Dict[str, Any]:
         """
@@ -193,5 +717,155 @@ class WhisperTranscriber:
             "compute_type": self.compute_type,
             "beam_size": self.beam_size,
             "sample_rate": self.sample_rate,
-            "is_processing": self.is_processing
+            "executor_type": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "batch_max_wait_ms": self.batch_max_wait * 1000,
+            "avg_batch_size": self.batch_stats["batched_utterances"] / self.batch_stats["batches"] if self.batch_stats["batches"] else 0.0,
+            "pending_transcriptions": self.pending_transcriptions,
+            "is_processing": self.is_processing,
+            "model_pool": self.pool.get_stats() if self.pool is not None else None,
+            "model_pools": {model_size: pool.get_stats() for model_size, pool in self.pools.items()},
+            "quality_ladder": self.ladder.get_stats(),
+            "language_detection": self._language_detection_stats()
+        }
+    
+    def _language_detection_stats(self) -> Dict[str, Any]:
+        """Detections run, and the detection time pinned languages saved."""
+        detections = self.language_stats["detections"]
+        avg_detection_time = self.language_stats["detection_time"] / detections if detections else 0.0
+        return {
+            **self.language_stats,
+            "avg_detection_time": avg_detection_time,
+            # Each utterance decoded in its session's pinned language skipped one detection
+            "detection_time_saved": self.language_stats["pinned_utterances"] * avg_detection_time
+        }
+
+
+# Transcriber owned by a worker process when executor_type="process"
+_worker_transcriber: Optional[WhisperTranscriber] = None
+
+
+def _init_worker_process(rungs: List[QualityRung], device: str, compute_type: str,
+                         sample_rate: int, cpu_threads: int):
+    """Load a model replica of every quality rung inside an STT worker process."""
+    global _worker_transcriber
+    _worker_transcriber = WhisperTranscriber(
+        model_size=rungs[0].model_size,
+        device=device,
+        compute_type=compute_type,
+        beam_size=rungs[0].beam_size,
+        sample_rate=sample_rate,
+        model_replicas=1,
+        cpu_threads=cpu_threads,
+        quality_ladder=QualityLadder(rungs)
+    )
+
+
+def _transcribe_in_worker(audio: Union[bytes, np.ndarray], rung: int,
+                          language: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """Run a transcription on the worker process's model replica."""
+    return _worker_transcriber.transcribe(audio, rung, language)
+
+
+def _transcribe_batch_in_worker(audios: List[Union[bytes, np.ndarray]], rung: int,
+                                language: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Run a batched transcription on the worker process's model replica."""
+    return _worker_transcriber.transcribe_batch(audios, rung, language)
+
+
+def _transcribe_words_in_worker(audio: np.ndarray, prompt: Optional[str], rung: int,
+                                language: Optional[str]) -> Tuple[List[Tuple[str, float, float]], Dict[str, Any]]:
+    """Run a partial transcription on the worker process's model replica."""
+    return _worker_transcriber.transcribe_words(audio, prompt, rung, language)
+
+
+class StreamingTranscription:
+    """
+    Incremental transcription of one utterance while it is being spoken.
+    
+    Every update re-decodes the audio after the committed prefix (capped to a
+    sliding window) and commits the words on which the last two hypotheses
+    agree (LocalAgreement-2). Committed words are never revised; the audio
+    they cover is dropped from later windows and their text is passed as the
+    decoder prompt. The remaining words are reported as tentative.
+    """
+    
+    SAMPLE_RATE = 16000
+    
+    def __init__(self, transcriber: WhisperTranscriber, window_seconds: float = 15.0):
+        """
+        Initialize the streaming state.
+        
+        Args:
+            transcriber: Transcriber used for the window decodes
+            window_seconds: Longest window decoded per update
+        """
+        self.transcriber = transcriber
+        self.window_samples = int(window_seconds * self.SAMPLE_RATE)
+        self.language: Optional[str] = None  # Session's pinned language (None: detect)
+        self.reset()
+    
+    def reset(self):
+        """Forget the current utterance."""
+        self.committed: List[str] = []
+        self._commit_offset = 0  # Samples of the utterance covered by committed words
+        self._previous: List[Tuple[str, float, float]] = []  # Uncommitted words of the last hypothesis
+        self.updates = 0
+        self.total_processing_time = 0.0
+        self.total_audio_seconds = 0.0
+    
+    @staticmethod
+    def _normalize(word: str) -> str:
+        return "".join(ch for ch in word.lower() if ch.isalnum())
+    
+    async def update(self, audio: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Decode the utterance so far and advance the committed prefix.
+        
+        Args:
+            audio: Whole utterance so far as 16 kHz mono float32 samples
+            
+        Returns:
+            Dict with committed and tentative text, or None if the decode was
+            skipped because the STT workers are busy
+        """
+        start = max(self._commit_offset, len(audio) - self.window_samples)
+        prompt = "".join(self.committed)[-200:]
+        result = await self.transcriber.atranscribe_partial(audio[start:], prompt, self.language)
+        if result is None:
+            return None
+        words, metadata = result
+        
+        self.updates += 1
+        self.total_processing_time += metadata.get("processing_time", 0.0)
+        self.total_audio_seconds += metadata.get("audio_seconds", 0.0)
+        
+        offset = start / self.SAMPLE_RATE
+        hypothesis = [(word, word_start + offset, word_end + offset) for word, word_start, word_end in words]
+        
+        # Commit the prefix this hypothesis shares with the previous one
+        agreed = 0
+        for current, previous in zip(hypothesis, self._previous):
+            if self._normalize(current[0]) != self._normalize(previous[0]):
+                break
+            agreed += 1
+        if agreed:
+            self.committed.extend(word for word, _, _ in hypothesis[:agreed])
+            self._commit_offset = max(self._commit_offset, int(hypothesis[agreed - 1][2] * self.SAMPLE_RATE))
+        self._previous = hypothesis[agreed:]
+        
+        return {
+            "committed": "".join(self.committed).strip(),
+            "tentative": "".join(word for word, _, _ in self._previous).strip(),
+            "real_time_factor": metadata.get("real_time_factor", 0.0)
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decode statistics for the current utterance."""
+        return {
+            "updates": self.updates,
+            "committed_words": len(self.committed),
+            "real_time_factor": self.total_processing_time / self.total_audio_seconds if self.total_audio_seconds else 0.0
         }
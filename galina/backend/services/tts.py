@@ -6,23 +6,51 @@ Handles communication with the local TTS API endpoint.
 
 import json
 import requests
+import aiohttp
 import logging
 import io
 import time
 import base64
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, BinaryIO, Generator, AsyncGenerator
 
+from .tts_cache import TTSCache, tts_cache_key
+from .segmentation import split_text
+from .audio_ingest import concat_wav
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Formats whose files can be joined end to end (WAV by merging its PCM data,
+# the others by concatenating bytes); long texts in other formats are sent whole
+SPLITTABLE_FORMATS = ("wav", "pcm", "mp3", "aac")
+
+
+def _retryable(error: Exception) -> bool:
+    """Whether a failed TTS request is worth retrying (not a client error other than 429)."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    elif isinstance(error, aiohttp.ClientResponseError):
+        status = error.status
+    else:
+        return True  # Connection errors and timeouts
+    return status >= 500 or status == 429
+
 class TTSClient:
     """
     Client for communicating with a local TTS API.
     
     This class handles requests to a locally hosted TTS API that follows
-    the OpenAI API format for text-to-speech generation.
+    the OpenAI API format for text-to-speech generation. text_to_speech()
+    is a blocking call kept for scripts; async code should use
+    async_text_to_speech() or astream_text_to_speech(), which share a pooled
+    keep-alive HTTP session across all callers.
+    
+    Splitting long texts (split_chars) serves callers that hand the client a
+    whole document; the pipeline segments responses itself and sends
+    sentences well below the threshold.
     """
     
     def __init__(
@@ -33,7 +61,16 @@ class TTSClient:
         output_format: str = "wav",
         speed: float = 1.0,
         timeout: int = 60,
-        chunk_size: int = 4096
+        chunk_size: int = 4096,
+        cache: Optional[TTSCache] = None,
+        cache_max_chars: int = 500,
+        pool_size: int = 32,
+        pool_per_host: int = 16,
+        keepalive_timeout: float = 30.0,
+        split_chars: int = 600,
+        split_segment_chars: int = 300,
+        split_concurrency: int = 4,
+        split_retries: int = 2
     ):
         """
         Initialize the TTS client.
@@ -46,6 +83,16 @@ class TTSClient:
             speed: Speech speed multiplier (0.25 to 4.0)
             timeout: Request timeout in seconds
             chunk_size: Size of audio chunks to stream in bytes
+            cache: Cache of synthesized audio consulted before the API (None disables caching)
+            cache_max_chars: Longer texts are synthesized without caching
+            pool_size: Maximum open connections in the async connection pool
+            pool_per_host: Maximum open connections per host in the async pool
+            keepalive_timeout: Seconds an idle pooled connection is kept open
+            split_chars: Longer texts are split and their segments synthesized
+                in parallel (0 disables splitting)
+            split_segment_chars: Maximum length of a segment of a split text
+            split_concurrency: Segments of one text synthesized at the same time
+            split_retries: Retries of a failed segment before the text fails
         """
         self.api_endpoint = api_endpoint
         self.model = model
@@ -54,36 +101,168 @@ class TTSClient:
         self.speed = speed
         self.timeout = timeout
         self.chunk_size = chunk_size
+        self.cache = cache
+        self.cache_max_chars = cache_max_chars
+        self.pool_size = pool_size
+        self.pool_per_host = pool_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.split_chars = split_chars
+        self.split_segment_chars = min(split_segment_chars, split_chars) if split_chars > 0 else split_segment_chars
+        self.split_concurrency = max(1, split_concurrency)
+        self.split_retries = max(0, split_retries)
+        
+        # Async keep-alive session, created on first use
+        self._session: Optional[aiohttp.ClientSession] = None
         
         # State tracking
         self.is_processing = False
         self.last_processing_time = 0
+        self.last_first_chunk_time = 0
+        self.http_stats = {
+            "requests": 0,
+            "streamed_chunks": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "split_texts": 0,
+            "split_segments": 0,
+            "segment_retries": 0
+        }
         
         logger.info(f"Initialized TTS Client with endpoint={api_endpoint}, "
                    f"model={model}, voice={voice}")
     
+    def _cache_key(self, text: str) -> Optional[str]:
+        """Cache key of a text with the current voice settings (None if not cacheable)."""
+        if self.cache is None or len(text) > self.cache_max_chars:
+            return None
+        return tts_cache_key(text, self.model, self.voice, self.output_format, self.speed)
+    
+    def _payload(self, text: str) -> Dict[str, Any]:
+        """Request body for a text."""
+        return {
+            "model": self.model,
+            "input": text,
+            "voice": self.voice,
+            "response_format": self.output_format,
+            "speed": self.speed
+        }
+    
+    def _split(self, text: str) -> Optional[List[str]]:
+        """Segments of a long text to synthesize in parallel (None to send it whole)."""
+        if self.split_chars <= 0 or len(text) <= self.split_chars or self.output_format not in SPLITTABLE_FORMATS:
+            return None
+        segments = split_text(text, self.split_segment_chars)
+        if len(segments) < 2:
+            return None
+        self.http_stats["split_texts"] += 1
+        self.http_stats["split_segments"] += len(segments)
+        return segments
+    
+    def _join(self, parts: List[bytes]) -> Optional[bytes]:
+        """Reassemble segment audio in order (None if the parts cannot be joined)."""
+        if self.output_format == "wav":
+            return concat_wav(parts)
+        return b"".join(parts)
+    
+    def _segment_failed(self, text: str, error: Exception, attempt: int) -> float:
+        """Log a failed segment and return the backoff before retrying it (re-raises when out of retries)."""
+        if attempt >= self.split_retries or not _retryable(error):
+            raise error
+        self.http_stats["segment_retries"] += 1
+        delay = 0.25 * 2 ** attempt
+        logger.warning(f"TTS segment {text[:40]!r} failed ({error}), retrying in {delay:.2f}s")
+        return delay
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled keep-alive session on first use."""
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace_config]
+            )
+        return self._session
+    
+    async def _on_connection_created(self, session, context, params):
+        """Trace hook: a new TCP connection was opened."""
+        self.http_stats["connections_created"] += 1
+    
+    async def _on_connection_reused(self, session, context, params):
+        """Trace hook: a pooled keep-alive connection was reused."""
+        self.http_stats["connections_reused"] += 1
+    
+    async def _aget_cached(self, key: Optional[str]) -> Optional[bytes]:
+        """Cache lookup from the event loop; only a disk-tier read goes to a thread."""
+        if key is None:
+            return None
+        audio_data = self.cache.get_memory(key)
+        if audio_data is not None:
+            return audio_data
+        if self.cache.on_disk(key):
+            return await asyncio.to_thread(self.cache.get, key)
+        return self.cache.get(key)  # Counts the miss, no I/O
+    
     def text_to_speech(self, text: str) -> bytes:
         """
         Convert text to speech audio.
         
+        Texts longer than split_chars are split at sentence boundaries and
+        their segments synthesized in parallel on a thread pool created for
+        the call, then joined in order.
+        
         Args:
             text: Text to convert to speech
             
         Returns:
             Audio data as bytes
         """
+        segments = self._split(text)
+        if segments is not None:
+            workers = min(self.split_concurrency, len(segments))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-segment") as pool:
+                parts = list(pool.map(self._segment_to_speech, segments))
+            audio_data = self._join(parts)
+            if audio_data is not None:
+                return audio_data
+            logger.warning("TTS segments could not be joined, synthesizing the text whole")
+        
+        cache_key = self._cache_key(text)
+        if cache_key is not None:
+            audio_data = self.cache.get(cache_key)
+            if audio_data is not None:
+                return audio_data
+        
+        audio_data = self._synthesize(text)
+        if cache_key is not None:
+            self.cache.put(cache_key, audio_data)
+        return audio_data
+    
+    def _segment_to_speech(self, text: str) -> bytes:
+        """Synthesize one segment of a split text, retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                return self.text_to_speech(text)
+            except requests.RequestException as e:
+                time.sleep(self._segment_failed(text, e, attempt))
+                attempt += 1
+    
+    def _synthesize(self, text: str) -> bytes:
+        """Request speech for a text from the TTS API, bypassing the cache."""
         self.is_processing = True
         start_time = time.time()
         
         try:
-            # Prepare request payload
-            payload = {
-                "model": self.model,
-                "input": text,
-                "voice": self.voice,
-                "response_format": self.output_format,
-                "speed": self.speed
-            }
+            payload = self._payload(text)
             
             logger.info(f"Sending TTS request with {len(text)} characters of text")
             
@@ -127,18 +306,20 @@ class TTSClient:
         Yields:
             Chunks of audio data
         """
+        cache_key = self._cache_key(text)
+        if cache_key is not None:
+            audio_data = self.cache.get(cache_key)
+            if audio_data is not None:
+                for start_idx in range(0, len(audio_data), self.chunk_size):
+                    yield audio_data[start_idx:start_idx + self.chunk_size]
+                return
+        
         self.is_processing = True
         start_time = time.time()
+        streamed = [] if cache_key is not None else None
         
         try:
-            # Prepare request payload
-            payload = {
-                "model": self.model,
-                "input": text,
-                "voice": self.voice,
-                "response_format": self.output_format,
-                "speed": self.speed
-            }
+            payload = self._payload(text)
             
             logger.info(f"Sending streaming TTS request with {len(text)} characters of text")
             
@@ -158,11 +339,15 @@ class TTSClient:
                     # The API supports streaming
                     for chunk in response.iter_content(chunk_size=self.chunk_size):
                         if chunk:
+                            if streamed is not None:
+                                streamed.append(chunk)
                             yield chunk
                 else:
                     # The API doesn't support streaming, but we'll fake it by
                     # splitting the response into chunks
                     audio_data = response.content
+                    if streamed is not None:
+                        streamed.append(audio_data)
                     total_chunks = (len(audio_data) + self.chunk_size - 1) // self.chunk_size
                     
                     for i in range(total_chunks):
@@ -174,6 +359,9 @@ class TTSClient:
             self.last_processing_time = time.time() - start_time
             logger.info(f"Completed TTS streaming after {self.last_processing_time:.2f}s")
             
+            if streamed is not None:
+                self.cache.put(cache_key, b"".join(streamed))
+            
         except requests.RequestException as e:
             logger.error(f"TTS API streaming request error: {e}")
             raise
@@ -183,12 +371,69 @@ class TTSClient:
         finally:
             self.is_processing = False
     
+    async def astream_text_to_speech(self, text: str) -> AsyncGenerator[bytes, None]:
+        """
+        Stream audio from the TTS API over the pooled session as it arrives.
+        
+        Cached audio is yielded in chunk_size pieces; synthesized audio is
+        cached once the response has been read completely. Long texts are
+        not split here, since playback already starts at the first chunk.
+        
+        Args:
+            text: Text to convert to speech
+            
+        Yields:
+            Chunks of audio data (at most chunk_size bytes each)
+        """
+        cache_key = self._cache_key(text)
+        audio_data = await self._aget_cached(cache_key)
+        if audio_data is not None:
+            for start_idx in range(0, len(audio_data), self.chunk_size):
+                yield audio_data[start_idx:start_idx + self.chunk_size]
+            return
+        
+        self.is_processing = True
+        start_time = time.time()
+        streamed = [] if cache_key is not None else None
+        
+        try:
+            logger.info(f"Sending streaming TTS request with {len(text)} characters of text")
+            self.http_stats["requests"] += 1
+            
+            async with self._get_session().post(self.api_endpoint, json=self._payload(text)) as response:
+                response.raise_for_status()
+                
+                first_chunk = True
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    if first_chunk:
+                        self.last_first_chunk_time = time.time() - start_time
+                        first_chunk = False
+                    self.http_stats["streamed_chunks"] += 1
+                    if streamed is not None:
+                        streamed.append(chunk)
+                    yield chunk
+            
+            self.last_processing_time = time.time() - start_time
+            logger.info(f"Completed TTS streaming after {self.last_processing_time:.2f}s "
+                       f"(first chunk after {self.last_first_chunk_time:.2f}s)")
+            
+            if streamed is not None:
+                await asyncio.to_thread(self.cache.put, cache_key, b"".join(streamed))
+            
+        except aiohttp.ClientError as e:
+            logger.error(f"TTS API streaming request error: {e}")
+            raise
+        finally:
+            self.is_processing = False
+    
     async def async_text_to_speech(self, text: str) -> bytes:
         """
         Asynchronously generate audio data from the TTS API.
         
-        This method provides asynchronous TTS capability by running
-        the synchronous method in a thread.
+        Uses the pooled keep-alive session, so no thread is tied up while
+        the TTS server renders. Texts longer than split_chars are split at
+        sentence boundaries and their segments synthesized concurrently, so
+        the wait approaches that of the longest segment.
         
         Args:
             text: Text to convert to speech
@@ -196,18 +441,128 @@ class TTSClient:
         Returns:
             Complete audio data as bytes
         """
+        segments = self._split(text)
+        if segments is not None:
+            audio_data = await self._asegments_to_speech(segments)
+            if audio_data is not None:
+                return audio_data
+            logger.warning("TTS segments could not be joined, synthesizing the text whole")
+        
+        cache_key = self._cache_key(text)
+        audio_data = await self._aget_cached(cache_key)
+        if audio_data is not None:
+            return audio_data
+        
+        audio_data = await self._asynthesize(text)
+        if cache_key is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, audio_data)
+        return audio_data
+    
+    async def _asegments_to_speech(self, segments: List[str]) -> Optional[bytes]:
+        """Synthesize segments concurrently (split_concurrency at a time) and join them in order."""
+        slots = asyncio.Semaphore(self.split_concurrency)
+        
+        async def render(text: str) -> bytes:
+            async with slots:
+                attempt = 0
+                while True:
+                    try:
+                        return await self.async_text_to_speech(text)
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        await asyncio.sleep(self._segment_failed(text, e, attempt))
+                        attempt += 1
+        
+        tasks = [asyncio.create_task(render(text)) for text in segments]
+        try:
+            parts = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return await asyncio.to_thread(self._join, parts)
+    
+    async def _asynthesize(self, text: str) -> bytes:
+        """Request speech for a text over the pooled session, bypassing the cache."""
         self.is_processing = True
+        start_time = time.time()
         
         try:
-            # Get complete audio data
-            audio_data = await asyncio.to_thread(self.text_to_speech, text)
+            logger.info(f"Sending TTS request with {len(text)} characters of text")
+            self.http_stats["requests"] += 1
+            
+            async with self._get_session().post(self.api_endpoint, json=self._payload(text)) as response:
+                response.raise_for_status()
+                audio_data = await response.read()
+            
+            self.last_processing_time = time.time() - start_time
+            logger.info(f"Received TTS response after {self.last_processing_time:.2f}s, "
+                       f"size: {len(audio_data)} bytes")
+            
             return audio_data
-        except Exception as e:
-            logger.error(f"Async TTS error: {e}")
+            
+        except aiohttp.ClientError as e:
+            logger.error(f"Async TTS API request error: {e}")
             raise
         finally:
             self.is_processing = False
     
+    async def prerender(self, texts: List[str], concurrency: int = 4) -> Dict[str, Any]:
+        """
+        Make sure speech for fixed texts is cached, synthesizing what is missing.
+        
+        Every text's cache entry is pinned, so later requests for it are served
+        from memory without contacting the TTS API. Texts already on disk from
+        an earlier run are only loaded.
+        
+        Args:
+            texts: Texts to pre-render
+            concurrency: Texts synthesized at the same time
+            
+        Returns:
+            Dict with counts of cached/rendered/failed texts, coverage and duration
+        """
+        started_at = time.time()
+        report = {"texts": 0, "already_cached": 0, "rendered": 0, "failed": 0, "uncacheable": 0}
+        if self.cache is None:
+            report["uncacheable"] = len(texts)
+            return {**report, "coverage": 0.0, "duration": 0.0}
+        
+        slots = asyncio.Semaphore(max(1, concurrency))
+        
+        async def render(text: str):
+            key = self._cache_key(text)
+            if key is None:
+                report["uncacheable"] += 1
+                return
+            if await asyncio.to_thread(self.cache.pin, key):
+                report["already_cached"] += 1
+                return
+            async with slots:
+                try:
+                    audio_data = await self._asynthesize(text)
+                except Exception as e:
+                    logger.warning(f"Failed to pre-render TTS phrase {text[:40]!r}: {e}")
+                    report["failed"] += 1
+                    return
+            await asyncio.to_thread(self.cache.put, key, audio_data)
+            report["rendered"] += 1
+        
+        unique_texts = list(dict.fromkeys(texts))
+        report["texts"] = len(unique_texts)
+        await asyncio.gather(*(render(text) for text in unique_texts))
+        
+        cached = report["already_cached"] + report["rendered"]
+        return {
+            **report,
+            "coverage": cached / len(unique_texts) if unique_texts else 1.0,
+            "duration": time.time() - started_at
+        }
+    
+    async def aclose(self) -> None:
+        """Close pooled HTTP connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     def get_config(self) -> Dict[str, Any]:
         """
         Get the current configuration.
@@ -224,5 +579,16 @@ class TTSClient:
             "timeout": self.timeout,
             "chunk_size": self.chunk_size,
             "is_processing": self.is_processing,
-            "last_processing_time": self.last_processing_time
+            "last_processing_time": self.last_processing_time,
+            "last_first_chunk_time": self.last_first_chunk_time,
+            "pool_size": self.pool_size,
+            "pool_per_host": self.pool_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "split_chars": self.split_chars,
+            "split_segment_chars": self.split_segment_chars,
+            "split_concurrency": self.split_concurrency,
+            "split_retries": self.split_retries,
+            "http_stats": dict(self.http_stats),
+            "cache_max_chars": self.cache_max_chars,
+            "cache": self.cache.get_stats() if self.cache is not None else None
         }
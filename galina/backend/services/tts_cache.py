@@ -0,0 +1,285 @@
+"""
+TTS Cache Service
+
+Content-addressed cache of synthesized speech: an in-memory LRU in front of
+a byte-bounded directory on disk.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def tts_cache_key(text: str, model: str, voice: str, output_format: str, speed: float) -> str:
+    """
+    Key of a synthesized utterance: SHA-256 of everything that changes the audio.
+
+    Args:
+        text: Text spoken
+        model: TTS model name
+        voice: Voice name
+        output_format: Audio format (wav, mp3, opus, ...)
+        speed: Speech speed multiplier
+
+    Returns:
+        Hex digest
+    """
+    material = json.dumps([text, model, voice, output_format, float(speed)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier cache of TTS audio keyed by tts_cache_key().
+
+    Lookups check the memory tier, then the disk tier (promoting hits to
+    memory). Both tiers evict least recently used entries once over their
+    byte budget; the disk tier's recency survives restarts through file
+    modification times. Pinned entries (pre-rendered phrases) are never
+    evicted. Methods are thread-safe, since synthesis runs in worker threads.
+    """
+
+    def __init__(self, memory_bytes: int = 16 * 1024 * 1024, disk_dir: Optional[str] = "tts_cache",
+                 disk_bytes: int = 256 * 1024 * 1024, max_entry_bytes: int = 2 * 1024 * 1024):
+        """
+        Initialize the cache, indexing audio already on disk.
+
+        Args:
+            memory_bytes: Memory tier budget (0 disables it)
+            disk_dir: Directory of the disk tier (None or "" disables it)
+            disk_bytes: Disk tier budget
+            max_entry_bytes: Larger audio is not cached
+        """
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_bytes = disk_bytes
+        self.max_entry_bytes = max_entry_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, LRU order
+        self._disk_used = 0
+        self._pinned: set = set()
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "bytes_served": 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._index_disk()
+
+        logger.info(f"TTSCache initialized: memory={memory_bytes} bytes, "
+                   f"disk={self.disk_dir or 'off'} ({disk_bytes} bytes, {len(self._disk)} entries)")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key + ".audio")
+
+    def _index_disk(self):
+        """Index the disk tier, oldest access first."""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # Interrupted write
+            elif name.endswith(".audio"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        self._evict_disk()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up audio in both tiers.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached audio, or None on a miss
+        """
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+
+        with self._lock:
+            on_disk = self.disk_dir is not None and key in self._disk
+        if on_disk:
+            try:
+                path = self._path(key)
+                with open(path, "rb") as f:
+                    audio = f.read()
+                os.utime(path)  # Recency for the disk tier's LRU order after a restart
+            except OSError:
+                audio = None
+            with self._lock:
+                if audio is None:
+                    self._drop_disk(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self.stats["disk_hits"] += 1
+                    self.stats["bytes_served"] += len(audio)
+                    self._put_memory(key, audio)
+                    return audio
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """
+        Look up audio in the memory tier only (no I/O, safe on the event loop).
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached audio, or None if not in memory
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["bytes_served"] += len(audio)
+            return audio
+
+    def on_disk(self, key: str) -> bool:
+        """Whether a lookup of the key would read from the disk tier (no I/O)."""
+        with self._lock:
+            return self.disk_dir is not None and key in self._disk and key not in self._memory
+
+    def pin(self, key: str) -> bool:
+        """
+        Exempt an entry from eviction and load it into memory if it is on disk.
+
+        The key stays pinned even if nothing is cached for it yet, so audio
+        stored for it later is kept as well. Lookups here are not counted as
+        hits or misses.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Whether audio is cached for the key
+        """
+        with self._lock:
+            self._pinned.add(key)
+            if key in self._memory:
+                return True
+            on_disk = self.disk_dir is not None and key in self._disk
+        if not on_disk:
+            return False
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except OSError:
+            with self._lock:
+                self._drop_disk(key)
+            return False
+        with self._lock:
+            self._put_memory(key, audio)
+        return True
+
+    def put(self, key: str, audio: bytes):
+        """
+        Store audio in both tiers.
+
+        Args:
+            key: Cache key
+            audio: Synthesized audio
+        """
+        if not audio or len(audio) > self.max_entry_bytes:
+            return
+        with self._lock:
+            self.stats["stores"] += 1
+            self._put_memory(key, audio)
+            if self.disk_dir is None or key in self._disk:
+                return
+
+        # Write outside the lock; the rename makes the entry appear atomically
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(audio)
+                self._disk_used += len(audio)
+                self._evict_disk()
+
+    def _put_memory(self, key: str, audio: bytes):
+        """Insert into the memory tier and evict down to its budget (lock held)."""
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            victim = next((k for k in self._memory if k not in self._pinned), None)
+            if victim is None:
+                break
+            self._memory_used -= len(self._memory.pop(victim))
+            self.stats["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        """Delete least recently used files down to the disk budget (lock held)."""
+        while self._disk_used > self.disk_bytes:
+            key = next((k for k in self._disk if k not in self._pinned), None)
+            if key is None:
+                break
+            self._drop_disk(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self.stats["disk_evictions"] += 1
+
+    def _drop_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_used -= size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and tier usage."""
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": (self.stats["memory_hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0,
+                "pinned_entries": len(self._pinned),
+                "memory_entries": len(self._memory),
+                "memory_used_bytes": self._memory_used,
+                "memory_budget_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_used_bytes": self._disk_used,
+                "disk_budget_bytes": self.disk_bytes if self.disk_dir else 0,
+                "disk_dir": self.disk_dir
+            }
@@ -0,0 +1,382 @@
+"""
+TTS Transcoding Service
+
+Re-encodes synthesized speech (16-bit WAV/PCM) into a compressed format for
+the WebSocket.
+"""
+
+import time
+import struct
+import logging
+import threading
+from fractions import Fraction
+from typing import Dict, Any, List, Optional, Union
+
+import av
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Wire format name (as reported in tts_chunk "format") -> (container, encoder)
+WIRE_FORMATS = {
+    "ogg": ("ogg", "libopus"),    # Opus in Ogg: decodeAudioData in Chrome, Firefox, Safari 17+
+    "webm": ("webm", "libopus"),  # Opus in WebM: MediaSource playback
+    "mp3": ("mp3", "libmp3lame")  # Decodable everywhere
+}
+
+# Names clients may use for a wire format
+_FORMAT_ALIASES = {"opus": "ogg"}
+
+# TTS output formats the transcoder can read
+SOURCE_FORMATS = ("wav", "pcm")
+
+
+def normalize_wire_format(name: str) -> str:
+    """Map a requested wire format name to its canonical form ("" if unknown)."""
+    name = (name or "").strip().lower()
+    name = _FORMAT_ALIASES.get(name, name)
+    return name if name in WIRE_FORMATS else ""
+
+
+class _Sink:
+    """Non-seekable output for the muxer that hands out what was written since the last call."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class AudioEncoder:
+    """
+    Incremental encoder for one utterance.
+
+    Audio is fed as it arrives from the TTS API (a WAV file in pieces, or
+    raw PCM); each call returns the container bytes produced so far, so
+    encoded pages can be forwarded while synthesis is still running. An
+    instance must not be used from two threads at once.
+    """
+
+    def __init__(self, wire_format: str, source_format: str = "wav", bitrate: int = 24000,
+                 pcm_sample_rate: int = 24000, page_ms: int = 100):
+        """
+        Initialize the encoder.
+
+        Args:
+            wire_format: Output format (a WIRE_FORMATS name)
+            source_format: Input format ("wav", or "pcm" for headerless 16-bit mono)
+            bitrate: Target bitrate in bits per second
+            pcm_sample_rate: Sample rate of "pcm" input
+            page_ms: Longest audio buffered in an Ogg page or WebM cluster before it is flushed
+
+        Raises:
+            ValueError: If the wire or source format is not supported
+        """
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unsupported TTS wire format {wire_format!r}")
+        if source_format not in SOURCE_FORMATS:
+            raise ValueError(f"Cannot transcode TTS output format {source_format!r}")
+
+        self.wire_format = wire_format
+        self.bitrate = bitrate
+        self.page_ms = page_ms
+
+        self._header: Optional[bytearray] = bytearray() if source_format == "wav" else None
+        self._remainder = b""
+        self._channels = 1
+        self._sample_rate = pcm_sample_rate
+        self._samples = 0
+
+        self._sink = _Sink()
+        self._container = None
+        self._stream = None
+        self._resampler = None
+        self._closed = False
+
+        self.input_bytes = 0
+        self.output_bytes = 0
+
+    @property
+    def audio_seconds(self) -> float:
+        """Seconds of audio fed so far."""
+        return self._samples / self._sample_rate if self._sample_rate else 0.0
+
+    def _open(self):
+        """Create the muxer and encoder once the input's sample rate is known."""
+        container_format, codec = WIRE_FORMATS[self.wire_format]
+        if container_format == "ogg":
+            options = {"page_duration": str(self.page_ms * 1000)}  # microseconds
+        elif container_format == "webm":
+            options = {"cluster_time_limit": str(self.page_ms), "live": "1"}  # milliseconds
+        else:
+            options = {}
+        self._container = av.open(self._sink, mode="w", format=container_format, options=options)
+
+        # Opus encodes at 48 kHz; MP3 keeps the TTS rate
+        rate = 48000 if codec == "libopus" else self._sample_rate
+        self._stream = self._container.add_stream(codec, rate=rate)
+        self._stream.layout = "mono" if self._channels == 1 else "stereo"
+        self._stream.bit_rate = self.bitrate
+        self._resampler = av.AudioResampler(
+            format=self._stream.format.name, layout=self._stream.layout.name, rate=rate,
+            frame_size=self._stream.codec_context.frame_size or None
+        )
+
+    def _parse_header(self) -> bool:
+        """Consume the WAV header once its "data" chunk starts (returns whether it did)."""
+        view = memoryview(self._header)
+        if len(view) >= 12 and (view[:4] != b"RIFF" or view[8:12] != b"WAVE"):
+            raise ValueError("TTS audio is not a WAV file")
+
+        offset = 12
+        fmt_seen = False
+        while offset + 8 <= len(view):
+            chunk_id = bytes(view[offset:offset + 4])
+            chunk_size = int.from_bytes(view[offset + 4:offset + 8], "little")
+            body = offset + 8
+            if chunk_id == b"data":
+                if not fmt_seen:
+                    raise ValueError("WAV data chunk precedes its fmt chunk")
+                self._remainder = bytes(view[body:])
+                self._header = None
+                return True
+            if body + chunk_size > len(view):
+                return False  # Chunk not complete yet
+            if chunk_id == b"fmt ":
+                audio_format, channels, sample_rate = struct.unpack_from("<HHI", view, body)
+                bits_per_sample = struct.unpack_from("<H", view, body + 14)[0]
+                if audio_format == 0xFFFE and chunk_size >= 40:
+                    audio_format = struct.unpack_from("<H", view, body + 24)[0]
+                if audio_format != 1 or bits_per_sample != 16 or channels not in (1, 2):
+                    raise ValueError("Only 16-bit mono/stereo PCM WAV can be transcoded")
+                self._channels, self._sample_rate = channels, sample_rate
+                fmt_seen = True
+            offset = body + chunk_size + (chunk_size & 1)
+        return False
+
+    def _encode(self, frame) -> None:
+        for resampled in self._resampler.resample(frame):
+            for packet in self._stream.encode(resampled):
+                self._container.mux(packet)
+
+    def _take(self) -> bytes:
+        data = self._sink.take()
+        self.output_bytes += len(data)
+        return data
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """
+        Encode the next piece of input.
+
+        Args:
+            data: Next bytes of the TTS output
+
+        Returns:
+            Encoded bytes produced by this piece (possibly empty)
+
+        Raises:
+            ValueError: If the input is not 16-bit PCM WAV
+        """
+        self.input_bytes += len(data)
+        if self._header is not None:
+            self._header += data
+            if not self._parse_header():
+                return b""
+            data = b""
+
+        pcm = self._remainder + bytes(data)
+        frame_bytes = 2 * self._channels
+        usable = len(pcm) - len(pcm) % frame_bytes
+        self._remainder = pcm[usable:]
+        if not usable:
+            return b""
+
+        if self._container is None:
+            self._open()
+        samples = np.frombuffer(pcm, dtype="<i2", count=usable // 2).reshape(1, -1)
+        frame = av.AudioFrame.from_ndarray(samples, format="s16",
+                                           layout="mono" if self._channels == 1 else "stereo")
+        frame.sample_rate = self._sample_rate
+        frame.time_base = Fraction(1, self._sample_rate)
+        frame.pts = self._samples
+        self._samples += samples.shape[1] // self._channels
+        self._encode(frame)
+        return self._take()
+
+    def finish(self) -> bytes:
+        """
+        Flush the encoder and close the container.
+
+        Returns:
+            Remaining encoded bytes (container trailer included)
+        """
+        if self._closed:
+            return b""
+        if self._container is None:
+            if self._header is not None:
+                raise ValueError("TTS audio ended before its WAV data chunk")
+            self._open()  # Empty utterance: still emit a valid (silent) file
+        self._encode(None)
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self.close()
+        return self._take()
+
+    def close(self):
+        """Release the muxer without flushing (e.g. when the utterance is cancelled)."""
+        if not self._closed and self._container is not None:
+            self._container.close()
+        self._closed = True
+
+
+class TTSTranscoder:
+    """
+    Creates encoders for synthesized speech and keeps wire-size statistics.
+
+    Statistics compare the bytes the TTS API returned with the bytes sent
+    to clients, both per second of speech.
+    """
+
+    def __init__(self, source_format: str = "wav", opus_bitrate: int = 24000, mp3_bitrate: int = 48000,
+                 pcm_sample_rate: int = 24000, page_ms: int = 100):
+        """
+        Initialize the transcoder.
+
+        Args:
+            source_format: Format the TTS API returns
+            opus_bitrate: Opus target bitrate in bits per second
+            mp3_bitrate: MP3 target bitrate in bits per second
+            pcm_sample_rate: Sample rate of headerless "pcm" TTS output
+            page_ms: Longest audio buffered in an Ogg page or WebM cluster before it is flushed
+        """
+        self.source_format = source_format
+        self.opus_bitrate = opus_bitrate
+        self.mp3_bitrate = mp3_bitrate
+        self.pcm_sample_rate = pcm_sample_rate
+        self.page_ms = page_ms
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "utterances": 0,
+            "failures": 0,
+            "input_bytes": 0,
+            "output_bytes": 0,
+            "audio_seconds": 0.0,
+            "encode_time": 0.0,
+            "by_format": {}
+        }
+
+        logger.info(f"TTSTranscoder initialized: {source_format} -> {', '.join(WIRE_FORMATS)} "
+                   f"(opus {opus_bitrate} bps, mp3 {mp3_bitrate} bps)")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the TTS output can be transcoded at all."""
+        return self.source_format in SOURCE_FORMATS
+
+    def negotiate(self, requested: Union[str, List[str], None], default: str = "") -> str:
+        """
+        Pick the wire format for a connection.
+
+        Args:
+            requested: Format name or preference list from the client
+            default: Server default used when the client asks for nothing usable
+
+        Returns:
+            Wire format to transcode to, or "" to send TTS output as is
+        """
+        if not self.enabled:
+            return ""
+        names = [requested] if isinstance(requested, str) else list(requested or [])
+        for name in names + [default]:
+            if not isinstance(name, str):
+                continue
+            if name.strip().lower() == self.source_format:
+                return ""
+            wire_format = normalize_wire_format(name)
+            if wire_format:
+                return wire_format
+        return ""
+
+    def encoder(self, wire_format: str) -> AudioEncoder:
+        """
+        Create an incremental encoder for one utterance.
+
+        Args:
+            wire_format: Output format (a WIRE_FORMATS name)
+
+        Returns:
+            Encoder fed with TTS output in pieces
+        """
+        bitrate = self.mp3_bitrate if wire_format == "mp3" else self.opus_bitrate
+        return AudioEncoder(wire_format, self.source_format, bitrate=bitrate,
+                            pcm_sample_rate=self.pcm_sample_rate, page_ms=self.page_ms)
+
+    def transcode(self, audio: bytes, wire_format: str) -> bytes:
+        """
+        Transcode a complete utterance (blocking; run in a worker thread).
+
+        Args:
+            audio: TTS output
+            wire_format: Output format
+
+        Returns:
+            Encoded audio file
+        """
+        started_at = time.perf_counter()
+        encoder = self.encoder(wire_format)
+        try:
+            encoded = encoder.feed(audio) + encoder.finish()
+        except Exception:
+            encoder.close()
+            self.record_failure()
+            raise
+        self.record(encoder, time.perf_counter() - started_at)
+        return encoded
+
+    def record(self, encoder: AudioEncoder, encode_time: float):
+        """
+        Add a finished utterance to the statistics.
+
+        Args:
+            encoder: Encoder of the utterance
+            encode_time: Seconds spent encoding
+        """
+        with self._lock:
+            self.stats["utterances"] += 1
+            self.stats["input_bytes"] += encoder.input_bytes
+            self.stats["output_bytes"] += encoder.output_bytes
+            self.stats["audio_seconds"] += encoder.audio_seconds
+            self.stats["encode_time"] += encode_time
+            counts = self.stats["by_format"].setdefault(encoder.wire_format, {"utterances": 0, "output_bytes": 0})
+            counts["utterances"] += 1
+            counts["output_bytes"] += encoder.output_bytes
+
+    def record_failure(self):
+        """Count an utterance whose transcoding failed."""
+        with self._lock:
+            self.stats["failures"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get byte counts and bytes per second of speech before and after transcoding."""
+        with self._lock:
+            seconds = self.stats["audio_seconds"]
+            return {
+                **self.stats,
+                "by_format": {name: dict(counts) for name, counts in self.stats["by_format"].items()},
+                "source_format": self.source_format,
+                "opus_bitrate": self.opus_bitrate,
+                "mp3_bitrate": self.mp3_bitrate,
+                "input_bytes_per_second": self.stats["input_bytes"] / seconds if seconds else 0.0,
+                "output_bytes_per_second": self.stats["output_bytes"] / seconds if seconds else 0.0,
+                "compression_ratio": (self.stats["input_bytes"] / self.stats["output_bytes"]
+                                      if self.stats["output_bytes"] else 0.0),
+                "realtime_factor": self.stats["encode_time"] / seconds if seconds else 0.0
+            }
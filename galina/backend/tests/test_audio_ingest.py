@@ -0,0 +1,70 @@
+"""Tests for WAV parsing and resampling of uploaded audio."""
+
+import struct
+
+import numpy as np
+import pytest
+
+from services.audio_ingest import (
+    StreamingAudioIngest, can_resample, parse_wav, pcm16_to_float16k, pcm16_to_wav, resample_poly, trim_silence,
+)
+
+
+@pytest.mark.parametrize("rate", [8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000, 96000])
+def test_standard_rates_resample(rate):
+    tone = (np.sin(np.arange(rate // 10) * 2 * np.pi * 440 / rate) * 8000).astype(np.int16)
+    out = pcm16_to_float16k(tone, rate)
+    assert can_resample(rate)
+    assert abs(len(out) - 1600) <= 1
+
+
+@pytest.mark.parametrize("rate", [0, -16000, 47999, 999983])
+def test_unusual_rates_are_refused(rate):
+    assert not can_resample(rate)
+    with pytest.raises(ValueError):
+        pcm16_to_float16k(np.ones(100, dtype=np.int16), rate)
+
+
+def test_resample_rejects_large_factors():
+    with pytest.raises(ValueError):
+        resample_poly(np.ones(100, dtype=np.int16), 16000, 999983)
+
+
+def test_zero_sample_rate_header_is_not_parsed():
+    wav = bytearray(pcm16_to_wav(np.ones(160, dtype=np.int16), 16000))
+    struct.pack_into("<I", wav, 24, 0)
+    assert parse_wav(bytes(wav)) is None
+    assert trim_silence(bytes(wav))[0] == bytes(wav)
+
+
+def _noise(seconds, level_db, rate=16000, seed=0):
+    rms = 32768 * 10 ** (level_db / 20)
+    return np.random.default_rng(seed).normal(0, rms, int(rate * seconds))
+
+
+def _speech(seconds, level_db, rate=16000):
+    t = np.arange(int(rate * seconds)) / rate
+    # 4 Hz syllable envelope over a voiced tone
+    return np.sin(2 * np.pi * 220 * t) * np.abs(np.sin(2 * np.pi * 4 * t)) * 32768 * 10 ** (level_db / 20) * 2
+
+
+@pytest.mark.parametrize("noise_db", [-70, -45, -40])
+def test_utterance_ends_in_steady_background_noise(noise_db):
+    noise = _noise(6, noise_db)
+    noise[16000:48000] += _speech(2, -20)
+    pcm = np.clip(noise, -32768, 32767).astype(np.int16)
+
+    ingest = StreamingAudioIngest(sample_rate=16000)
+    events = []
+    for start in range(0, len(pcm), 320):
+        events.extend(name for name, _ in ingest.feed(pcm[start:start + 320].tobytes()))
+
+    assert events == ["speech_start", "speech_end"]
+    assert not ingest.in_speech
+
+
+def test_noise_alone_is_not_speech():
+    pcm = np.clip(_noise(5, -42), -32768, 32767).astype(np.int16)
+    ingest = StreamingAudioIngest(sample_rate=16000)
+    events = ingest.feed(pcm.tobytes())
+    assert events == [] and not ingest.in_speech
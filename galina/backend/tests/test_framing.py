@@ -0,0 +1,67 @@
+"""Tests for the binary WebSocket frame format."""
+
+import pytest
+
+from services.framing import (
+    FLAG_FINAL, FRAME_HEADER, AudioCodec, FrameKind,
+    codec_from_format, decode_frame, detect_codec, encode_frame, format_from_codec,
+)
+
+
+def test_round_trip():
+    data = encode_frame(FrameKind.AUDIO_UPLOAD, AudioCodec.WAV, "req-1", 3, b"\x00\x01audio", flags=FLAG_FINAL)
+    frame = decode_frame(data)
+
+    assert frame.kind == FrameKind.AUDIO_UPLOAD
+    assert frame.codec == AudioCodec.WAV
+    assert frame.request_id == "req-1"
+    assert frame.sequence == 3
+    assert frame.final
+    assert bytes(frame.payload) == b"\x00\x01audio"
+
+
+def test_payload_is_a_view_of_the_message():
+    data = bytearray(encode_frame(FrameKind.AUDIO_STREAM, AudioCodec.PCM_S16LE, "", 0, b"abcd"))
+    frame = decode_frame(data)
+    data[-1:] = b"z"
+    assert bytes(frame.payload) == b"abcz"
+    assert not frame.final
+
+
+def test_unknown_codec_decodes_as_unknown():
+    data = bytearray(encode_frame(FrameKind.AUDIO_UPLOAD, AudioCodec.WAV, "r", 0, b""))
+    data[2] = 200
+    assert decode_frame(data).codec == AudioCodec.UNKNOWN
+
+
+@pytest.mark.parametrize("data", [
+    b"\x01\x01",                                         # Shorter than the header
+    FRAME_HEADER.pack(2, 1, 1, 0, 0, 0),                 # Unknown version
+    FRAME_HEADER.pack(1, 99, 1, 0, 0, 0),                # Unknown kind
+    FRAME_HEADER.pack(1, 1, 1, 0, 10, 0) + b"short",     # Request id runs past the end
+])
+def test_malformed_frames_are_rejected(data):
+    with pytest.raises(ValueError, match="INVALID_REQUEST_DATA"):
+        decode_frame(data)
+
+
+@pytest.mark.parametrize("head, codec", [
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", AudioCodec.WAV),
+    (b"\x1a\x45\xdf\xa3\x01\x00", AudioCodec.WEBM_OPUS),
+    (b"OggS\x00\x02", AudioCodec.OGG_OPUS),
+    (b"fLaC\x00\x00", AudioCodec.FLAC),
+    (b"\x00\x00\x00\x20ftypM4A ", AudioCodec.AAC),
+    (b"ID3\x04\x00", AudioCodec.MP3),
+    (b"\xff\xfb\x90\x00", AudioCodec.MP3),
+    (b"\xff\xf1\x50\x80", AudioCodec.AAC),
+    (b"hello world", AudioCodec.UNKNOWN),
+])
+def test_detect_codec(head, codec):
+    assert detect_codec(head) == codec
+
+
+def test_format_names():
+    assert codec_from_format("MP3") == AudioCodec.MP3
+    assert codec_from_format("") == AudioCodec.UNKNOWN
+    assert format_from_codec(AudioCodec.OGG_OPUS) == "ogg"
+    assert format_from_codec(AudioCodec.UNKNOWN) == ""
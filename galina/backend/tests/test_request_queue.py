@@ -0,0 +1,69 @@
+"""Tests for the pipeline's priority request queue."""
+
+import asyncio
+
+import pytest
+
+from services.request_queue import PriorityRequestQueue
+
+
+def test_higher_priority_first_fifo_within_priority():
+    queue = PriorityRequestQueue()
+    for item, priority in [("low", 0), ("normal-1", 1), ("high", 2), ("normal-2", 1)]:
+        queue.put_nowait(item, priority)
+
+    assert [queue.get_nowait() for _ in range(4)] == ["high", "normal-1", "normal-2", "low"]
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+
+def test_maxsize():
+    queue = PriorityRequestQueue(maxsize=2)
+    queue.put_nowait("a")
+    queue.put_nowait("b")
+    assert queue.full()
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait("c")
+
+
+def test_remove_matching_items_keeps_order_and_join_count():
+    async def scenario():
+        queue = PriorityRequestQueue()
+        for item, priority in [("a1", 1), ("b1", 2), ("a2", 3), ("b2", 1)]:
+            queue.put_nowait(item, priority)
+
+        removed = queue.remove(lambda item: item.startswith("a"))
+        remaining = [queue.get_nowait() for _ in range(len(queue))]
+        for _ in remaining:
+            queue.task_done()
+        await asyncio.wait_for(queue.join(), 1)  # Removed items count as done
+        return removed, remaining
+
+    removed, remaining = asyncio.run(scenario())
+    assert removed == ["a2", "a1"]
+    assert remaining == ["b1", "b2"]
+
+
+def test_put_wakes_blocked_get():
+    async def scenario():
+        queue = PriorityRequestQueue()
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+        queue.put_nowait("item")
+        return await asyncio.wait_for(getter, 1)
+
+    assert asyncio.run(scenario()) == "item"
+
+
+def test_cancelled_get_passes_wakeup_on():
+    async def scenario():
+        queue = PriorityRequestQueue()
+        first = asyncio.ensure_future(queue.get())
+        second = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        queue.put_nowait("item")  # Wakes the first getter...
+        first.cancel()  # ...which is cancelled before it runs
+        return await asyncio.wait_for(second, 1)
+
+    assert asyncio.run(scenario()) == "item"
@@ -0,0 +1,56 @@
+"""Tests for sentence segmentation of assistant text."""
+
+import pytest
+
+from services.segmentation import SentenceSegmenter, split_text
+
+
+def segment(text, min_chars=20, max_chars=200):
+    segmenter = SentenceSegmenter(min_chars=min_chars, max_chars=max_chars)
+    return segmenter.feed(text) + segmenter.flush()
+
+
+def test_splits_at_sentence_end():
+    assert segment("Первое предложение ответа. Второе предложение ответа!") == [
+        "Первое предложение ответа.", "Второе предложение ответа!"
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "Арендная плата установлена ст. 615 ГК РФ и договором аренды.",
+    "Обязанность предусмотрена ч. 1 ст. 15 ГК РФ для всех сторон.",
+    "Смотрите п. 3 договора, а также см. Приложение к договору.",
+    "Иск подан в суд г. Москвы в размере 10 тыс. рублей или 10 тыс. Руб.",
+    "Сумма составила 100 руб. Без учета процентов и неустойки.",
+])
+def test_keeps_citations_and_abbreviations_together(text):
+    assert segment(text) == [text]
+
+
+def test_pronoun_im_ends_a_sentence():
+    assert segment("Документы мы уже передали им. Теперь ждем ответа от суда.") == [
+        "Документы мы уже передали им.", "Теперь ждем ответа от суда."
+    ]
+
+
+def test_decimal_numbers_are_not_split():
+    assert segment("Ставка составляет 15.5 процента годовых в этом году.") == [
+        "Ставка составляет 15.5 процента годовых в этом году."
+    ]
+
+
+def test_streamed_tokens_match_whole_text():
+    text = "Срок исковой давности три года, ст. 196 ГК РФ. Он начинается со дня нарушения права. "
+    segmenter = SentenceSegmenter()
+    segments = []
+    for word in text.split(" "):
+        segments += segmenter.feed(word + " ")
+    assert segments + segmenter.flush() == segment(text)
+
+
+def test_split_text_keeps_citations_and_respects_limit():
+    sentence = "Лицо вправе требовать возмещения убытков по ст. 15 ГК РФ в полном объеме."
+    segments = split_text(" ".join([sentence] * 10), max_chars=160)
+    assert all(len(s) <= 160 for s in segments)
+    assert all("ст. 15" in s for s in segments)
+    assert " ".join(segments) == " ".join([sentence] * 10)
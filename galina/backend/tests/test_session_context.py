@@ -0,0 +1,69 @@
+"""Tests for the per-session conversation context store."""
+
+import asyncio
+
+from services.session_context import SessionContextStore
+from services.conversation_storage import ConversationStorage
+
+
+def test_concurrent_acquires_share_one_restored_context(tmp_path):
+    async def scenario():
+        store = SessionContextStore(max_sessions=1, spill_storage=ConversationStorage(storage_dir=str(tmp_path)))
+        context = await store.acquire("A")
+        context.messages.append({"role": "user", "content": "hello"})
+        await store.acquire("A")  # Account for the new message
+        await store.acquire("B")  # Evicts and spills A
+        await asyncio.sleep(0.05)
+
+        first, second = await asyncio.gather(store.acquire("A"), store.acquire("A"))
+        return store, first, second
+
+    store, first, second = asyncio.run(scenario())
+    assert first is second
+    assert first.messages == [{"role": "user", "content": "hello"}]
+    assert store.get_stats()["total_bytes"] == first.size_bytes
+
+
+def test_release_drops_context(tmp_path):
+    async def scenario():
+        store = SessionContextStore(spill_storage=ConversationStorage(storage_dir=str(tmp_path)))
+        await store.acquire("A")
+        store.release("A")
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.get("A") is None
+    assert store.get_stats()["total_bytes"] == 0
+
+
+def test_pinned_context_is_not_evicted(tmp_path):
+    async def scenario():
+        store = SessionContextStore(max_sessions=1)
+        pinned = await store.acquire("A", pin=True)
+        await store.acquire("B")  # Over budget, but A is still in use
+        kept = store.get("A")
+        store.unpin(pinned)
+        await store.acquire("C")
+        return store, pinned, kept
+
+    store, pinned, kept = asyncio.run(scenario())
+    assert kept is pinned
+    assert store.get("A") is None and store.get("B") is None
+    assert store.get_stats()["sessions"] == 1
+
+
+def test_spilled_context_file_does_not_contain_token(tmp_path):
+    async def scenario():
+        store = SessionContextStore(max_sessions=1, spill_storage=ConversationStorage(storage_dir=str(tmp_path)))
+        context = await store.acquire("secret-token")
+        context.messages.append({"role": "user", "content": "hello"})
+        await store.acquire("B")
+        await asyncio.sleep(0.05)
+        files = [(path.name, path.read_text()) for path in tmp_path.iterdir()]
+        restored = await store.acquire("secret-token")
+        return files, restored
+
+    files, restored = asyncio.run(scenario())
+    assert len(files) == 1
+    assert all("secret-token" not in name and "secret-token" not in content for name, content in files)
+    assert restored.messages == [{"role": "user", "content": "hello"}]
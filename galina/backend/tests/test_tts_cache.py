@@ -0,0 +1,68 @@
+"""Tests for the two-tier TTS audio cache."""
+
+from services.tts_cache import TTSCache, tts_cache_key
+
+
+def key(text):
+    return tts_cache_key(text, "tts-1", "tara", "wav", 1.0)
+
+
+def test_key_depends_on_every_setting():
+    base = tts_cache_key("Привет", "tts-1", "tara", "wav", 1.0)
+    assert base == tts_cache_key("Привет", "tts-1", "tara", "wav", 1)
+    assert len({base, tts_cache_key("Привет", "tts-1", "leo", "wav", 1.0),
+                tts_cache_key("Привет", "tts-1", "tara", "mp3", 1.0),
+                tts_cache_key("Привет", "tts-1", "tara", "wav", 1.25)}) == 4
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TTSCache(memory_bytes=20, disk_dir=None)
+    cache.put(key("a"), b"a" * 10)
+    cache.put(key("b"), b"b" * 10)
+    cache.get(key("a"))  # "b" is now the least recently used
+    cache.put(key("c"), b"c" * 10)
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == b"a" * 10
+    stats = cache.get_stats()
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_used_bytes"] == 20
+
+
+def test_disk_tier_survives_restart_and_promotes_hits(tmp_path):
+    TTSCache(memory_bytes=1024, disk_dir=str(tmp_path)).put(key("a"), b"audio")
+
+    cache = TTSCache(memory_bytes=1024, disk_dir=str(tmp_path))
+    assert cache.on_disk(key("a"))
+    assert cache.get(key("a")) == b"audio"
+    assert not cache.on_disk(key("a"))  # Promoted to memory
+    assert cache.get_stats()["disk_hits"] == 1
+
+
+def test_disk_tier_evicts_over_budget(tmp_path):
+    cache = TTSCache(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=25)
+    for text in "abc":
+        cache.put(key(text), text.encode() * 10)
+
+    assert cache.get(key("a")) is None
+    assert cache.get(key("c")) == b"c" * 10
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_pinned_entries_are_never_evicted(tmp_path):
+    cache = TTSCache(memory_bytes=20, disk_dir=str(tmp_path), disk_bytes=20)
+    assert not cache.pin(key("phrase"))  # Pinned before it is cached
+    cache.put(key("phrase"), b"p" * 10)
+    for text in "abcd":
+        cache.put(key(text), text.encode() * 10)
+
+    assert cache.get_memory(key("phrase")) == b"p" * 10
+    assert (tmp_path / (key("phrase") + ".audio")).exists()
+
+
+def test_oversized_and_empty_audio_is_not_cached():
+    cache = TTSCache(memory_bytes=1024, disk_dir=None, max_entry_bytes=8)
+    cache.put(key("long"), b"x" * 9)
+    cache.put(key("empty"), b"")
+    assert cache.get(key("long")) is None and cache.get(key("empty")) is None
+    assert cache.get_stats()["stores"] == 0
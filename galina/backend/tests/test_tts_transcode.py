@@ -0,0 +1,66 @@
+"""Tests for incremental transcoding of TTS audio."""
+
+import io
+
+import av
+import numpy as np
+import pytest
+
+from services.audio_ingest import pcm16_to_wav
+from services.tts_transcode import AudioEncoder, normalize_wire_format
+
+
+def tone(seconds=1.0, rate=24000):
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+
+
+def encode(encoder, data, piece=997):
+    out = [encoder.feed(data[start:start + piece]) for start in range(0, len(data), piece)]
+    return out, b"".join(out) + encoder.finish()
+
+
+def decoded_seconds(data):
+    with av.open(io.BytesIO(data)) as container:
+        stream = container.streams.audio[0]
+        samples = sum(frame.samples for frame in container.decode(stream))
+        return stream.codec_context.name, samples / stream.codec_context.sample_rate
+
+
+@pytest.mark.parametrize("wire_format, codec", [("ogg", "opus"), ("webm", "opus"), ("mp3", "mp3")])
+def test_wav_in_pieces_encodes_to_wire_format(wire_format, codec):
+    encoder = AudioEncoder(wire_format)
+    pieces, data = encode(encoder, pcm16_to_wav(tone(), 24000))
+
+    assert sum(map(len, pieces)) > 0  # Output is produced before finish()
+    name, seconds = decoded_seconds(data)
+    assert name.startswith(codec)
+    assert seconds == pytest.approx(1.0, abs=0.1)
+    assert encoder.audio_seconds == pytest.approx(1.0)
+    assert encoder.output_bytes == len(data)
+
+
+def test_raw_pcm_source():
+    encoder = AudioEncoder("ogg", source_format="pcm", pcm_sample_rate=16000)
+    _, data = encode(encoder, tone(0.5, rate=16000).tobytes(), piece=333)  # Odd sizes split samples
+    assert data[:4] == b"OggS"
+    assert decoded_seconds(data)[1] == pytest.approx(0.5, abs=0.1)
+
+
+def test_rejects_non_pcm_wav():
+    encoder = AudioEncoder("ogg")
+    with pytest.raises(ValueError):
+        encoder.feed(b"ID3\x04" + bytes(60))
+
+
+def test_unsupported_formats():
+    with pytest.raises(ValueError):
+        AudioEncoder("flac")
+    with pytest.raises(ValueError):
+        AudioEncoder("ogg", source_format="mp3")
+
+
+def test_normalize_wire_format():
+    assert normalize_wire_format(" Opus ") == "ogg"
+    assert normalize_wire_format("mp3") == "mp3"
+    assert normalize_wire_format("aac") == ""